@@ -0,0 +1,484 @@
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser_memory import sample_tree
+from login_checker import (ERROR_KEYWORDS, ERROR_SELECTORS, LOAD_PROFILES, POLL_INTERVAL, LoginChecker,
+                           load_config, run_checks, run_worker_pool)
+from test_server import SLOW_DELAY, LoginServer
+
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_history.jsonl")
+
+# Scenario mix for the end-to-end benchmark; "hang" is left out by default
+# because each hung URL costs a full timeout
+DEFAULT_MIX = "valid,bad,modal,slow,error,js"
+
+# A metric more than this much worse than the previous run is flagged
+REGRESSION_THRESHOLD = 0.10
+
+# Whether a bigger value is better for each end-to-end metric
+METRIC_DIRECTIONS = {
+    'checks_per_second': True,
+    'p50_latency': False,
+    'p95_latency': False,
+    'p99_latency': False,
+    'python_heap_peak_mb': False,
+    'python_rss_peak_mb': False,
+    'browser_tree_rss_peak_mb': False,
+}
+
+# Seconds between samples of the browser process tree's memory in the end-to-end benchmark
+MEMORY_SAMPLE_INTERVAL = 0.5
+
+# Implicit wait the checker used before every lookup moved to explicit waits
+LEGACY_IMPLICIT_WAIT = 10
+
+# Stand-in pages for the error scan benchmark
+STAND_IN_PAGES = {
+    "/clean": """<!DOCTYPE html>
+<html><head><title>Dashboard</title></head>
+<body>
+  <nav class="navbar">Portal</nav>
+  <div class="dashboard"><h1>Welcome back</h1><p>You have 3 new messages.</p></div>
+</body></html>""",
+    "/error": """<!DOCTYPE html>
+<html><head><title>Sign in</title></head>
+<body>
+  <form method="post">
+    <div class="alert alert-danger" role="alert">Invalid username or password.</div>
+    <input name="username"><input name="password" type="password">
+    <button type="submit">Sign in</button>
+  </form>
+</body></html>""",
+}
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serves the stand-in pages from memory"""
+    def do_GET(self):
+        body = STAND_IN_PAGES.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def legacy_error_scan(driver):
+    """The original per-selector find_elements loop, kept for comparison"""
+    driver.implicitly_wait(LEGACY_IMPLICIT_WAIT)
+    try:
+        return _legacy_error_loop(driver)
+    finally:
+        driver.implicitly_wait(0)
+
+def _legacy_error_loop(driver):
+    for selector in ERROR_SELECTORS:
+        try:
+            error_elements = driver.find_elements(*selector)
+            for error_element in error_elements:
+                try:
+                    if error_element.is_displayed():
+                        error_text = error_element.text.strip()
+                        if error_text and any(keyword in error_text.lower() for keyword in ERROR_KEYWORDS):
+                            return error_text
+                except:
+                    continue
+        except:
+            continue
+    return None
+
+def bench_workers(urls, worker_counts):
+    """Time a full pass over the URLs for each worker count"""
+    rows = []
+    for workers in worker_counts:
+        print(f"\n=== Running with {workers} worker(s) ===")
+        start = time.perf_counter()
+        run_worker_pool(urls, workers)
+        elapsed = time.perf_counter() - start
+        rows.append((workers, elapsed))
+
+    baseline = rows[0][1] if rows else 0
+    print("\n=== Worker Pool Benchmark ===")
+    print(f"URLs per pass: {len(urls)}\n")
+    print(f"{'Workers':>8} {'Wall clock (s)':>15} {'URLs/min':>10} {'Speedup':>8}")
+    for workers, elapsed in rows:
+        per_minute = len(urls) / elapsed * 60 if elapsed else 0
+        speedup = baseline / elapsed if elapsed else 0
+        print(f"{workers:>8} {elapsed:>15.2f} {per_minute:>10.1f} {speedup:>7.2f}x")
+    return rows
+
+def bench_error_scan(repeat):
+    """Compare the per-selector loop with the single-script scan on local pages"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    checker = LoginChecker()
+    rows = []
+    try:
+        for page in STAND_IN_PAGES:
+            checker.driver.get(base_url + page)
+            for name, scan in (("loop", lambda: legacy_error_scan(checker.driver)),
+                               ("script", lambda: checker.scan_errors())):
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    found = scan()
+                    timings.append(time.perf_counter() - start)
+                rows.append((page, name, min(timings), sum(timings) / len(timings), bool(found)))
+    finally:
+        checker.driver.quit()
+        server.shutdown()
+
+    print("\n=== Error Scan Benchmark ===")
+    print(f"Selectors: {len(ERROR_SELECTORS)}, runs per scan: {repeat}\n")
+    print(f"{'Page':<8} {'Scan':<8} {'Best (s)':>10} {'Mean (s)':>10} {'Error found':>12}")
+    for page, name, best, mean, found in rows:
+        print(f"{page:<8} {name:<8} {best:>10.3f} {mean:>10.3f} {str(found):>12}")
+    return rows
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def python_rss_peak_mb():
+    """Peak resident memory of this Python process alone, or None where the platform can't tell"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class TreePeakSampler:
+    """Samples the memory of this process and its children in the background and keeps the peak
+
+    The children are the drivers and the Edge processes they launch, which
+    most of a browser run's memory is in and which neither tracemalloc nor
+    ru_maxrss see.
+    """
+
+    def __init__(self, interval=MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak = None
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="memory-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def run(self):
+        while True:
+            sample = sample_tree(os.getpid())
+            if sample is not None:
+                self.peak = max(self.peak or 0, sample['rss_mb'])
+            if self.stopping.wait(self.interval):
+                return
+
+    def stop(self):
+        """Stop sampling and return the peak in MB, or None if the tree couldn't be measured"""
+        self.stopping.set()
+        self.thread.join()
+        return self.peak
+
+def code_version():
+    """The git revision of the checker, so history entries can be compared across versions"""
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+def load_history(history_file):
+    try:
+        with open(history_file, 'r') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def bench_e2e(count, mix, workers, engine, slow_delay, history_file=HISTORY_FILE):
+    """Run the full checker against N synthetic URLs on the local login server"""
+    config = load_config()
+    credentials = config.get('credentials', {})
+    username = credentials.get('username') or "username"
+    password = credentials.get('password') or "password"
+
+    server = LoginServer(0, username, password, slow_delay).start()
+    urls = [server.url(mix[i % len(mix)], i) for i in range(count)]
+    # Stand-in URLs change port every run, so history goes to a throwaway database
+    history_dir = tempfile.mkdtemp(prefix="login_bench_")
+    config = {**config, 'urls': urls, 'max_workers': workers, 'engine': engine,
+              'credentials': {'username': username, 'password': password},
+              'history_db': os.path.join(history_dir, "results.db")}
+
+    tracemalloc.start()
+    sampler = TreePeakSampler().start()
+    start = time.perf_counter()
+    try:
+        results = run_checks(config, urls=urls)
+    finally:
+        wall = time.perf_counter() - start
+        _, heap_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        tree_peak = sampler.stop()
+        server.stop()
+        shutil.rmtree(history_dir, ignore_errors=True)
+
+    latencies = [result['duration'] for result in results.values() if result['duration'] is not None]
+    verdicts = {}
+    engines = {}
+    for result in results.values():
+        verdicts[result['verdict']] = verdicts.get(result['verdict'], 0) + 1
+        engines[result['engine']] = engines.get(result['engine'], 0) + 1
+
+    params = {'urls': count, 'mix': ",".join(mix), 'workers': workers, 'engine': engine,
+              'slow_delay': slow_delay}
+    metrics = {
+        'checks_per_second': len(results) / wall if wall else 0,
+        'p50_latency': percentile(latencies, 50),
+        'p95_latency': percentile(latencies, 95),
+        'p99_latency': percentile(latencies, 99),
+        'python_heap_peak_mb': heap_peak / (1024 * 1024),
+        'python_rss_peak_mb': python_rss_peak_mb(),
+        'browser_tree_rss_peak_mb': tree_peak,
+    }
+    entry = {'timestamp': datetime.now().isoformat(timespec="seconds"), 'version': code_version(),
+             'params': params, 'wall_seconds': wall, 'metrics': metrics,
+             'verdicts': verdicts, 'engines': engines}
+
+    # Compare with the last run that used the same parameters
+    previous = next((old for old in reversed(load_history(history_file)) if old['params'] == params), None)
+
+    print("\n=== End-to-End Benchmark ===")
+    print(f"Version: {entry['version']}  URLs: {count}  Mix: {params['mix']}  Workers: {workers}  Engine: {engine}")
+    print(f"Wall clock: {wall:.2f}s  Verdicts: {verdicts}  Engines: {engines}\n")
+    header = f"{'Metric':<26} {'Value':>10}"
+    if previous:
+        header += f" {'Previous':>10} {'Change':>8}  (vs {previous['version']} at {previous['timestamp']})"
+    print(header)
+    regressions = []
+    for name, value in metrics.items():
+        line = f"{name:<26} {value:>10.3f}" if value is not None else f"{name:<26} {'n/a':>10}"
+        old = previous['metrics'].get(name) if previous else None
+        if value is not None and old:
+            change = (value - old) / old
+            worse = change < -REGRESSION_THRESHOLD if METRIC_DIRECTIONS[name] else change > REGRESSION_THRESHOLD
+            line += f" {old:>10.3f} {change:>+7.1%}"
+            if worse:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    with open(history_file, 'a') as f:
+        f.write(json.dumps(entry) + "\n")
+    print(f"\nSaved to {history_file}")
+    if regressions:
+        print(f"Regressed metrics: {', '.join(regressions)}")
+    return entry, regressions
+
+def bench_isolation(repeat, modes=("reset", "context", "relaunch")):
+    """Time resetting browser state between checks against relaunching the browser
+
+    Each round logs in to the stand-in server, isolates, then loads the
+    dashboard to confirm the session cookie did not survive.
+    """
+    config = load_config()
+    credentials = config.get('credentials', {})
+    server = LoginServer(0, credentials.get('username', 'username'),
+                         credentials.get('password', 'password')).start()
+    login_url = server.url("valid", 0)
+    dashboard_url = login_url + "/dashboard"
+
+    checker = LoginChecker()
+    rows = []
+    try:
+        for mode in modes:
+            checker.isolation = mode
+            timings = []
+            leaks = 0
+            for _ in range(repeat):
+                checker.check_login(login_url)
+                start = time.perf_counter()
+                checker.reset_state()
+                timings.append(time.perf_counter() - start)
+                checker.driver.get(dashboard_url)
+                if "Welcome back" in checker.driver.page_source:
+                    leaks += 1
+                # The probe itself leaves no state behind
+                checker.dirty = False
+            rows.append((mode, min(timings), sum(timings) / len(timings), leaks))
+    finally:
+        checker.driver.quit()
+        server.stop()
+
+    print("\n=== Isolation Benchmark ===")
+    print(f"Rounds per mode: {repeat}\n")
+    print(f"{'Mode':<10} {'Best (s)':>10} {'Mean (s)':>10} {'Leaked sessions':>16}")
+    for mode, best, mean, leaks in rows:
+        print(f"{mode:<10} {best:>10.3f} {mean:>10.3f} {leaks:>16}")
+    return rows
+
+# A host whose name contains an extension the lean profile blocks. Edge resolves
+# *.localhost to loopback, so it reaches the local server; a profile matching
+# extensions anywhere in the URL would block the page itself and never show the form.
+EXTENSION_HOST = "static.png.localhost"
+
+# Bytes the page and its resources took over the network, from the Resource Timing API.
+# Cross-origin resources without Timing-Allow-Origin report 0, so this is a lower bound.
+TRANSFER_SCRIPT = """
+var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+var bytes = 0;
+for (var i = 0; i < entries.length; i++) { bytes += entries[i].transferSize || 0; }
+return [bytes, entries.length - 1];
+"""
+
+def bench_load_profile(urls, profile_names, repeat):
+    """Time to a usable login form and bytes transferred per URL under each load profile
+
+    Each round starts from a cleared cache. Savings are reported against the
+    first profile listed. Without urls the local server's heavy scenario is
+    also loaded from EXTENSION_HOST, and a profile that blocks that page
+    itself stops the benchmark.
+    """
+    checker = LoginChecker()
+    profiles = {**LOAD_PROFILES, **checker.config.get('load_profiles', {})}
+    server = None
+    if not urls:
+        server = LoginServer(0).start()
+        urls = [server.url("heavy", 0), server.url("heavy", 0).replace("127.0.0.1", EXTENSION_HOST)]
+
+    rows = []
+    try:
+        for url in urls:
+            for name in profile_names:
+                profile = profiles[name]
+                timings = []
+                transfers = []
+                for _ in range(repeat):
+                    checker.isolation = 'reset'
+                    checker.reset_state()
+                    # Without the url, so a profile that would block the page itself shows up here
+                    checker.apply_load_profile(profile)
+                    start = time.perf_counter()
+                    checker.driver.get(url)
+                    try:
+                        checker.wait_for_document_ready(ready_state=profile.get('ready_state', "complete"))
+                        WebDriverWait(checker.driver, 10, poll_frequency=POLL_INTERVAL).until(
+                            EC.element_to_be_clickable((By.NAME, "username"))
+                        )
+                    except TimeoutException:
+                        raise SystemExit(f"The '{name}' profile kept the login form at {url} from loading")
+                    timings.append(time.perf_counter() - start)
+                    # Count everything the profile lets through, including what loads after the form
+                    checker.wait_for_network_idle()
+                    transfers.append(checker.driver.execute_script(TRANSFER_SCRIPT))
+                    checker.dirty = True
+                rows.append((url, name, sum(timings) / len(timings),
+                             sum(t[0] for t in transfers) / len(transfers),
+                             sum(t[1] for t in transfers) / len(transfers)))
+    finally:
+        checker.driver.quit()
+        if server:
+            server.stop()
+
+    print("\n=== Load Profile Benchmark ===")
+    print(f"Rounds per profile: {repeat}, savings against '{profile_names[0]}'\n")
+    print(f"{'Profile':<10} {'Form ready (s)':>15} {'Saved':>8} {'KB':>10} {'Saved':>8} {'Requests':>9}  URL")
+    baseline = {}
+    for url, name, seconds, transferred, requests in rows:
+        base_seconds, base_bytes = baseline.setdefault(url, (seconds, transferred))
+        saved_time = 1 - seconds / base_seconds if base_seconds else 0
+        saved_bytes = 1 - transferred / base_bytes if base_bytes else 0
+        print(f"{name:<10} {seconds:>15.3f} {saved_time:>8.0%} {transferred / 1024:>10.0f} "
+              f"{saved_bytes:>8.0%} {requests:>9.0f}  {url}")
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the login checker")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    workers_parser = subparsers.add_parser("workers", help="Wall-clock time against worker count")
+    workers_parser.add_argument("--workers", default="1,2,4",
+                                help="Comma separated worker counts to try (default: 1,2,4)")
+    workers_parser.add_argument("--urls", nargs="*",
+                                help="URLs to check (default: urls from config.json)")
+
+    scan_parser = subparsers.add_parser("error-scan",
+                                        help="Selector loop against single-script error scan")
+    scan_parser.add_argument("--repeat", type=int, default=3,
+                             help="Runs per scan and page (default: 3)")
+
+    isolation_parser = subparsers.add_parser("isolation",
+                                             help="Browser state reset against full relaunch between checks")
+    isolation_parser.add_argument("--repeat", type=int, default=5, help="Rounds per mode (default: 5)")
+    isolation_parser.add_argument("--modes", default="reset,context,relaunch",
+                                  help="Comma separated isolation modes (default: reset,context,relaunch)")
+
+    profile_parser = subparsers.add_parser("load-profile",
+                                           help="Form-ready time and bytes per page load profile")
+    profile_parser.add_argument("--urls", nargs="*",
+                                help="URLs to load (default: the local server's heavy scenario)")
+    profile_parser.add_argument("--profiles", default="full,lean",
+                                help="Comma separated profiles, the first is the baseline (default: full,lean)")
+    profile_parser.add_argument("--repeat", type=int, default=3, help="Rounds per profile (default: 3)")
+
+    e2e_parser = subparsers.add_parser("e2e", help="Full checker against the local login server")
+    e2e_parser.add_argument("--urls", type=int, default=60, help="Number of synthetic URLs (default: 60)")
+    e2e_parser.add_argument("--mix", default=DEFAULT_MIX,
+                            help=f"Comma separated scenarios to cycle through (default: {DEFAULT_MIX})")
+    e2e_parser.add_argument("--workers", type=int, default=None,
+                            help="Browser workers (default: max_workers from config.json)")
+    e2e_parser.add_argument("--engine", default=None, help="auto or selenium (default: from config.json)")
+    e2e_parser.add_argument("--slow-delay", type=float, default=SLOW_DELAY,
+                            help=f"Seconds the slow scenario waits per request (default: {SLOW_DELAY})")
+    e2e_parser.add_argument("--history", default=HISTORY_FILE, help="Benchmark history file")
+
+    args = parser.parse_args()
+
+    if args.benchmark == "workers":
+        urls = args.urls or load_config().get('urls', [])
+        worker_counts = [int(count) for count in args.workers.split(",")]
+        bench_workers(urls, worker_counts)
+    elif args.benchmark == "error-scan":
+        bench_error_scan(args.repeat)
+    elif args.benchmark == "isolation":
+        bench_isolation(args.repeat, args.modes.split(","))
+    elif args.benchmark == "load-profile":
+        bench_load_profile(args.urls, args.profiles.split(","), args.repeat)
+    elif args.benchmark == "e2e":
+        config = load_config()
+        _, regressions = bench_e2e(args.urls, args.mix.split(","),
+                                   args.workers or config.get('max_workers', 1),
+                                   args.engine or config.get('engine', 'auto'),
+                                   args.slow_delay, args.history)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+
+MB = 1024 * 1024
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Set once the missing psutil warning has been printed
+_warned_no_psutil = False
+
+def warn_no_psutil():
+    global _warned_no_psutil
+    if not _warned_no_psutil:
+        _warned_no_psutil = True
+        print("Warning: psutil is not installed, so browser memory can't be measured, recycle_rss_mb "
+              "has no effect and a cancel only stops the driver (pip install -r requirements.txt)")
+
+def process_tree(root_pid):
+    """Pids of a process and all of its descendants, read from /proc"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may hold spaces or parentheses; the fields after it are state, ppid, ...
+        ppid = int(stat[stat.rfind(b")") + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+def tree_pids(root_pid):
+    """Pids of a process and its descendants, from /proc or psutil; just root_pid if neither is available"""
+    if os.path.isdir("/proc/self"):
+        return process_tree(root_pid)
+    try:
+        import psutil
+    except ImportError:
+        warn_no_psutil()
+        return [root_pid]
+    try:
+        return [root_pid] + [child.pid for child in psutil.Process(root_pid).children(recursive=True)]
+    except psutil.Error:
+        return [root_pid]
+
+def rss_bytes(pid):
+    with open(f"/proc/{pid}/statm", "r") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+def sample_tree(root_pid):
+    """Resident memory of a process tree: {'rss_mb', 'processes'}, or None if it can't be measured
+
+    Reads /proc where it exists (Linux); elsewhere psutil is used if it is
+    installed. RSS is summed per process, so pages shared between the
+    browser's processes are counted more than once; treat it as an upper bound.
+    """
+    if os.path.isdir("/proc/self"):
+        total, count = 0, 0
+        for pid in process_tree(root_pid):
+            try:
+                total += rss_bytes(pid)
+                count += 1
+            except (OSError, ValueError, IndexError):
+                # The process exited while the tree was being read
+                pass
+        return {'rss_mb': total / MB, 'processes': count}
+
+    try:
+        import psutil
+    except ImportError:
+        warn_no_psutil()
+        return None
+    try:
+        root = psutil.Process(root_pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    total, count = 0, 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+            count += 1
+        except psutil.Error:
+            pass
+    return {'rss_mb': total / MB, 'processes': count}
@@ -0,0 +1,383 @@
+import argparse
+import hmac
+import json
+import os
+import queue
+import secrets
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from selenium.common.exceptions import WebDriverException
+
+from deadlines import budget_from_config
+from login_checker import LoginChecker, load_config, print_report, run_checks
+
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+HEALTH_INTERVAL = 30
+
+# Secret every request must carry. The daemon runs checks with the configured
+# credentials, so only the owner of this file (created readable by them alone)
+# may talk to it, not every local user or process
+TOKEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".daemon_token")
+
+def daemon_token(path=TOKEN_FILE):
+    """The install's daemon token, created on first use"""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    token = secrets.token_urlsafe(32)
+    with os.fdopen(fd, 'w') as f:
+        f.write(token)
+    return token
+
+class WarmSession:
+    """A browser session kept open between jobs, relaunched if it dies"""
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.checks = 0
+        self.restarts = 0
+        # Recycles and peak memory of browsers replaced by a restart
+        self.recycles = 0
+        self.peak_rss_mb = 0
+        self.checker = None
+        self.start()
+
+    def start(self):
+        try:
+            self.checker = LoginChecker()
+        except SystemExit:
+            # setup_driver exits on failure; keep the daemon up and retry on the next health check
+            self.checker = None
+            print(f"Session {self.session_id}: could not start a browser")
+
+    def is_alive(self):
+        # A cancel may have killed the browser to stop a blocked check
+        if self.checker is None or self.checker.interrupted:
+            return False
+        try:
+            self.checker.driver.execute_script("return 1")
+            return True
+        except WebDriverException:
+            return False
+
+    def restart(self):
+        """Quit whatever is left of the browser and launch a new one"""
+        print(f"Session {self.session_id}: restarting browser")
+        if self.checker is not None:
+            self.recycles += self.checker.recycles
+            self.peak_rss_mb = max(self.peak_rss_mb, self.checker.peak_rss_mb)
+            try:
+                self.checker.driver.quit()
+            except Exception:
+                pass
+        self.restarts += 1
+        self.start()
+
+    def ensure_alive(self):
+        if not self.is_alive():
+            self.restart()
+        return self.checker is not None
+
+    def check_login(self, url, budget=None):
+        """Check a URL and return {'status', 'duration', 'phases', 'page_timing', 'screenshot'}"""
+        if not self.ensure_alive():
+            return {'status': "Error: No browser session available", 'duration': None, 'phases': {},
+                    'screenshot': None}
+        self.checks += 1
+        start = time.perf_counter()
+        status = self.checker.check_login(url, budget)
+        return {'status': status, 'duration': time.perf_counter() - start,
+                'phases': self.checker.phase_timings, 'page_timing': self.checker.page_timing,
+                'screenshot': self.checker.last_screenshot}
+
+    def quit(self):
+        if self.checker is not None:
+            try:
+                self.checker.driver.quit()
+            except Exception:
+                pass
+
+    def describe(self):
+        stats = {'recycles': self.recycles, 'rss_mb': None, 'peak_rss_mb': self.peak_rss_mb or None,
+                 'processes': None}
+        if self.checker is not None:
+            current = self.checker.session_stats()
+            stats.update(current, recycles=self.recycles + current['recycles'],
+                         peak_rss_mb=max(self.peak_rss_mb, current['peak_rss_mb'] or 0) or None)
+        return dict(stats, id=self.session_id, alive=self.checker is not None,
+                    checks=self.checks, restarts=self.restarts)
+
+class CheckerDaemon:
+    """Holds warm browser sessions and runs check jobs submitted over a local socket"""
+
+    def __init__(self, session_count, health_interval=HEALTH_INTERVAL):
+        self.started_at = time.time()
+        self.jobs = 0
+        self.sessions = [WarmSession(i + 1) for i in range(session_count)]
+        self.idle = queue.Queue()
+        for session in self.sessions:
+            self.idle.put(session)
+        self.stopping = threading.Event()
+        self.budgets = set()
+        self.budgets_lock = threading.Lock()
+        self.health_interval = health_interval
+        threading.Thread(target=self.health_loop, name="health-check", daemon=True).start()
+
+    def health_loop(self):
+        """Periodically ping idle sessions, relaunch crashed browsers and sample their memory"""
+        while not self.stopping.wait(self.health_interval):
+            for _ in range(len(self.sessions)):
+                try:
+                    session = self.idle.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    if session.ensure_alive():
+                        session.checker.sample_memory()
+                finally:
+                    self.idle.put(session)
+
+    def run_browser(self, urls, on_result=None, budget=None):
+        """Check URLs on the warm sessions, one URL per idle session at a time
+
+        URLs not started before budget runs out are left out of the results.
+        With on_result, outcomes are only passed to it and the returned dict
+        is empty.
+        """
+        results = {}
+        pending = iter(urls)
+        lock = threading.Lock()
+
+        def check_urls():
+            while True:
+                with lock:
+                    url = next(pending, None)
+                if url is None:
+                    return
+                session = self.idle.get()
+                try:
+                    if budget is not None and budget.exhausted():
+                        return
+                    outcome = session.check_login(url, budget)
+                finally:
+                    self.idle.put(session)
+                if on_result:
+                    on_result(url, outcome)
+                else:
+                    with lock:
+                        results[url] = outcome
+
+        with ThreadPoolExecutor(max_workers=len(self.sessions)) as executor:
+            for _ in range(len(self.sessions)):
+                executor.submit(check_urls)
+        return {url: results[url] for url in urls if url in results}
+
+    def run_job(self, urls=None, on_result=None, keep_results=True):
+        """Run the full check pipeline with the current config.json
+
+        Returns url -> result record, or with keep_results=False the verdict counts.
+        """
+        self.jobs += 1
+        config = load_config()
+        self.reload_config()
+        budget = budget_from_config(config)
+        with self.budgets_lock:
+            self.budgets.add(budget)
+        try:
+            return run_checks(config, urls=urls, run_browser=self.run_browser, on_result=on_result, budget=budget,
+                              keep_results=keep_results)
+        finally:
+            with self.budgets_lock:
+                self.budgets.discard(budget)
+
+    def cancel_jobs(self):
+        """Stop every running job; each reports what finished and skips the rest"""
+        with self.budgets_lock:
+            for budget in self.budgets:
+                budget.cancel()
+            return len(self.budgets)
+
+    def reload_config(self):
+        """Pick up credential and pacing changes saved by the GUI since the last job"""
+        for session in self.sessions:
+            if session.checker is not None:
+                session.checker.load_config()
+
+    def health(self):
+        return {'ok': True, 'uptime': time.time() - self.started_at, 'jobs': self.jobs,
+                'sessions': [session.describe() for session in self.sessions]}
+
+    def shutdown(self):
+        self.stopping.set()
+        for session in self.sessions:
+            session.quit()
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in, one JSON response line out
+
+    Every request carries the install's "token"; one without it is refused.
+    A check request with "stream": true also gets a result event line for each
+    URL as it finishes, before the final response line. With "keep_results":
+    false as well, the response holds only the verdict counts.
+    """
+
+    def send(self, message):
+        with self.write_lock:
+            self.wfile.write((json.dumps(message, default=str) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+    def handle(self):
+        daemon = self.server.checker_daemon
+        self.write_lock = threading.Lock()
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+            command = request.get('cmd')
+            if not hmac.compare_digest(str(request.get('token') or ""), self.server.token):
+                print(f"Refused a {command!r} request without the daemon token")
+                response = {'ok': False, 'error': "Invalid daemon token"}
+            elif command == 'check':
+                on_result = None
+                keep_results = True
+                if request.get('stream'):
+                    on_result = lambda record: self.send({'event': 'result', **record})
+                    # The client has every record from the stream already
+                    keep_results = request.get('keep_results', True)
+                response = {'ok': True, 'results': daemon.run_job(request.get('urls'), on_result, keep_results)}
+            elif command == 'cancel':
+                response = {'ok': True, 'cancelled': daemon.cancel_jobs()}
+            elif command == 'health':
+                response = daemon.health()
+            elif command == 'shutdown':
+                response = {'ok': True}
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                response = {'ok': False, 'error': f"Unknown command: {command}"}
+        except Exception as e:
+            response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        self.send(response)
+
+class DaemonServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+def serve(port=DAEMON_PORT):
+    """Start warm browser sessions and serve check jobs until asked to shut down"""
+    config = load_config()
+    session_count = max(1, config.get('max_workers', 1))
+    print(f"Starting checker daemon with {session_count} warm browser session(s)...")
+    daemon = CheckerDaemon(session_count, config.get('daemon_health_interval', HEALTH_INTERVAL))
+    with DaemonServer((DAEMON_HOST, port), DaemonRequestHandler) as server:
+        server.checker_daemon = daemon
+        server.token = daemon_token()
+        print(f"Checker daemon listening on {DAEMON_HOST}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            daemon.shutdown()
+    print("Checker daemon stopped")
+
+def send_request(request, port=DAEMON_PORT, timeout=None, on_event=None):
+    """Send one request to the daemon and return its decoded final response
+
+    Event lines streamed before the response are passed to on_event(event).
+    """
+    request = {**request, 'token': daemon_token()}
+    with socket.create_connection((DAEMON_HOST, port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as reader:
+            for line in reader:
+                message = json.loads(line)
+                if 'event' not in message:
+                    return message
+                if on_event:
+                    on_event(message)
+    raise ConnectionError("Checker daemon closed the connection without a response")
+
+def daemon_available(port=DAEMON_PORT):
+    """True if a daemon answers a health check on the port"""
+    try:
+        return send_request({'cmd': 'health'}, port, timeout=2).get('ok', False)
+    except (OSError, ValueError):
+        return False
+
+def submit_job(urls=None, port=DAEMON_PORT, on_event=None, keep_results=True):
+    """Run a check job on the daemon and return url -> result record
+
+    With on_event, result events are streamed back as each URL finishes, and
+    keep_results=False returns only the verdict counts, so neither side holds
+    every record of a large run.
+    """
+    request = {'cmd': 'check', 'urls': urls, 'stream': on_event is not None, 'keep_results': keep_results}
+    response = send_request(request, port, on_event=on_event)
+    if not response.get('ok'):
+        raise RuntimeError(response.get('error', "Checker daemon rejected the job"))
+    return response['results']
+
+def cancel_jobs(port=DAEMON_PORT):
+    """Ask the daemon to cancel its running jobs; returns how many were cancelled"""
+    return send_request({'cmd': 'cancel'}, port, timeout=5).get('cancelled', 0)
+
+def start_daemon(port=DAEMON_PORT, wait=120):
+    """Launch the daemon in the background and wait until it answers health checks"""
+    script = os.path.abspath(__file__)
+    kwargs = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL, 'stdin': subprocess.DEVNULL}
+    if sys.platform == "win32":
+        kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+    else:
+        kwargs['start_new_session'] = True
+    subprocess.Popen([sys.executable, script, "serve", "--port", str(port)], **kwargs)
+
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if daemon_available(port):
+            return True
+        time.sleep(0.5)
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-lived login checker with warm browser sessions")
+    parser.add_argument("command", choices=["serve", "check", "health", "cancel", "stop"])
+    parser.add_argument("urls", nargs="*", help="URLs for 'check' (default: urls from config.json)")
+    parser.add_argument("--port", type=int, default=None,
+                        help=f"Daemon port (default: daemon_port from config.json or {DAEMON_PORT})")
+    args = parser.parse_args()
+    port = args.port or load_config().get('daemon_port', DAEMON_PORT)
+
+    if args.command == "serve":
+        serve(port)
+    elif args.command == "check":
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print_report(submit_job(args.urls or None, port), timestamp)
+    elif args.command == "health":
+        try:
+            print(json.dumps(send_request({'cmd': 'health'}, port, timeout=5), indent=4))
+        except OSError:
+            print(f"No checker daemon running on port {port}")
+            sys.exit(1)
+    elif args.command == "cancel":
+        try:
+            print(f"Cancelled {cancel_jobs(port)} running job(s)")
+        except OSError:
+            print(f"No checker daemon running on port {port}")
+    elif args.command == "stop":
+        try:
+            send_request({'cmd': 'shutdown'}, port, timeout=5)
+            print("Checker daemon stopping")
+        except OSError:
+            print(f"No checker daemon running on port {port}")
+
+if __name__ == "__main__":
+    main()
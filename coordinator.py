@@ -0,0 +1,481 @@
+import argparse
+import heapq
+import hmac
+import json
+import os
+import queue
+import secrets
+import socket
+import socketserver
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import events
+from deadlines import URL_TIMEOUT, RunBudget, budget_from_config
+from incremental import open_incremental
+from login_checker import belongs_in_history, close_store, load_config, make_result, print_report, run_checks
+from preflight import dedupe_urls
+from result_store import open_store
+
+COORDINATOR_HOST = "127.0.0.1"
+# 0 listens on a free port, which local workers are told; set coordinator_port
+# so workers on other machines know where to connect
+COORDINATOR_PORT = 0
+
+# Workers must present the run's token in their hello. Local workers get it
+# through this environment variable; remote workers from --token or
+# coordinator_token in their config.json
+TOKEN_ENV = "COORDINATOR_TOKEN"
+
+# Seconds a new connection gets to send its hello
+HELLO_TIMEOUT = 10
+
+# Seconds assumed for a URL that has no timed checks in the history
+DEFAULT_ESTIMATE = 10
+HISTORY_DAYS = 7
+
+# A URL whose worker dies this many times is reported as an error instead of requeued
+MAX_ATTEMPTS = 2
+
+# Seconds a worker keeps trying to reach the coordinator before giving up
+CONNECT_WAIT = 30
+
+# Seconds workers get to report in-flight checks after a cancel or when the
+# run budget runs out, before those checks are reported as skipped
+CANCEL_GRACE = 10
+
+def estimate_durations(urls, store, days=HISTORY_DAYS):
+    """url -> expected check duration from the result history
+
+    URLs never timed before are assumed to take as long as the median known URL.
+    """
+    known = store.mean_durations(days) if store else {}
+    known_urls = [known[url] for url in urls if url in known]
+    fallback = statistics.median(known_urls) if known_urls else DEFAULT_ESTIMATE
+    return {url: known.get(url, fallback) for url in urls}
+
+def balance_shards(urls, estimates, count):
+    """Split URLs into at most count shards of near-equal expected time
+
+    Longest-processing-time first: the slowest URL goes to the least loaded
+    shard, and so on down, which keeps any one shard from dragging out the run.
+    """
+    heap = [(0.0, index, []) for index in range(max(1, count))]
+    for url in sorted(urls, key=lambda url: estimates.get(url, DEFAULT_ESTIMATE), reverse=True):
+        load, index, shard = heapq.heappop(heap)
+        shard.append(url)
+        heapq.heappush(heap, (load + estimates.get(url, DEFAULT_ESTIMATE), index, shard))
+    return [shard for _, _, shard in sorted(heap, key=lambda entry: entry[1]) if shard]
+
+class Coordinator:
+    """Hands out URL shards to worker processes and merges their results
+
+    Workers (local subprocesses or processes on other machines) connect over
+    TCP, take a shard, stream back one result per URL and ask for the next. If
+    a worker disconnects before finishing its shard, the URLs it hadn't
+    reported are split again over the connected workers.
+    """
+
+    def __init__(self, urls, estimates, shard_count, on_result=None, max_attempts=MAX_ATTEMPTS, budget=None,
+                 keep_results=True, token=None):
+        self.urls = urls
+        self.token = token
+        self.budget = budget or RunBudget(url_timeout=0)
+        self.estimates = estimates
+        self.on_result = on_result
+        self.max_attempts = max_attempts
+        self.pending = deque(balance_shards(urls, estimates, shard_count))
+        self.attempts = dict.fromkeys(urls, 0)
+        # url -> result record, or just its verdict without keep_results
+        self.results = {}
+        self.keep_results = keep_results
+        self.workers = 0
+        self.connections = set()
+        self.finished = False
+        self.condition = threading.Condition()
+
+    def accepts(self, token):
+        """True if a worker's token matches the run's (any token does when the run has none)"""
+        return self.token is None or hmac.compare_digest(str(token or ""), self.token)
+
+    def connected(self, handler):
+        with self.condition:
+            self.workers += 1
+            self.connections.add(handler)
+
+    def disconnected(self, handler):
+        with self.condition:
+            self.workers -= 1
+            self.connections.discard(handler)
+
+    def broadcast(self, message):
+        """Send a message to every connected worker"""
+        with self.condition:
+            handlers = list(self.connections)
+        for handler in handlers:
+            try:
+                handler.send(message)
+            except OSError:
+                pass
+
+    def next_shard(self):
+        """Block until a shard is free (returned) or the run is over (None)
+
+        Idle workers wait here rather than leave, so they can pick up URLs
+        requeued from a worker that dies later.
+        """
+        with self.condition:
+            while not self.pending and not self.finished:
+                self.condition.wait()
+            if self.finished:
+                return None
+            shard = self.pending.popleft()
+            for url in shard:
+                self.attempts[url] += 1
+            return shard
+
+    def record(self, record):
+        """Take a result from a worker; repeats and URLs not in this run are ignored"""
+        with self.condition:
+            if record['url'] not in self.attempts or record['url'] in self.results:
+                return
+            self.results[record['url']] = record if self.keep_results else record['verdict']
+        if self.on_result:
+            self.on_result(record)
+        self.check_finished()
+
+    def release(self, shard):
+        """Requeue the URLs of a shard that have no result yet"""
+        with self.condition:
+            unfinished = [url for url in shard if url not in self.results]
+            given_up = [url for url in unfinished if self.attempts[url] >= self.max_attempts]
+            retry = [url for url in unfinished if self.attempts[url] < self.max_attempts]
+            if retry:
+                self.pending.extend(balance_shards(retry, self.estimates, max(1, self.workers)))
+                self.condition.notify_all()
+        if retry:
+            print(f"Requeued {len(retry)} URL(s) from a lost worker")
+            events.emit('requeue', urls=retry)
+        for url in given_up:
+            self.record(make_result(url, f"Error: Worker stopped while checking ({self.attempts[url]} attempts)",
+                                    'coordinator'))
+
+    def skip_pending(self, status):
+        """Report the URLs of shards no worker has taken yet with the given status"""
+        with self.condition:
+            shards = list(self.pending)
+            self.pending.clear()
+        for shard in shards:
+            self.skip(shard, status)
+
+    def skip(self, urls, status):
+        for url in urls:
+            self.record(make_result(url, status, 'none'))
+
+    def abandon(self, status):
+        """Report every URL still without a result with the given status and end the run"""
+        with self.condition:
+            self.pending.clear()
+        for url in self.urls:
+            if url not in self.results:
+                self.record(make_result(url, status, 'coordinator'))
+        self.check_finished(force=True)
+
+    def check_finished(self, force=False):
+        with self.condition:
+            if force or len(self.results) == len(self.urls):
+                self.finished = True
+                self.condition.notify_all()
+
+    def wait(self, timeout=None):
+        """Wait for the run to end; True once it has"""
+        with self.condition:
+            if not self.finished:
+                self.condition.wait(timeout)
+            return self.finished
+
+class WorkerHandler(socketserver.StreamRequestHandler):
+    """Serves one worker connection: shards out, result events back
+
+    Worker -> coordinator: {"cmd": "hello", "worker": name, "token": token}, then for each
+    shard one {"event": "result", ...} line per URL and {"cmd": "shard_done"}.
+    Coordinator -> worker: {"cmd": "shard", "urls": [...], "budget": seconds
+    left in the run or null}, {"cmd": "done"}, or at any time {"cmd": "cancel"}.
+    """
+
+    def send(self, message):
+        with self.write_lock:
+            self.wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        shard = None
+        name = self.client_address[0]
+        self.write_lock = threading.Lock()
+        try:
+            self.request.settimeout(HELLO_TIMEOUT)
+            hello = json.loads(self.rfile.readline() or "{}")
+            self.request.settimeout(None)
+        except (OSError, ValueError) as e:
+            print(f"Connection from {name} sent no hello: {e}")
+            return
+        name = hello.get('worker', name)
+        if hello.get('cmd') != 'hello' or not coordinator.accepts(hello.get('token')):
+            print(f"Worker {name} rejected: wrong token")
+            return
+        coordinator.connected(self)
+        try:
+            print(f"Worker {name} connected")
+            while True:
+                shard = coordinator.next_shard()
+                if shard is None:
+                    self.send({'cmd': 'done'})
+                    break
+                remaining = coordinator.budget.remaining()
+                if coordinator.budget.cancelled.is_set() or remaining == 0:
+                    coordinator.skip(shard, coordinator.budget.skip_status())
+                    shard = None
+                    continue
+                expected = sum(coordinator.estimates.get(url, DEFAULT_ESTIMATE) for url in shard)
+                events.emit('shard', worker=name, urls=len(shard), expected=expected)
+                self.send({'cmd': 'shard', 'urls': shard, 'budget': remaining})
+                for line in self.rfile:
+                    message = json.loads(line)
+                    if message.get('event') == 'result':
+                        message.pop('event')
+                        coordinator.record(message)
+                    elif message.get('cmd') == 'shard_done':
+                        break
+                else:
+                    raise ConnectionError("connection closed mid-shard")
+                coordinator.release(shard)
+                shard = None
+        except (OSError, ValueError) as e:
+            print(f"Worker {name} lost: {e}")
+        finally:
+            coordinator.disconnected(self)
+            if shard is not None:
+                coordinator.release(shard)
+
+class CoordinatorServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+def start_local_worker(port, name, token):
+    """Launch a worker process on this machine; its log goes to our stderr"""
+    command = [sys.executable, os.path.abspath(__file__), "worker", "--port", str(port), "--name", name]
+    # The token goes in the environment rather than the command line, which other users can list
+    return subprocess.Popen(command, stdout=sys.stderr, stdin=subprocess.DEVNULL,
+                            env={**os.environ, TOKEN_ENV: token})
+
+def run_sharded(config, urls=None, shards=None, on_result=None, budget=None, keep_results=True):
+    """Check URLs across worker processes and return url -> result record in URL order
+
+    shards local workers are started (each a separate process with its own
+    browser), and workers on other machines may join through the coordinator
+    port. Crashed local workers are replaced while work is left. Results are
+    emitted as events, stored in the history and passed to on_result(record)
+    as they arrive, like run_checks. Workers get the time left in budget with
+    each shard and are told to stop when it is cancelled. With
+    keep_results=False only the verdict counts are returned, like run_checks.
+    """
+    urls = dedupe_urls(config.get('urls', []) if urls is None else urls)
+    budget = budget or budget_from_config(config)
+    shards = config.get('shards', 1) if shards is None else shards
+    host = config.get('coordinator_host', COORDINATOR_HOST)
+    port = config.get('coordinator_port', COORDINATOR_PORT)
+    token = config.get('coordinator_token') or secrets.token_urlsafe(16)
+    max_restarts = config.get('shard_restarts', max(1, shards))
+    run_start = time.perf_counter()
+    events.emit('run_start', urls=urls)
+
+    store = open_store(config)
+    incremental = open_incremental(config, store)
+
+    def finish(record):
+        if store and belongs_in_history(record):
+            store.add(record)
+        if incremental:
+            incremental.record(record)
+        events.emit('result', **record)
+        if on_result:
+            on_result(record)
+
+    # Unchanged pages that passed recently are verified here and never sharded
+    verified = {}
+    shard_urls = urls
+    if incremental and urls and not budget.exhausted():
+        def verify(url, outcome):
+            record = make_result(url, outcome['status'], 'incremental', duration=outcome['duration'])
+            verified[url] = record if keep_results else record['verdict']
+            finish(record)
+
+        shard_urls = incremental.triage(urls, verify, budget)
+
+    # Remote workers may join, so plan for at least one shard even with no local workers
+    estimates = estimate_durations(shard_urls, store)
+    coordinator = Coordinator(shard_urls, estimates, max(1, shards), finish,
+                              config.get('shard_attempts', MAX_ATTEMPTS), budget, keep_results, token)
+    workers = []
+    if not shard_urls:
+        coordinator.check_finished(force=True)
+    with CoordinatorServer((host, port), WorkerHandler) as server:
+        server.coordinator = coordinator
+        port = server.server_address[1]
+        threading.Thread(target=server.serve_forever, name="coordinator", daemon=True).start()
+        print(f"Coordinator listening on {host}:{port}, {len(shard_urls)} URL(s) in "
+              f"{len(coordinator.pending)} shard(s)")
+        if not config.get('coordinator_token') and shards < 1:
+            # Nobody else knows a generated token, and only remote workers can take this run
+            print(f"Workers join with: --host {host} --port {port} --token {token}")
+        workers = [start_local_worker(port, f"local-{index + 1}", token) for index in range(shards) if shard_urls]
+
+        restarts = 0
+        stopped_at = None
+        while not coordinator.wait(timeout=0.25):
+            if stopped_at is None and budget.exhausted():
+                # Nothing new starts; workers finish or abandon what they have in flight
+                stopped_at = time.monotonic()
+                coordinator.skip_pending(budget.skip_status())
+                if budget.cancelled.is_set():
+                    coordinator.broadcast({'cmd': 'cancel'})
+            elif stopped_at is not None and time.monotonic() - stopped_at > CANCEL_GRACE:
+                coordinator.abandon(budget.skip_status())
+                break
+            for index, process in enumerate(workers):
+                if process.poll() is None or stopped_at is not None:
+                    continue
+                if restarts < max_restarts:
+                    restarts += 1
+                    print(f"Worker local-{index + 1} exited with code {process.returncode}, starting a new one")
+                    workers[index] = start_local_worker(port, f"local-{index + 1}", token)
+            if workers and all(process.poll() is not None for process in workers) and not coordinator.workers:
+                coordinator.abandon("Error: No shard worker available")
+        server.shutdown()
+
+    for process in workers:
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    if store:
+        close_store(store, config)
+
+    results = {**coordinator.results, **verified}
+    counts = {}
+    for record in results.values():
+        verdict = record['verdict'] if keep_results else record
+        counts[verdict] = counts.get(verdict, 0) + 1
+    events.emit('run_end', counts=counts, duration=time.perf_counter() - run_start)
+    if not keep_results:
+        return counts
+    return {url: results[url] for url in urls}
+
+def run_worker(host=COORDINATOR_HOST, port=COORDINATOR_PORT, name=None, threads=1, wait=CONNECT_WAIT, token=None):
+    """Connect to a coordinator and check the shards it hands out until it says done
+
+    Uses this machine's config.json for credentials and settings. Returns False
+    if the coordinator couldn't be reached, rejected the token or dropped the
+    connection.
+    """
+    name = name or f"{socket.gethostname()}-{os.getpid()}"
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            sock = socket.create_connection((host, port), timeout=5)
+            break
+        except OSError:
+            if time.monotonic() >= deadline:
+                print(f"Worker {name}: no coordinator on {host}:{port}")
+                return False
+            time.sleep(1)
+
+    sock.settimeout(None)
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            sock.sendall((json.dumps(message, default=str) + "\n").encode("utf-8"))
+
+    budget = None
+    messages = queue.Queue()
+
+    def read(reader):
+        # Runs alongside the checks so a cancel reaches the shard in progress
+        try:
+            for line in reader:
+                message = json.loads(line)
+                if message.get('cmd') == 'cancel':
+                    print(f"Worker {name}: cancel requested")
+                    if budget is not None:
+                        budget.cancel()
+                else:
+                    messages.put(message)
+        except (OSError, ValueError):
+            pass
+        messages.put(None)
+
+    with sock, sock.makefile("r", encoding="utf-8") as reader:
+        send({'cmd': 'hello', 'worker': name, 'token': token})
+        threading.Thread(target=read, args=(reader,), name="coordinator-reader", daemon=True).start()
+        while True:
+            message = messages.get()
+            if message is None:
+                break
+            if message.get('cmd') == 'done':
+                return True
+            if message.get('cmd') == 'shard':
+                # The coordinator keeps the history and triages incremental runs; each
+                # worker drives its own browsers
+                config = {**load_config(), 'history_db': '', 'incremental': False, 'max_workers': threads}
+                budget = RunBudget(config.get('url_timeout', URL_TIMEOUT), message.get('budget'))
+                print(f"Worker {name}: checking a shard of {len(message['urls'])} URL(s)")
+                run_checks(config, urls=message['urls'], budget=budget, keep_results=False,
+                           on_result=lambda record: send({'event': 'result', **record}))
+                send({'cmd': 'shard_done'})
+    print(f"Worker {name}: coordinator closed the connection")
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Split a check run across worker processes")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="Coordinate a sharded run of the configured URLs")
+    run_parser.add_argument("urls", nargs="*", help="URLs to check (default: urls from config.json)")
+    run_parser.add_argument("--shards", type=int, default=None,
+                            help="Local worker processes (default: shards from config.json or 1; "
+                                 "0 waits for remote workers only)")
+
+    worker_parser = subparsers.add_parser("worker", help="Check shards handed out by a coordinator")
+    worker_parser.add_argument("--host", default=COORDINATOR_HOST, help=f"Coordinator host (default: {COORDINATOR_HOST})")
+    worker_parser.add_argument("--port", type=int, default=None,
+                               help="Coordinator port (default: coordinator_port from config.json)")
+    worker_parser.add_argument("--token", default=None,
+                               help=f"The coordinator's run token (default: ${TOKEN_ENV} or coordinator_token "
+                                    "from config.json)")
+    worker_parser.add_argument("--name", default=None, help="Worker name shown in the coordinator log")
+    worker_parser.add_argument("--threads", type=int, default=1, help="Browser sessions in this worker (default: 1)")
+    worker_parser.add_argument("--wait", type=float, default=CONNECT_WAIT,
+                               help=f"Seconds to keep trying to reach the coordinator (default: {CONNECT_WAIT})")
+    args = parser.parse_args()
+
+    config = load_config()
+    if args.command == "worker":
+        port = args.port or config.get('coordinator_port', COORDINATOR_PORT)
+        if not port:
+            parser.error("the coordinator port is needed: pass --port or set coordinator_port in config.json")
+        token = args.token or os.environ.get(TOKEN_ENV) or config.get('coordinator_token')
+        sys.exit(0 if run_worker(args.host, port, args.name, args.threads, args.wait, token) else 1)
+
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    urls = getattr(args, "urls", None) or None
+    print_report(run_sharded(config, urls, getattr(args, "shards", None)), timestamp)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Defaults, overridable in config.json: url_timeout caps each check, run_budget
+# caps a whole run (0 or missing for no limit)
+URL_TIMEOUT = 60
+RUN_BUDGET = 0
+
+SKIPPED_BUDGET = "Skipped (budget)"
+SKIPPED_CANCELLED = "Skipped (cancelled)"
+
+class DeadlineExceeded(Exception):
+    """Raised inside a check when its deadline passes or the run is cancelled"""
+
+class RunBudget:
+    """Time limits and cancellation shared by every check of one run"""
+
+    def __init__(self, url_timeout=URL_TIMEOUT, budget=RUN_BUDGET):
+        self.url_timeout = url_timeout
+        self.budget = budget
+        self.run_deadline = time.monotonic() + budget if budget else None
+        self.cancelled = threading.Event()
+        # Called on cancel, for checks blocked where they can't poll the event
+        self.cancel_hooks = set()
+        self.hooks_lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+        with self.hooks_lock:
+            hooks = list(self.cancel_hooks)
+        for hook in hooks:
+            hook()
+
+    @contextmanager
+    def on_cancel(self, hook):
+        """Call hook() if the run is cancelled while the block runs"""
+        with self.hooks_lock:
+            self.cancel_hooks.add(hook)
+        try:
+            if self.cancelled.is_set():
+                hook()
+            yield
+        finally:
+            with self.hooks_lock:
+                self.cancel_hooks.discard(hook)
+
+    def remaining(self):
+        """Seconds left in the run, or None without a run budget"""
+        if self.run_deadline is None:
+            return None
+        return max(0, self.run_deadline - time.monotonic())
+
+    def exhausted(self):
+        """True once the run is cancelled or out of time; no new checks should start"""
+        return self.cancelled.is_set() or self.remaining() == 0
+
+    def skip_status(self):
+        """Status for URLs the run never got to"""
+        return SKIPPED_CANCELLED if self.cancelled.is_set() else SKIPPED_BUDGET
+
+    def deadline(self):
+        """The deadline of a check starting now: url_timeout, cut short by the run budget"""
+        end, reason = None, None
+        if self.url_timeout:
+            end, reason = time.monotonic() + self.url_timeout, f"Check exceeded its {self.url_timeout:g}s deadline"
+        if self.run_deadline is not None and (end is None or self.run_deadline < end):
+            end, reason = self.run_deadline, f"Run budget of {self.budget:g}s exhausted"
+        return Deadline(self, end, reason)
+
+class Deadline:
+    """The time left for one check
+
+    Waits inside the check cap their own timeouts with cap() and call check()
+    on every poll, so a check never outlives its deadline by more than one
+    poll interval and stops promptly when the run is cancelled.
+    """
+
+    def __init__(self, budget, end=None, reason=None):
+        self.budget = budget
+        self.end = end
+        self.reason = reason
+
+    def remaining(self):
+        return None if self.end is None else max(0, self.end - time.monotonic())
+
+    def cap(self, timeout):
+        """The smaller of a wait's own timeout and the time left"""
+        remaining = self.remaining()
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def expired(self):
+        return self.remaining() == 0
+
+    def check(self):
+        """Raise DeadlineExceeded if the run was cancelled or the deadline passed"""
+        if self.budget.cancelled.is_set():
+            raise DeadlineExceeded(SKIPPED_CANCELLED)
+        if self.expired():
+            raise DeadlineExceeded(self.reason)
+
+    def sleep(self, seconds):
+        """Sleep, waking early (and raising) on cancellation or at the deadline"""
+        self.budget.cancelled.wait(self.cap(seconds))
+        self.check()
+
+def budget_from_config(config):
+    """A RunBudget for a run starting now, with limits from config.json"""
+    return RunBudget(config.get('url_timeout', URL_TIMEOUT), config.get('run_budget', RUN_BUDGET))
@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from datetime import datetime
+
+DRIVER_NAME = "msedgedriver.exe" if sys.platform == "win32" else "msedgedriver"
+INDEX_FILE = "index.json"
+
+# Where Edge keeps its executable when it isn't on PATH
+EDGE_BINARIES = {
+    "darwin": ["/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge"],
+    "linux": ["microsoft-edge", "microsoft-edge-stable", "msedge"],
+}
+
+def default_cache_dir():
+    """Per-user cache directory for resolved driver binaries"""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(base, "login_checker", "drivers")
+
+def detect_edge_version():
+    """Return the installed Edge version (e.g. "120.0.2210.91") without any network calls, or None"""
+    if sys.platform == "win32":
+        import winreg
+        for hive in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+            try:
+                with winreg.OpenKey(hive, r"Software\Microsoft\Edge\BLBeacon") as key:
+                    return winreg.QueryValueEx(key, "version")[0]
+            except OSError:
+                continue
+        return None
+
+    for binary in EDGE_BINARIES.get(sys.platform, EDGE_BINARIES["linux"]):
+        try:
+            output = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r"(\d+\.\d+\.\d+\.\d+)", output)
+        if match:
+            return match.group(1)
+    return None
+
+class DriverCache:
+    """Local cache of msedgedriver binaries keyed by browser version"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.index_path = os.path.join(self.cache_dir, INDEX_FILE)
+
+    def load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_index(self, index):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(index, f, indent=4)
+        os.replace(temp_path, self.index_path)
+
+    def lookup(self, browser_version):
+        """Return a cached driver path valid for the browser version, or None
+
+        An exact version match wins, then any driver for the same major version.
+        Without a known browser version the most recently resolved driver is used.
+        """
+        index = self.load_index()
+        entries = {version: entry for version, entry in index.items() if os.path.isfile(entry['path'])}
+        if not entries:
+            return None
+        if browser_version is None:
+            newest = max(entries.values(), key=lambda entry: entry['resolved_at'])
+            return newest['path']
+        if browser_version in entries:
+            return entries[browser_version]['path']
+        major = browser_version.split(".")[0]
+        for version, entry in entries.items():
+            if version.split(".")[0] == major:
+                return entry['path']
+        return None
+
+    def store(self, browser_version, driver_path):
+        """Copy a resolved driver binary into the cache and record it in the index"""
+        version = browser_version or "unknown"
+        target_dir = os.path.join(self.cache_dir, version)
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, DRIVER_NAME)
+        shutil.copy2(driver_path, target)
+        index = self.load_index()
+        index[version] = {'path': target, 'resolved_at': datetime.now().isoformat(timespec="seconds")}
+        self.save_index(index)
+        return target
+
+    def resolve(self, refresh=False):
+        """Return a driver path, only touching the network on a cache miss or refresh"""
+        browser_version = detect_edge_version()
+        if not refresh:
+            cached = self.lookup(browser_version)
+            if cached:
+                return cached
+
+        # Imported here so a warm cache never pays for webdriver_manager
+        from webdriver_manager.microsoft import EdgeChromiumDriverManager
+        print(f"Resolving Edge driver for browser version {browser_version or 'unknown'}...")
+        driver_path = EdgeChromiumDriverManager().install()
+        return self.store(browser_version, driver_path)
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local Edge driver cache")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Resolve the driver again (may download) and update the cache")
+    parser.add_argument("--list", action="store_true", help="List cached drivers")
+    parser.add_argument("--clear", action="store_true", help="Delete all cached drivers")
+    parser.add_argument("--cache-dir", help=f"Cache directory (default: {default_cache_dir()})")
+    args = parser.parse_args()
+
+    cache = DriverCache(args.cache_dir)
+    if args.clear:
+        cache.clear()
+        print(f"Cleared driver cache at {cache.cache_dir}")
+    if args.refresh:
+        print(f"Cached driver: {cache.resolve(refresh=True)}")
+    if args.list or not (args.clear or args.refresh):
+        print(f"Driver cache: {cache.cache_dir}")
+        print(f"Installed Edge version: {detect_edge_version() or 'not found'}")
+        for version, entry in sorted(cache.load_index().items()):
+            state = "" if os.path.isfile(entry['path']) else " (missing)"
+            print(f"  {version}: {entry['path']} (resolved {entry['resolved_at']}){state}")
+
+if __name__ == "__main__":
+    main()
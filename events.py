@@ -0,0 +1,32 @@
+import json
+import threading
+from datetime import datetime
+
+class EventStream:
+    """Writes one JSON object per line so other programs can follow a run as it happens"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {'event': event, 'time': datetime.now().isoformat(timespec="milliseconds"), **fields}
+        line = json.dumps(record, default=str)
+        with self.lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+_stream = None
+
+def enable(stream):
+    """Send events to the given text stream (e.g. the real stdout)"""
+    global _stream
+    _stream = EventStream(stream)
+
+def enabled():
+    return _stream is not None
+
+def emit(event, **fields):
+    """Emit an event if a stream is enabled; a no-op otherwise"""
+    if _stream is not None:
+        _stream.emit(event, **fields)
@@ -1,17 +1,306 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import csv
 import json
 import os
 import subprocess
 import sys
-from threading import Thread
+import time
+import webbrowser
+from collections import deque
+from pathlib import Path
+from threading import Condition, Thread
+from urllib.parse import urlsplit
+
+# Seconds to wait for further edits before config.json is written
+SAVE_DELAY = 0.5
+
+# Milliseconds between the last keystroke in the filter box and re-filtering
+FILTER_DELAY = 150
+
+# Rows scrolled per mouse wheel step in the URL list
+WHEEL_ROWS = 3
+
+# Seconds after Cancel until a checker that hasn't wound down is terminated.
+# Its checks stop within about a second (a blocked page load by killing its
+# browser), so this only covers a checker that is stuck.
+CANCEL_KILL_SECONDS = 5
+
+# Errors shown per page of the error report window
+ERROR_PAGE_SIZE = 200
+
+# Labels for the verdicts reported by login_checker.py
+RESULT_LABELS = {
+    'success': "Success",
+    'failed': "Login failed",
+    'timeout': "Timeout",
+    'unreachable': "Unreachable",
+    'skipped': "Skipped",
+    'error': "Error"
+}
+
+# Error report categories for each failing verdict
+ERROR_TYPES = {
+    'failed': 'Login Failure',
+    'timeout': 'Timeout Error',
+    'unreachable': 'Unreachable',
+    'error': 'Error'
+}
+
+def is_valid_url(url):
+    """True for an absolute http(s) URL with a host"""
+    parts = urlsplit(url)
+    return parts.scheme in ('http', 'https') and bool(parts.netloc) and not any(c.isspace() for c in url)
+
+def read_url_file(path):
+    """Read URLs from a text file (one per line) or a CSV file (first URL cell of each row)
+
+    Blank lines, '#' comments and a CSV header row are ignored. Returns
+    (urls, rejected): the valid URLs in file order without duplicates, and the
+    lines that held no valid URL.
+    """
+    urls, rejected = {}, []
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        if path.lower().endswith('.csv'):
+            for line_number, row in enumerate(csv.reader(f)):
+                cells = [cell.strip() for cell in row if cell.strip()]
+                url = next((cell for cell in cells if is_valid_url(cell)), None)
+                if url:
+                    urls[url] = None
+                elif cells and line_number > 0:
+                    rejected.append(",".join(cells))
+        else:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if is_valid_url(line):
+                    urls[line] = None
+                else:
+                    rejected.append(line)
+    return list(urls), rejected
+
+def write_config(path, config):
+    """Write config.json atomically: a crash mid-write leaves the old file intact"""
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(config, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+class ConfigSaver:
+    """Writes config.json from a background thread
+
+    Saves requested within SAVE_DELAY of each other are coalesced into one
+    write of the latest settings, so bursts of edits cost a single write and
+    the UI never waits on the disk.
+    """
+
+    def __init__(self, path, delay=SAVE_DELAY, on_error=None):
+        self.path = path
+        self.delay = delay
+        self.on_error = on_error
+        self.condition = Condition()
+        self.pending = None
+        self.due = None
+        self.writing = False
+        Thread(target=self.run, name="config-saver", daemon=True).start()
+
+    def save(self, config):
+        """Queue a snapshot of the settings to be written shortly"""
+        with self.condition:
+            self.pending = config
+            self.due = time.monotonic() + self.delay
+            self.condition.notify_all()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None or time.monotonic() < self.due:
+                    self.condition.wait(None if self.pending is None else self.due - time.monotonic())
+                config, self.pending = self.pending, None
+                self.writing = True
+            try:
+                write_config(self.path, config)
+            except (OSError, TypeError, ValueError) as e:
+                print(f"Error saving config: {str(e)}")
+                if self.on_error:
+                    self.on_error(e)
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+    def flush(self):
+        """Write any pending settings now and wait until they are on disk"""
+        with self.condition:
+            if self.pending is not None:
+                self.due = time.monotonic()
+                self.condition.notify_all()
+            while self.pending is not None or self.writing:
+                self.condition.wait()
+
+class VirtualListView(ttk.Frame):
+    """A list that only puts the rows in view into its Listbox
+
+    Scrolling re-fills the handful of visible rows from the backing list, so
+    the widget costs the same with 50 items or 50,000. Selection is tracked by
+    item, so it survives scrolling and re-filtering.
+    """
+
+    def __init__(self, parent, height=10, width=50):
+        super().__init__(parent)
+        self.items = []
+        self.top = 0
+        self.rows = height
+        self.cursor = 0
+        self.selected = set()
+        self.render_job = None
+        self.widget = self.make_widget(height, width)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.widget.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.columnconfigure(0, weight=1)
+        self.widget.bind("<MouseWheel>", lambda event: self.scroll(-WHEEL_ROWS if event.delta > 0 else WHEEL_ROWS))
+        self.widget.bind("<Button-4>", lambda event: self.scroll(-WHEEL_ROWS))
+        self.widget.bind("<Button-5>", lambda event: self.scroll(WHEEL_ROWS))
+        self.widget.bind("<Up>", lambda event: self.move_cursor(-1))
+        self.widget.bind("<Down>", lambda event: self.move_cursor(1))
+        self.widget.bind("<Prior>", lambda event: self.move_cursor(-self.rows))
+        self.widget.bind("<Next>", lambda event: self.move_cursor(self.rows))
+
+    def make_widget(self, height, width):
+        listbox = tk.Listbox(self, height=height, width=width, selectmode=tk.EXTENDED, exportselection=False)
+        listbox.bind("<<ListboxSelect>>", self.on_select)
+        return listbox
+
+    def show_rows(self, visible):
+        """Put the visible items into the widget, selecting the selected ones"""
+        self.widget.delete(0, tk.END)
+        if visible:
+            self.widget.insert(tk.END, *visible)
+        for index, item in enumerate(visible):
+            if item in self.selected:
+                self.widget.selection_set(index)
+
+    def visible_selection(self):
+        """Indexes of the selected rows among those in the widget"""
+        return self.widget.curselection()
+
+    def set_items(self, items):
+        """Show a new list of items, keeping the scroll position where possible"""
+        self.items = items
+        self.render()
+
+    def selection(self):
+        """The selected items in list order"""
+        return [item for item in self.items if item in self.selected]
+
+    def clear_selection(self):
+        self.selected.clear()
+        self.render()
+
+    def yview(self, *args):
+        """Scrollbar callback: 'moveto fraction' or 'scroll n units|pages'"""
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.items))
+            self.render()
+        elif args[0] == 'scroll':
+            self.scroll(int(args[1]) * (self.rows if args[2] == 'pages' else 1))
+
+    def scroll(self, rows):
+        self.top += rows
+        self.render()
+
+    def move_cursor(self, rows):
+        """Arrow and Page keys: select the item rows away, scrolling it into view"""
+        if self.items:
+            self.cursor = max(0, min(self.cursor + rows, len(self.items) - 1))
+            self.selected = {self.items[self.cursor]}
+            self.top = min(max(self.top, self.cursor - self.rows + 1), self.cursor)
+            self.render()
+        return "break"
+
+    def render(self):
+        self.render_job = None
+        self.top = max(0, min(self.top, len(self.items) - self.rows))
+        visible = self.items[self.top:self.top + self.rows]
+        self.show_rows(visible)
+        if self.items:
+            self.scrollbar.set(self.top / len(self.items), (self.top + len(visible)) / len(self.items))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def schedule_render(self):
+        """Re-fill the rows once the pending updates are applied, not once per update"""
+        if self.render_job is None:
+            self.render_job = self.after_idle(self.render)
+
+    def on_select(self, event):
+        # Only the rows in view can have changed; off-screen selections stay
+        visible = self.items[self.top:self.top + self.rows]
+        chosen = set(self.visible_selection())
+        for index, item in enumerate(visible):
+            if index in chosen:
+                self.selected.add(item)
+                self.cursor = self.top + index
+            else:
+                self.selected.discard(item)
+
+class VirtualTableView(VirtualListView):
+    """A VirtualListView with columns, in a Treeview
+
+    Items are row keys; each row's column values are kept in a dict, so
+    updating a row that is out of view costs no widget work at all.
+    """
+
+    def __init__(self, parent, columns, height=8):
+        self.columns = columns
+        self.values = {}
+        super().__init__(parent, height)
+
+    def make_widget(self, height, width):
+        tree = ttk.Treeview(self, columns=[column for column, _, _ in self.columns], show="headings", height=height)
+        for column, heading, column_width in self.columns:
+            tree.heading(column, text=heading)
+            tree.column(column, width=column_width, stretch=column in ("url", "details"))
+        tree.bind("<<TreeviewSelect>>", self.on_select)
+        return tree
+
+    def show_rows(self, visible):
+        self.widget.delete(*self.widget.get_children())
+        for index, item in enumerate(visible):
+            row = self.values[item]
+            self.widget.insert("", tk.END, iid=str(index), values=[row.get(column, "") for column, _, _ in self.columns])
+        self.widget.selection_set([str(index) for index, item in enumerate(visible) if item in self.selected])
+
+    def visible_selection(self):
+        return [int(iid) for iid in self.widget.selection()]
+
+    def set_rows(self, rows):
+        """Replace all rows with a dict of key -> column values"""
+        self.values = rows
+        self.selected.clear()
+        self.top = self.cursor = 0
+        self.set_items(list(rows))
+
+    def set_row(self, key, **values):
+        """Update columns of a row, adding it at the end if it isn't listed yet"""
+        if key not in self.values:
+            self.values[key] = {}
+            self.items.append(key)
+            self.schedule_render()
+        self.values[key].update(values)
+        if key in self.items[self.top:self.top + self.rows]:
+            self.schedule_render()
 
 class URLManagerGUI:
     def __init__(self, root):
         print("\n=== Starting Application ===")
         self.root = root
         self.root.title("URL Manager")
-        self.root.geometry("600x600")  # Made taller for run button
+        self.root.geometry("720x860")  # Made taller for run button and results table
         
         # Use absolute path for config file
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -24,7 +313,10 @@ class URLManagerGUI:
         # Load configuration first
         print("Loading initial configuration...")
         self.load_config()
-        
+        self.saver = ConfigSaver(self.config_file, on_error=lambda e: self.root.after(
+            0, lambda: self.status_label.config(text=f"Error: failed to save settings: {str(e)}")))
+        self.filter_job = None
+
         # Create and setup UI components
         print("Setting up UI components...")
         self.setup_ui()
@@ -63,33 +355,46 @@ class URLManagerGUI:
                                             command=self.toggle_password_visibility)
         self.toggle_pwd_btn.grid(row=1, column=2, padx=5, pady=5)
         
-        # URL List
-        ttk.Label(main_frame, text="URLs to Check:").grid(row=1, column=0, sticky=tk.W)
-        
-        # URL Listbox and Scrollbar
-        self.url_listbox = tk.Listbox(main_frame, width=50, height=10)
-        self.url_listbox.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E))
-        
-        scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.url_listbox.yview)
-        scrollbar.grid(row=2, column=2, sticky=(tk.N, tk.S))
-        self.url_listbox.configure(yscrollcommand=scrollbar.set)
-        
+        # URL List header with count and filter box
+        list_header = ttk.Frame(main_frame)
+        list_header.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E))
+        ttk.Label(list_header, text="URLs to Check:").pack(side=tk.LEFT)
+        self.url_count_label = ttk.Label(list_header, text="")
+        self.url_count_label.pack(side=tk.LEFT, padx=5)
+        self.filter_var = tk.StringVar()
+        ttk.Entry(list_header, textvariable=self.filter_var, width=25).pack(side=tk.RIGHT)
+        ttk.Label(list_header, text="Filter:").pack(side=tk.RIGHT, padx=5)
+        self.filter_var.trace_add('write', self.schedule_filter)
+
+        # URL list: only the visible rows are ever in the widget
+        self.url_view = VirtualListView(main_frame, height=10, width=50)
+        self.url_view.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E))
+
         # URL Entry
         self.url_var = tk.StringVar()
         url_entry = ttk.Entry(main_frame, textvariable=self.url_var, width=50)
         url_entry.grid(row=3, column=0, columnspan=2, pady=5, sticky=(tk.W, tk.E))
-        
+        url_entry.bind("<Return>", lambda event: self.add_url())
+
         # Buttons Frame
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=4, column=0, columnspan=2, pady=5)
-        
+
         ttk.Button(button_frame, text="Add URL", command=self.add_url).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="Remove Selected", command=self.remove_url).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Import...", command=self.import_urls).pack(side=tk.LEFT, padx=5)
         
         # Speed Control Frame
         speed_frame = ttk.LabelFrame(main_frame, text="Navigation Speed", padding="5")
         speed_frame.grid(row=5, column=0, columnspan=2, pady=10, sticky=(tk.W, tk.E))
         
+        # Demo pacing toggle - fast mode waits on page conditions instead of the slider delay
+        self.demo_mode_var = tk.BooleanVar(value=self.config.get('execution_mode', 'fast') == 'demo')
+        demo_check = ttk.Checkbutton(speed_frame, text="Demo pacing (visible, uses delay below)",
+                                     variable=self.demo_mode_var,
+                                     command=self.toggle_demo_mode)
+        demo_check.grid(row=1, column=0, columnspan=2, padx=5, pady=(5, 0), sticky=tk.W)
+        
         # Speed Slider
         self.delay_var = tk.DoubleVar(value=self.config.get('delay_seconds', 3))
         self.speed_slider = ttk.Scale(speed_frame, from_=0.5, to=10.0, 
@@ -102,12 +407,18 @@ class URLManagerGUI:
         # Speed Label
         self.speed_label = ttk.Label(speed_frame, text="")
         self.speed_label.grid(row=0, column=1, padx=5)
-        self.update_speed_label()
+        self.toggle_demo_mode()
 
         # Run Button Frame
         run_frame = ttk.Frame(main_frame)
         run_frame.grid(row=6, column=0, columnspan=2, pady=20)
         
+        # Keep browsers warm between runs in a background checker daemon
+        self.use_daemon_var = tk.BooleanVar(value=self.config.get('use_daemon', False))
+        ttk.Checkbutton(run_frame, text="Keep browsers warm between runs (checker daemon)",
+                        variable=self.use_daemon_var,
+                        command=self.toggle_use_daemon).pack()
+        
         # Button Frame for Run and Exit
         button_frame = ttk.Frame(run_frame)
         button_frame.pack(pady=10)
@@ -118,6 +429,13 @@ class URLManagerGUI:
                               style='Run.TButton')
         run_button.pack(side=tk.LEFT, padx=10)
         
+        # Cancel Button, only enabled while a run is in progress
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_run)
+        self.cancel_button.pack(side=tk.LEFT, padx=10)
+        self.cancel_button.state(['disabled'])
+        self.process = None
+        self.cancel_requested = False
+        
         # Exit Button
         exit_button = ttk.Button(button_frame, text="Save & Exit", 
                                command=self.safe_exit,
@@ -132,6 +450,19 @@ class URLManagerGUI:
         # Status Label
         self.status_label = ttk.Label(run_frame, text="")
         self.status_label.pack(pady=5)
+        
+        # Live results table, filled in as each URL completes
+        results_frame = ttk.LabelFrame(main_frame, text="Results", padding="5")
+        results_frame.grid(row=7, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S))
+        # Only the rows in view are in the widget, however many URLs the run has
+        self.results_view = VirtualTableView(results_frame, height=8, columns=(
+            ("url", "URL", 220), ("verdict", "Result", 110), ("engine", "Engine", 70),
+            ("time", "Time", 60), ("details", "Details", 220)))
+        self.results_view.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        results_frame.columnconfigure(0, weight=1)
+        self.run_errors = []
+        self.run_counts = {}
+        self.finished_urls = set()
     
     def load_config(self):
         """Load configuration from config file"""
@@ -140,115 +471,151 @@ class URLManagerGUI:
             if os.path.exists(self.config_file):
                 with open(self.config_file, 'r') as f:
                     loaded_config = json.load(f)
-                    # Ensure all required fields exist
+                    # Ensure all required fields exist, keeping any other settings
                     self.config = {
+                        **loaded_config,
                         'use_gui': True,
                         'urls': loaded_config.get('urls', []),
                         'delay_seconds': loaded_config.get('delay_seconds', 3),
+                        'execution_mode': loaded_config.get('execution_mode', 'fast'),
                         'credentials': loaded_config.get('credentials', {'username': '', 'password': ''})
                     }
-                    print(f"Loaded config successfully. URLs in config: {self.config.get('urls', [])}")
+                    print(f"Loaded config successfully. {len(self.config['urls'])} URLs in config")
             else:
                 print("Config file does not exist, creating new config")
                 self.config = {
                     'use_gui': True,
                     'urls': [],
                     'delay_seconds': 3,
+                    'execution_mode': 'fast',
                     'credentials': {
                         'username': '',
                         'password': ''
                     }
                 }
                 # Create the config file
-                with open(self.config_file, 'w') as f:
-                    json.dump(self.config, f, indent=4)
+                write_config(self.config_file, self.config)
         except Exception as e:
             print(f"Error loading config: {str(e)}")
             self.config = {
                 'use_gui': True,
                 'urls': [],
                 'delay_seconds': 3,
+                'execution_mode': 'fast',
                 'credentials': {
                     'username': '',
                     'password': ''
                 }
             }
+        self.urls = list(self.config['urls'])
+        self.url_set = set(self.urls)
 
     def save_config(self):
-        """Save all settings to config file"""
-        print("\nSaving configuration...")
-        try:
-            # Get current URLs from listbox
-            urls = list(self.url_listbox.get(0, tk.END))
-            print(f"Current URLs in listbox: {urls}")
-            
-            # Create new config with current values
-            new_config = {
-                'use_gui': True,
-                'urls': urls,
-                'delay_seconds': self.delay_var.get(),
-                'credentials': {
-                    'username': self.username_var.get(),
-                    'password': self.password_var.get()
-                }
+        """Queue all settings to be written to the config file
+
+        The write happens on the saver thread; call self.saver.flush() when the
+        file must be up to date (before a run or on exit).
+        """
+        # Create new config with current values, keeping settings the GUI doesn't edit
+        new_config = {
+            **self.config,
+            'use_gui': True,
+            'urls': list(self.urls),
+            'delay_seconds': self.delay_var.get(),
+            'execution_mode': 'demo' if self.demo_mode_var.get() else 'fast',
+            'use_daemon': self.use_daemon_var.get(),
+            'credentials': {
+                'username': self.username_var.get(),
+                'password': self.password_var.get()
             }
-            
-            print(f"Config to save - URLs: {new_config['urls']}")
-            
-            # Write to file
-            with open(self.config_file, 'w') as f:
-                json.dump(new_config, f, indent=4)
-            print(f"Saved config to: {self.config_file}")
-            
-            # Update our current config
-            self.config = new_config.copy()
-            
-        except Exception as e:
-            print(f"Error saving config: {str(e)}")
-            messagebox.showerror("Error", f"Failed to save settings: {str(e)}")
+        }
+        self.config = new_config
+        self.saver.save(new_config.copy())
 
     def update_url_list(self):
-        """Update the URL listbox with URLs from config"""
-        print("\nUpdating URL listbox")
-        print(f"Current config URLs before update: {self.config.get('urls', [])}")
-        
-        # Clear the listbox
-        self.url_listbox.delete(0, tk.END)
-        
-        # Get URLs from config
-        urls = self.config.get('urls', [])
-        print(f"URLs from config to add to listbox: {urls}")
-        
-        # Add URLs to listbox
-        for url in urls:
-            self.url_listbox.insert(tk.END, url)
-        
-        print(f"URL listbox now contains: {list(self.url_listbox.get(0, tk.END))}")
+        """Show the URLs matching the filter box in the URL list"""
+        self.filter_job = None
+        needle = self.filter_var.get().strip().lower()
+        shown = [url for url in self.urls if needle in url.lower()] if needle else self.urls
+        self.url_view.set_items(shown)
+        if needle:
+            self.url_count_label.config(text=f"({len(shown)} of {len(self.urls)} shown)")
+        else:
+            self.url_count_label.config(text=f"({len(self.urls)})")
+
+    def schedule_filter(self, *args):
+        """Re-filter the URL list once typing in the filter box pauses"""
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+        self.filter_job = self.root.after(FILTER_DELAY, self.update_url_list)
 
     def add_url(self):
         """Add a URL to the list and save"""
         url = self.url_var.get().strip()
-        if url:
-            print(f"\nAdding URL: {url}")
-            self.url_listbox.insert(tk.END, url)
-            self.url_var.set("")
-            self.save_config()  # Save after adding
-            # Show confirmation
+        if not url:
+            return
+        if not is_valid_url(url):
+            self.status_label.config(text=f"Not a valid http(s) URL: {url}")
             self.root.bell()
-            messagebox.showinfo("Success", f"Added URL: {url}")
-            
+            return
+        if url in self.url_set:
+            self.status_label.config(text=f"Already in the list: {url}")
+            return
+        self.urls.append(url)
+        self.url_set.add(url)
+        self.url_var.set("")
+        self.update_url_list()
+        self.save_config()
+        self.status_label.config(text=f"Added URL: {url}")
+
     def remove_url(self):
-        """Remove selected URL from the list and save"""
-        selection = self.url_listbox.curselection()
-        if selection:
-            url = self.url_listbox.get(selection)
-            self.url_listbox.delete(selection)
-            print(f"\nRemoving URL: {url}")
+        """Remove the selected URLs from the list and save"""
+        selected = set(self.url_view.selection())
+        if not selected:
+            return
+        self.urls = [url for url in self.urls if url not in selected]
+        self.url_set -= selected
+        self.url_view.clear_selection()
+        self.update_url_list()
+        self.save_config()
+        if len(selected) == 1:
+            self.status_label.config(text=f"Removed URL: {next(iter(selected))}")
+        else:
+            self.status_label.config(text=f"Removed {len(selected)} URLs")
+
+    def import_urls(self):
+        """Add the URLs of a text or CSV file, skipping invalid lines and duplicates"""
+        path = filedialog.askopenfilename(title="Import URLs",
+                                          filetypes=[("URL lists", "*.txt *.csv"), ("All files", "*.*")])
+        if not path:
+            return
+        self.status_label.config(text=f"Importing {os.path.basename(path)}...")
+
+        # Read on a worker thread so a large file doesn't freeze the window
+        def read_file():
+            try:
+                urls, rejected = read_url_file(path)
+            except (OSError, UnicodeDecodeError, csv.Error) as e:
+                error_msg = str(e)
+                self.root.after(0, lambda: self.status_label.config(text=f"Error: import failed: {error_msg}"))
+                return
+            self.root.after(0, self.finish_import, path, urls, rejected)
+
+        Thread(target=read_file, daemon=True).start()
+
+    def finish_import(self, path, urls, rejected):
+        """Merge imported URLs into the list (runs on the Tk thread)"""
+        new_urls = [url for url in urls if url not in self.url_set]
+        self.urls.extend(new_urls)
+        self.url_set.update(new_urls)
+        self.update_url_list()
+        if new_urls:
             self.save_config()
-            # Show confirmation
-            self.root.bell()
-            messagebox.showinfo("Success", f"Removed URL: {url}")
-    
+        for line in rejected[:10]:
+            print(f"Skipped invalid import line: {line}")
+        self.status_label.config(text=f"Imported {len(new_urls)} new URLs from {os.path.basename(path)} "
+                                      f"({len(urls) - len(new_urls)} already listed, {len(rejected)} invalid)")
+
     def toggle_password_visibility(self):
         """Toggle password visibility"""
         self.password_entry.config(show="" if self.show_password.get() else "*")
@@ -256,13 +623,27 @@ class URLManagerGUI:
     def update_speed_label(self, *args):
         """Update the label showing current delay value"""
         delay = self.delay_var.get()
-        self.speed_label.config(text=f"{delay:.1f} seconds")
+        if self.demo_mode_var.get():
+            self.speed_label.config(text=f"{delay:.1f} seconds")
+        else:
+            self.speed_label.config(text="Fast (waits on page)")
         # Don't automatically save here
         self.config['delay_seconds'] = delay
 
+    def toggle_use_daemon(self):
+        """Remember whether runs go through the checker daemon"""
+        self.config['use_daemon'] = self.use_daemon_var.get()
+
+    def toggle_demo_mode(self):
+        """Enable the delay slider only when demo pacing is selected"""
+        demo = self.demo_mode_var.get()
+        self.speed_slider.state(['!disabled'] if demo else ['disabled'])
+        self.config['execution_mode'] = 'demo' if demo else 'fast'
+        self.update_speed_label()
+
     def run_login_checker(self):
         """Run the login checker script"""
-        if not self.config['urls']:
+        if not self.urls:
             messagebox.showerror("Error", "Please add at least one URL before running")
             self.status_label.config(text="Error: No URLs configured")
             return
@@ -275,8 +656,12 @@ class URLManagerGUI:
         # Save current settings before running
         self.save_config()
         
-        # Update status
+        # Update status and reset the live results table
         self.status_label.config(text="Running login checker...")
+        self.process = None
+        self.cancel_requested = False
+        self.cancel_button.state(['!disabled'])
+        self.start_results(self.config['urls'])
         self.root.update()
         
         # Get the path to login_checker.py
@@ -286,71 +671,46 @@ class URLManagerGUI:
         # Run in a separate thread to keep GUI responsive
         def run_script():
             try:
-                # Run the login checker script
-                process = subprocess.Popen([sys.executable, login_checker_path],
+                # The checker reads config.json, so the queued save must land first
+                self.saver.flush()
+
+                # Prefer the warm checker daemon when enabled; fall back to a fresh process
+                if self.config.get('use_daemon', False):
+                    if self.run_on_daemon() is not None:
+                        self.root.after(0, self.finish_run)
+                        return
+                
+                # Run the login checker script, reading its JSON event stream as it goes
+                process = subprocess.Popen([sys.executable, login_checker_path, "--jsonl"],
+                                        stdin=subprocess.PIPE,
                                         stdout=subprocess.PIPE,
                                         stderr=subprocess.PIPE,
-                                        text=True)
+                                        text=True,
+                                        bufsize=1)
+                self.process = process
+                if self.cancel_requested:
+                    Thread(target=self.send_cancel, daemon=True).start()
                 
-                # Get output
-                stdout, stderr = process.communicate()
+                # Drain stderr (the human readable log) so the checker never blocks on a full pipe
+                stderr_tail = deque(maxlen=50)
+                stderr_reader = Thread(target=lambda: stderr_tail.extend(process.stderr), daemon=True)
+                stderr_reader.start()
                 
-                # Process the output to extract status messages
-                status_messages = []
-                current_url = None
-                errors_found = []
+                for line in process.stdout:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.root.after(0, self.handle_event, event)
                 
-                for line in stdout.split('\n'):
-                    if "Testing login for:" in line:
-                        current_url = line.split("Testing login for:", 1)[1].strip()
-                        status_messages.append(f"\nTesting: {current_url}")
-                    elif "Found error message:" in line:
-                        error_msg = line.split("Found error message:", 1)[1].strip()
-                        status_messages.append(f"Error: {error_msg}")
-                        # Store error details for popup
-                        if current_url:
-                            errors_found.append({
-                                'url': current_url,
-                                'error': error_msg,
-                                'type': 'Login Error'
-                            })
-                    elif "Login Failed -" in line:
-                        fail_msg = line.strip()
-                        status_messages.append(f"Failed: {fail_msg}")
-                        # Store failure details for popup
-                        if current_url:
-                            errors_found.append({
-                                'url': current_url,
-                                'error': fail_msg,
-                                'type': 'Login Failure'
-                            })
-                    elif "Success" in line:
-                        status_messages.append("Success!")
-                    elif "Timeout -" in line:
-                        timeout_msg = line.strip()
-                        status_messages.append(f"Timeout: {timeout_msg}")
-                        if current_url:
-                            errors_found.append({
-                                'url': current_url,
-                                'error': timeout_msg,
-                                'type': 'Timeout Error'
-                            })
+                process.wait()
+                stderr_reader.join(timeout=5)
                 
-                # Update status based on result
-                if process.returncode == 0:
-                    if status_messages:
-                        final_status = "\n".join(status_messages)
-                        self.root.after(0, lambda: self.status_label.config(
-                            text=final_status))
-                        
-                        # Show error popup if errors were found
-                        if errors_found:
-                            self.root.after(0, lambda: self.show_error_details(errors_found))
-                    else:
-                        self.root.after(0, lambda: self.status_label.config(
-                            text="Login checker completed successfully"))
+                # Update status based on result; a checker stopped after Cancel still reports what it finished
+                if process.returncode == 0 or self.cancel_requested:
+                    self.root.after(0, self.finish_run)
                 else:
-                    error_msg = stderr if stderr else "Unknown error occurred"
+                    error_msg = "".join(stderr_tail) or "Unknown error occurred"
                     self.root.after(0, lambda: self.status_label.config(
                         text=f"Error: {error_msg}"))
                     # Show system error popup
@@ -368,10 +728,133 @@ class URLManagerGUI:
                     "Error",
                     f"An unexpected error occurred:\n{error_msg}"
                 ))
+            finally:
+                self.root.after(0, lambda: self.cancel_button.state(['disabled']))
     
         # Start the thread
         Thread(target=run_script, daemon=True).start()
 
+    def cancel_run(self):
+        """Stop the running check; finished results stay, the rest are reported as skipped"""
+        self.cancel_requested = True
+        self.cancel_button.state(['disabled'])
+        self.status_label.config(text="Cancelling login checker...")
+        Thread(target=self.send_cancel, daemon=True).start()
+        # The table doesn't wait for checks that are still winding down; a
+        # result that does arrive replaces its row's label
+        self.mark_unfinished_skipped()
+
+    def send_cancel(self):
+        """Tell the checker process (or the daemon) to stop outstanding checks"""
+        process = self.process
+        try:
+            if process is not None:
+                process.stdin.write("cancel\n")
+                process.stdin.flush()
+                try:
+                    process.wait(timeout=CANCEL_KILL_SECONDS)
+                except subprocess.TimeoutExpired:
+                    print("Login checker did not stop after cancel, terminating it")
+                    process.terminate()
+            elif self.config.get('use_daemon', False):
+                from checker_daemon import DAEMON_PORT, cancel_jobs
+                cancel_jobs(self.config.get('daemon_port', DAEMON_PORT))
+        except (OSError, ValueError) as e:
+            print(f"Could not cancel the run: {str(e)}")
+
+    def mark_unfinished_skipped(self):
+        """Show every URL without a result yet as skipped"""
+        for url in self.results_view.items:
+            if url not in self.finished_urls:
+                self.set_result_row(url, verdict=RESULT_LABELS['skipped'], details="Skipped (cancelled)")
+
+    def start_results(self, urls):
+        """Clear the results table and list the URLs about to be checked"""
+        self.run_errors = []
+        self.run_counts = {}
+        self.finished_urls = set()
+        self.results_view.set_rows({url: {'url': url, 'verdict': "Pending"} for url in urls})
+
+    def set_result_row(self, url, **values):
+        """Update columns of a URL's row, adding the row if it isn't listed yet"""
+        self.results_view.set_row(url, url=url, **values)
+
+    def handle_event(self, event):
+        """Apply one checker event to the live results table (runs on the Tk thread)"""
+        kind = event.get('event')
+        if kind == 'run_start':
+            self.start_results(event.get('urls', []))
+        elif kind == 'phase' and not self.cancel_requested:
+            self.set_result_row(event['url'], verdict=f"Running: {event['phase']}", engine=event.get('engine', ''))
+        elif kind == 'fallback':
+            self.set_result_row(event['url'], verdict="Needs browser", details=event.get('reason', ''))
+        elif kind == 'result':
+            verdict = event['verdict']
+            duration = event.get('duration')
+            self.set_result_row(event['url'],
+                                verdict=RESULT_LABELS.get(verdict, verdict),
+                                engine=event.get('engine', ''),
+                                time=f"{duration:.1f}s" if duration is not None else "",
+                                details=event.get('error') or "")
+            self.run_counts[verdict] = self.run_counts.get(verdict, 0) + 1
+            self.finished_urls.add(event['url'])
+            # Skipped URLs weren't checked, so there's no error to report for them
+            if verdict not in ('success', 'skipped'):
+                self.run_errors.append({
+                    'url': event['url'],
+                    'error': event['status'],
+                    'type': ERROR_TYPES.get(verdict, 'Error')
+                })
+            done = sum(self.run_counts.values())
+            self.status_label.config(text=f"Running login checker... {done} checked")
+
+    def finish_run(self):
+        """Summarise the finished run and pop up any errors"""
+        self.cancel_button.state(['disabled'])
+        if self.run_counts:
+            summary = ", ".join(f"{count} {RESULT_LABELS.get(verdict, verdict).lower()}"
+                                for verdict, count in self.run_counts.items())
+            self.status_label.config(text=f"Login checker finished: {summary}")
+            # Show error popup if errors were found
+            if self.run_errors:
+                self.show_error_details(self.run_errors)
+        else:
+            self.status_label.config(text="Login checker completed successfully")
+
+    def run_on_daemon(self):
+        """Submit the run to the checker daemon, starting it if needed
+
+        Result events are applied to the table as they arrive. Returns the
+        verdict counts, or None if the daemon can't be used.
+        """
+        try:
+            from checker_daemon import DAEMON_PORT, daemon_available, start_daemon, submit_job
+            port = self.config.get('daemon_port', DAEMON_PORT)
+            if not daemon_available(port):
+                self.root.after(0, lambda: self.status_label.config(
+                    text="Starting checker daemon (first run only)..."))
+                if not start_daemon(port):
+                    print("Checker daemon did not start, running a fresh process instead")
+                    return None
+            self.root.after(0, lambda: self.status_label.config(text="Running login checker on daemon..."))
+            from report_sinks import open_reports
+            reports, _ = open_reports(self.config)
+            
+            def on_event(event):
+                # Reports are written here as results stream in, like a local run writes them
+                if reports and event.get('event') == 'result':
+                    reports.write({key: value for key, value in event.items() if key not in ('event', 'time')})
+                self.root.after(0, self.handle_event, event)
+            
+            try:
+                return submit_job(port=port, on_event=on_event, keep_results=False)
+            finally:
+                if reports:
+                    reports.close()
+        except Exception as e:
+            print(f"Checker daemon unavailable: {str(e)}")
+            return None
+
     def show_error_details(self, errors):
         """Show a detailed error report in a popup window"""
         # Create a new top-level window
@@ -397,21 +880,47 @@ class URLManagerGUI:
         text_widget.tag_configure("error_type", font=("Arial", 10, "bold"), foreground="red")
         text_widget.tag_configure("url", font=("Arial", 10, "italic"))
         
-        text_widget.insert(tk.END, "Login Check Error Report\n\n", "title")
-        
-        # Add error details
-        for i, error in enumerate(errors, 1):
-            text_widget.insert(tk.END, f"{i}. Error Type: ", "")
-            text_widget.insert(tk.END, f"{error['type']}\n", "error_type")
-            text_widget.insert(tk.END, f"   URL: ", "")
-            text_widget.insert(tk.END, f"{error['url']}\n", "url")
-            text_widget.insert(tk.END, f"   Details: {error['error']}\n\n")
-        
-        # Make text widget read-only
-        text_widget.configure(state='disabled')
-        
-        # Add close button
-        ttk.Button(error_window, text="Close", command=error_window.destroy).pack(pady=10)
+        # Only one page of errors is in the widget at a time, however many there are
+        page = {'start': 0}
+        
+        def show_page():
+            start = page['start']
+            end = min(start + ERROR_PAGE_SIZE, len(errors))
+            text_widget.configure(state='normal')
+            text_widget.delete("1.0", tk.END)
+            text_widget.insert(tk.END, "Login Check Error Report\n\n", "title")
+            for i, error in enumerate(errors[start:end], start + 1):
+                text_widget.insert(tk.END, f"{i}. Error Type: ", "")
+                text_widget.insert(tk.END, f"{error['type']}\n", "error_type")
+                text_widget.insert(tk.END, f"   URL: ", "")
+                text_widget.insert(tk.END, f"{error['url']}\n", "url")
+                text_widget.insert(tk.END, f"   Details: {error['error']}\n\n")
+            # Make text widget read-only
+            text_widget.configure(state='disabled')
+            text_widget.yview_moveto(0)
+            page_label.config(text=f"Errors {start + 1}-{end} of {len(errors)}")
+            prev_button.state(['!disabled'] if start > 0 else ['disabled'])
+            next_button.state(['!disabled'] if end < len(errors) else ['disabled'])
+        
+        def turn_page(step):
+            page['start'] += step * ERROR_PAGE_SIZE
+            show_page()
+        
+        buttons = ttk.Frame(error_window)
+        buttons.pack(fill=tk.X, padx=10, pady=10)
+        prev_button = ttk.Button(buttons, text="< Previous", command=lambda: turn_page(-1))
+        prev_button.pack(side=tk.LEFT)
+        page_label = ttk.Label(buttons)
+        page_label.pack(side=tk.LEFT, padx=10)
+        next_button = ttk.Button(buttons, text="Next >", command=lambda: turn_page(1))
+        next_button.pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Close", command=error_window.destroy).pack(side=tk.RIGHT)
+        html_report = (self.config.get('reports') or {}).get('html')
+        if html_report and os.path.exists(os.path.join(html_report, "index.html")):
+            index = Path(html_report, "index.html").resolve().as_uri()
+            ttk.Button(buttons, text="Open HTML report",
+                       command=lambda: webbrowser.open(index)).pack(side=tk.RIGHT, padx=5)
+        show_page()
         
         # Center the window on screen
         error_window.update_idletasks()
@@ -426,6 +935,7 @@ class URLManagerGUI:
         try:
             print("Saving configuration before exit...")
             self.save_config()
+            self.saver.flush()
             print("Save completed, closing application...")
             self.root.quit()
             self.root.destroy()
@@ -440,6 +950,7 @@ class URLManagerGUI:
         print("\nWindow closing event triggered")
         try:
             self.save_config()
+            self.saver.flush()
             print("Configuration saved successfully before exit")
         except Exception as e:
             print(f"Error saving configuration during exit: {str(e)}")
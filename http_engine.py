@@ -0,0 +1,399 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import httpx
+from selenium.webdriver.common.by import By
+
+import events
+import profiling
+from deadlines import DeadlineExceeded, RunBudget
+from metrics import PhaseTimer
+from preflight import tls_verify
+
+# HTTP engine defaults
+HTTP_TIMEOUT = 10
+HTTP_WORKERS = 20
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+             "meta", "param", "source", "track", "wbr"}
+
+# Content a browser never renders as page text
+NON_RENDERED_TAGS = {"script", "style", "template", "noscript", "head", "title"}
+
+# Framework classes that hide an element until JavaScript shows it
+HIDDEN_CLASSES = {"d-none", "hidden", "hide", "invisible", "sr-only", "visually-hidden"}
+TOGGLED_CLASSES = {"modal", "collapse", "fade"}
+SHOWN_CLASSES = {"show", "in", "active", "open"}
+
+# The XPath shapes used by the selector lists in login_checker.py
+XPATH_PATTERN = re.compile(
+    r"^//(\*|[\w-]+)\[(?:contains\((@[\w-]+|text\(\)),\s*'([^']*)'\)|@([\w-]+)='([^']*)')\]$"
+)
+CSS_PATTERN = re.compile(r"^([\w-]*)(?:\.([\w-]+)|#([\w-]+)|\[([\w-]+)=['\"]([^'\"]*)['\"]\])?$")
+
+class NeedsBrowser(Exception):
+    """Raised when a login page can't be checked without running its JavaScript"""
+
+class Node:
+    """Minimal element tree node built from the raw HTML"""
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = attrs
+        self.children = []
+        self.parent = parent
+
+    @property
+    def classes(self):
+        return self.attrs.get("class", "").split()
+
+    def iter(self):
+        """Yield this node and every element below it in document order"""
+        yield self
+        for child in self.children:
+            if isinstance(child, Node):
+                yield from child.iter()
+
+    def first_text(self):
+        """The first direct text node, which is what XPath text() compares against"""
+        for child in self.children:
+            if isinstance(child, str):
+                return child
+        return ""
+
+    def is_hidden(self):
+        """Best-effort visibility check without CSS or JavaScript"""
+        node = self
+        while node is not None:
+            if node.tag in NON_RENDERED_TAGS or "hidden" in node.attrs:
+                return True
+            if node.tag == "input" and node.attrs.get("type", "").lower() == "hidden":
+                return True
+            style = node.attrs.get("style", "").replace(" ", "").lower()
+            if "display:none" in style or "visibility:hidden" in style:
+                return True
+            classes = set(node.classes)
+            if classes & HIDDEN_CLASSES:
+                return True
+            if classes & TOGGLED_CLASSES and not classes & SHOWN_CLASSES:
+                return True
+            node = node.parent
+        return False
+
+    def inner_text(self):
+        """Rendered text of the element, whitespace collapsed"""
+        parts = []
+
+        def collect(node):
+            for child in node.children:
+                if isinstance(child, str):
+                    parts.append(child)
+                elif not child.is_hidden():
+                    collect(child)
+
+        collect(self)
+        return " ".join(" ".join(parts).split())
+
+class TreeBuilder(HTMLParser):
+    """Builds a Node tree, tolerating the unclosed tags real pages are full of"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node("#document", {})
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, {name: value or "" for name, value in attrs}, self.current)
+        self.current.children.append(node)
+        if tag not in VOID_TAGS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        node = Node(tag, {name: value or "" for name, value in attrs}, self.current)
+        self.current.children.append(node)
+
+    def handle_endtag(self, tag):
+        # Close up to the matching open element, ignoring stray end tags
+        node = self.current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        if node is not None and node.parent is not None:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+def parse_html(html):
+    """Parse HTML into a Node tree and return the document node"""
+    builder = TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+def compile_selector(by, value):
+    """Turn a (By, value) locator into a predicate over Nodes, or None if unsupported"""
+    if by == By.CLASS_NAME:
+        return lambda node: value in node.classes
+    if by == By.ID:
+        return lambda node: node.attrs.get("id") == value
+    if by == By.NAME:
+        return lambda node: node.attrs.get("name") == value
+    if by == By.CSS_SELECTOR:
+        match = CSS_PATTERN.match(value.strip())
+        if not match:
+            return None
+        tag, class_name, element_id, attr, attr_value = match.groups()
+        def css_predicate(node):
+            if tag and node.tag != tag:
+                return False
+            if class_name and class_name not in node.classes:
+                return False
+            if element_id and node.attrs.get("id") != element_id:
+                return False
+            if attr and node.attrs.get(attr) != attr_value:
+                return False
+            return True
+        return css_predicate
+    if by == By.XPATH:
+        match = XPATH_PATTERN.match(value.strip())
+        if not match:
+            return None
+        tag, contains_target, contains_value, attr, attr_value = match.groups()
+        def xpath_predicate(node):
+            if tag != "*" and node.tag != tag:
+                return False
+            if attr:
+                return node.attrs.get(attr) == attr_value
+            if contains_target == "text()":
+                return contains_value in node.first_text()
+            return contains_value in node.attrs.get(contains_target[1:], "")
+        return xpath_predicate
+    return None
+
+def find_login_form(document):
+    """Return the form holding the username and password fields, or None"""
+    for form in document.iter():
+        if form.tag != "form":
+            continue
+        names = {node.attrs.get("name") for node in form.iter() if node.tag == "input"}
+        if "username" in names and "password" in names:
+            return form
+    return None
+
+def form_payload(form):
+    """Collect the fields a browser would submit, including hidden and CSRF inputs"""
+    payload = {}
+    for node in form.iter():
+        name = node.attrs.get("name")
+        if not name:
+            continue
+        if node.tag == "input":
+            input_type = node.attrs.get("type", "text").lower()
+            if input_type in ("submit", "button", "image", "reset", "file"):
+                continue
+            if input_type in ("checkbox", "radio") and "checked" not in node.attrs:
+                continue
+            payload[name] = node.attrs.get("value", "on" if input_type in ("checkbox", "radio") else "")
+        elif node.tag == "textarea":
+            payload[name] = "".join(child for child in node.children if isinstance(child, str))
+        elif node.tag == "select":
+            options = [option for option in node.iter() if option.tag == "option"]
+            selected = next((option for option in options if "selected" in option.attrs), None)
+            selected = selected or (options[0] if options else None)
+            if selected is not None:
+                payload[name] = selected.attrs.get("value", selected.inner_text())
+    return payload
+
+class HttpLoginEngine:
+    """Checks plain HTML form logins over HTTP, without a browser
+
+    Judges the response with the same error and success selectors the browser
+    check uses. Anything it can't decide with confidence raises NeedsBrowser so
+    the caller can fall back to Selenium.
+    """
+
+    def __init__(self, username, password, error_selectors, success_selectors, error_keywords,
+                 timeout=HTTP_TIMEOUT):
+        self.username = username
+        self.password = password
+        self.error_keywords = error_keywords
+        self.timeout = timeout
+        self.error_predicates = [p for p in (compile_selector(*s) for s in error_selectors) if p]
+        self.success_predicates = [p for p in (compile_selector(*s) for s in success_selectors) if p]
+        self.client = httpx.Client(
+            timeout=timeout,
+            follow_redirects=True,
+            verify=tls_verify(),
+            headers={"Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8"}
+        )
+
+    def close(self):
+        self.client.close()
+
+    def find_errors(self, document):
+        """Visible texts matching the error selectors and keywords, in selector order"""
+        errors = []
+        seen = set()
+        for predicate in self.error_predicates:
+            for node in document.iter():
+                if id(node) in seen or not predicate(node) or node.is_hidden():
+                    continue
+                seen.add(id(node))
+                text = node.inner_text()
+                if text and any(keyword in text.lower() for keyword in self.error_keywords):
+                    errors.append(text)
+        return errors
+
+    def has_success_indicator(self, document):
+        return any(predicate(node) for predicate in self.success_predicates for node in document.iter())
+
+    def enter_phase(self, url, phase, timing=None):
+        """Report that a check has moved on to its next phase and start timing it"""
+        events.emit('phase', url=url, phase=phase, engine='http')
+        self.timer.start(timing or phase)
+
+    def check_login(self, url, deadline=None):
+        """Submit the login form over HTTP and return a status string
+
+        Raises NeedsBrowser when the page needs JavaScript or the response is
+        inconclusive. Each request's timeout is capped by deadline (a
+        deadlines.Deadline). Per-phase timings of the check are left in
+        self.phase_timings.
+        """
+        self.timer = PhaseTimer()
+        self.deadline = deadline or RunBudget(url_timeout=0).deadline()
+        try:
+            return self.submit_login(url)
+        except DeadlineExceeded as e:
+            if self.deadline.budget.cancelled.is_set():
+                return str(e)
+            return f"Timeout - {e}"
+        finally:
+            self.phase_timings = self.timer.result()
+
+    def request_timeout(self):
+        """The client timeout, cut short by the check's deadline"""
+        self.deadline.check()
+        return self.deadline.cap(self.timeout)
+
+    def submit_login(self, url):
+        # Each check starts with a clean session; the connection pool is kept
+        self.client.cookies.clear()
+        self.enter_phase(url, 'navigate')
+        try:
+            page = self.client.get(url, timeout=self.request_timeout())
+        except httpx.HTTPError as e:
+            # Out of time is a timeout, not a reason to start a browser
+            self.deadline.check()
+            raise NeedsBrowser(f"login page request failed: {e}")
+
+        document = parse_html(page.text)
+        self.timer.start('locate_username')
+        form = find_login_form(document)
+        if form is None:
+            raise NeedsBrowser("no username/password form in the page HTML")
+        submit = next((node for node in form.iter()
+                       if node.tag == "button" and node.attrs.get("type", "").lower() == "submit"), None)
+        if submit is None:
+            raise NeedsBrowser("no submit button in the login form")
+        action = form.attrs.get("action", "")
+        if "onsubmit" in form.attrs or "onclick" in submit.attrs or action.lower().startswith("javascript:"):
+            raise NeedsBrowser("form is submitted by JavaScript")
+
+        self.timer.start('fill')
+        payload = form_payload(form)
+        payload["username"] = self.username
+        payload["password"] = self.password
+        if submit.attrs.get("name"):
+            payload[submit.attrs["name"]] = submit.attrs.get("value", "")
+
+        # Frameworks that keep the CSRF token in a meta tag expect it back as a header
+        headers = {"Referer": str(page.url)}
+        for node in document.iter():
+            if node.tag == "meta" and node.attrs.get("name", "").lower() in ("csrf-token", "_csrf"):
+                headers["X-CSRF-Token"] = node.attrs.get("content", "")
+
+        self.enter_phase(url, 'submit')
+        target = urljoin(str(page.url), action)
+        method = form.attrs.get("method", "get").lower()
+        try:
+            if method == "post":
+                response = self.client.post(target, data=payload, headers=headers, timeout=self.request_timeout())
+            else:
+                response = self.client.get(target, params=payload, headers=headers, timeout=self.request_timeout())
+        except httpx.HTTPError as e:
+            # Out of time is a timeout, not a reason to start a browser
+            self.deadline.check()
+            raise NeedsBrowser(f"form submit failed: {e}")
+
+        self.enter_phase(url, 'verdict', timing='error_scan')
+        result = parse_html(response.text)
+        errors = self.find_errors(result)
+        if errors:
+            print(f"Found error message: {errors[0]}")
+            return f"Login Failed - {errors[0]}"
+        self.timer.start('success_wait')
+        if self.has_success_indicator(result):
+            return "Success"
+        raise NeedsBrowser(f"no error or success marker in the response (HTTP {response.status_code})")
+
+def run_http_checks(urls, make_engine, workers=HTTP_WORKERS, on_result=None, budget=None, keep_results=True):
+    """Check URLs with the HTTP engine on a thread pool
+
+    Each thread keeps its own engine (and connection pool). Returns
+    (results, fallback) where results maps url -> {'status', 'duration', 'phases'} for URLs
+    the engine decided and fallback maps url -> reason for URLs that need a
+    browser. on_result(url, outcome) is called as each decided URL finishes;
+    with keep_results=False outcomes are only passed to it and results is
+    empty. URLs not started before budget ran out are in neither.
+    """
+    local = threading.local()
+    engines = []
+    engines_lock = threading.Lock()
+
+    def check(url):
+        with profiling.profile_thread():
+            return check_url(url)
+
+    def check_url(url):
+        if budget is not None and budget.exhausted():
+            return url, None, None
+        engine = getattr(local, "engine", None)
+        if engine is None:
+            engine = local.engine = make_engine()
+            with engines_lock:
+                engines.append(engine)
+        print(f"\nTesting login for: {url}")
+        print("Using http engine")
+        start = time.perf_counter()
+        try:
+            outcome = {'status': engine.check_login(url, budget.deadline() if budget else None),
+                       'duration': time.perf_counter() - start,
+                       'phases': engine.phase_timings}
+        except NeedsBrowser as e:
+            print(f"Falling back to browser for {url}: {e}")
+            events.emit('fallback', url=url, reason=str(e))
+            return url, None, str(e)
+        if on_result:
+            on_result(url, outcome)
+        return url, outcome, None
+
+    results = {}
+    fallback = {}
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(urls)))) as executor:
+            for url, outcome, reason in executor.map(check, urls):
+                if outcome is not None:
+                    if keep_results:
+                        results[url] = outcome
+                elif reason is not None:
+                    fallback[url] = reason
+    finally:
+        for engine in engines:
+            engine.close()
+    return results, fallback
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+import events
+import profiling
+from http_engine import HTTP_TIMEOUT, HTTP_WORKERS, parse_html
+from preflight import tls_verify
+
+# Defaults, overridable in config.json: a URL whose last full login passed is
+# only re-verified (fetched and fingerprinted) until full_check_every runs
+# have passed or its last full login is incremental_max_age seconds old
+FULL_CHECK_EVERY = 10
+INCREMENTAL_MAX_AGE = 86400
+
+# Bytes of the login page read to fingerprint its form structure
+FINGERPRINT_BYTES = 512 * 1024
+
+# Parts of the raw HTML that make up the form fingerprint. Values are left out
+# so per-request CSRF tokens don't change it; script and stylesheet URLs are
+# kept so a redeployed app whose bundles are content-hashed does.
+FIELD_TAGS = {"input", "button", "select", "textarea"}
+ASSET_TAGS = {"script": "src", "link": "href"}
+
+def form_signature(html):
+    """Hash of the structure of a page's forms, fields and asset URLs"""
+    parts = []
+    for node in parse_html(html).iter():
+        if node.tag == "form":
+            parts.append(["form", node.attrs.get("action", ""), node.attrs.get("method", "").lower()])
+        elif node.tag in FIELD_TAGS:
+            parts.append([node.tag, node.attrs.get("type", ""), node.attrs.get("name", ""),
+                          node.attrs.get("id", "")])
+        elif node.tag in ASSET_TAGS and node.attrs.get(ASSET_TAGS[node.tag]):
+            parts.append([node.tag, node.attrs[ASSET_TAGS[node.tag]]])
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()[:16]
+
+def page_fingerprint(response, body):
+    """The page's ETag or Last-Modified validator if it sends one, else its form signature"""
+    if response.headers.get("etag"):
+        return "etag:" + response.headers["etag"]
+    if response.headers.get("last-modified"):
+        return "modified:" + response.headers["last-modified"]
+    return "form:" + form_signature(body.decode(response.encoding or "utf-8", "replace"))
+
+class IncrementalRun:
+    """Decides which URLs need a full login this run and keeps their fingerprints
+
+    triage() fetches each URL once, conditionally when validators are known,
+    and verifies those whose last full login passed recently and whose
+    fingerprint hasn't changed. record() stores the fingerprint with each
+    result as it comes in, whichever stage produced it.
+    """
+
+    def __init__(self, store, config):
+        self.store = store
+        self.full_every = config.get('full_check_every', FULL_CHECK_EVERY)
+        self.max_age = config.get('incremental_max_age', INCREMENTAL_MAX_AGE)
+        self.timeout = config.get('http_timeout', HTTP_TIMEOUT)
+        self.workers = config.get('http_workers', HTTP_WORKERS)
+        # url -> (fingerprint, etag, last_modified) seen this run
+        self.seen = {}
+        self.lock = threading.Lock()
+
+    def full_check_reason(self, state, fingerprint):
+        """Why a URL needs a full login this run, or None if verifying its page is enough"""
+        if state is None:
+            return "no fingerprint yet"
+        if state['verdict'] != 'success':
+            return f"last full check was {state['verdict']}"
+        if state['runs_since_full'] + 1 >= self.full_every:
+            return f"full check due (every {self.full_every} runs)"
+        if time.time() - state['full_ts'] >= self.max_age:
+            return f"last full check older than {self.max_age:g}s"
+        if fingerprint is None:
+            return "page could not be fingerprinted"
+        if fingerprint != state['fingerprint']:
+            return "login page changed"
+        return None
+
+    def fetch(self, client, url, state, budget):
+        """(fingerprint, etag, last_modified, error) of a URL's login page"""
+        headers = {}
+        if state and state['etag']:
+            headers["If-None-Match"] = state['etag']
+        if state and state['last_modified']:
+            headers["If-Modified-Since"] = state['last_modified']
+        timeout = budget.deadline().cap(self.timeout) if budget else self.timeout
+        try:
+            with client.stream("GET", url, headers=headers, timeout=max(0.1, timeout)) as response:
+                if response.status_code == 304 and state:
+                    return state['fingerprint'], state['etag'], state['last_modified'], None
+                if response.status_code >= 400:
+                    return None, None, None, f"HTTP {response.status_code}"
+                body = bytearray()
+                for chunk in response.iter_bytes():
+                    body += chunk
+                    if len(body) >= FINGERPRINT_BYTES:
+                        break
+                return (page_fingerprint(response, bytes(body[:FINGERPRINT_BYTES])), response.headers.get("etag"),
+                        response.headers.get("last-modified"), None)
+        except httpx.HTTPError as e:
+            return None, None, None, str(e) or type(e).__name__
+
+    def triage(self, urls, on_verified, budget=None):
+        """Verify what can be verified without a login and return the URLs that need a full check
+
+        on_verified(url, outcome) is called for each URL verified by its
+        unchanged fingerprint, with outcome {'status', 'duration'}.
+        """
+        states = {url: self.store.fingerprint(url) for url in urls}
+        counts = {'verified': 0, 'full': 0}
+
+        def triage_url(client, url):
+            with profiling.profile_thread():
+                if budget is not None and budget.exhausted():
+                    return url, "run stopped before triage"
+                start = time.perf_counter()
+                fingerprint, etag, last_modified, error = self.fetch(client, url, states[url], budget)
+                with self.lock:
+                    self.seen[url] = (fingerprint, etag, last_modified)
+                reason = self.full_check_reason(states[url], fingerprint)
+                if error and reason is None:
+                    reason = f"page fetch failed: {error}"
+                if reason is None:
+                    on_verified(url, {'status': "Success", 'duration': time.perf_counter() - start})
+                return url, reason
+
+        full = []
+        with httpx.Client(follow_redirects=True, verify=tls_verify(), headers={"Accept": "text/html"}) as client:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(urls)))) as executor:
+                for url, reason in executor.map(lambda url: triage_url(client, url), urls):
+                    if reason is None:
+                        counts['verified'] += 1
+                        continue
+                    counts['full'] += 1
+                    full.append(url)
+                    events.emit('incremental', url=url, full_check=True, reason=reason)
+        print(f"Incremental: {counts['verified']} URL(s) verified unchanged, {counts['full']} need a full check")
+        return full
+
+    def record(self, record):
+        """Store the fingerprint and outcome of a finished URL"""
+        url = record['url']
+        with self.lock:
+            seen = self.seen.get(url)
+        if record['verdict'] == 'skipped':
+            return
+        if seen is None:
+            # Failed before triage (e.g. unreachable in pre-flight): force a full check next time
+            if record['verdict'] != 'success':
+                self.store.forget_fingerprint(url)
+            return
+        if record['engine'] == 'incremental':
+            self.store.count_verified_run(url)
+        else:
+            self.store.save_fingerprint(url, *seen, verdict=record['verdict'])
+
+def open_incremental(config, store):
+    """An IncrementalRun if incremental is on in config.json, else None
+
+    Fingerprints live in the result history, so incremental mode needs it.
+    """
+    if not config.get('incremental', False):
+        return None
+    if store is None:
+        print("Warning: incremental mode needs the result history (history_db); checking every URL in full")
+        return None
+    return IncrementalRun(store, config)
@@ -1,3 +1,6 @@
+import time
+_IMPORT_START = time.perf_counter()
+
 from selenium import webdriver
 from selenium.webdriver.edge.service import Service
 from selenium.webdriver.edge.options import Options
@@ -5,34 +8,458 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 import sys
-import time
 import json
+import queue
+import re
+import signal
+import threading
+import argparse
+from urllib.parse import urlsplit
+from preflight import PREFLIGHT_CONCURRENCY, PREFLIGHT_TIMEOUT, dedupe_urls, run_preflight
+from http_engine import HTTP_TIMEOUT, HTTP_WORKERS, HttpLoginEngine, run_http_checks
+from driver_cache import DriverCache
+from metrics import METRICS_FORMATS, PAGE_METRICS, PHASES, MetricsSink, PhaseTimer
+from result_store import COMPACT_INTERVAL, DAILY_DAYS, HOURLY_DAYS, RAW_DAYS, open_store
+import events
+import profiling
+import screenshots
+from selector_profiles import get_profiles
+from deadlines import SKIPPED_CANCELLED, DeadlineExceeded, RunBudget, budget_from_config
+import browser_memory
+from report_sinks import ReportWriter, open_reports, parse_report_args
+from incremental import open_incremental
+from retry_policy import (PAGE_LOAD_TIMEOUT_STATUS, RETRY_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+                          backoff_delay, get_breakers, is_transient)
+
+# Time spent importing this module's dependencies, reported in the startup timing
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
 
 # Load environment variables
 load_dotenv()
 
+CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+
+# Serialize driver resolution so parallel workers don't race on the cache or download
+_driver_install_lock = threading.Lock()
+
+# Execution modes: "fast" waits on page conditions, "demo" adds the fixed
+# delay_seconds pause between actions so a run can be followed on screen
+EXECUTION_MODES = ("fast", "demo")
+
+# Engines: "auto" tries the browserless HTTP engine first and falls back to
+# Selenium for pages that need JavaScript, "selenium" always uses the browser
+ENGINES = ("auto", "selenium")
+
+# Isolation between checks on the same browser: "reset" clears cookies, storage
+# and cache and closes extra windows, "context" moves to a fresh browser context,
+# "relaunch" starts a new browser, "none" keeps all state
+ISOLATION_MODES = ("reset", "context", "relaunch", "none")
+
+def extension_patterns(*extensions):
+    """Blocked-URL patterns for files with these extensions, with or without a query string
+
+    Network.setBlockedURLs matches patterns against the whole URL, host
+    included, so the extension is anchored to the end of the path: "*.png*"
+    would also block every page of https://www.pngwing.com/.
+    """
+    return [pattern for extension in extensions for pattern in (f"*.{extension}", f"*.{extension}?*")]
+
+def url_matches(url, pattern):
+    """True if a blocked-URL pattern matches url; like the DevTools protocol, only * is a wildcard"""
+    return re.fullmatch(".*".join(re.escape(part) for part in pattern.split("*")), url) is not None
+
+# Page load profiles. Blocked resources are matched by URL pattern through the
+# DevTools protocol; block_types expand to the file extensions in
+# RESOURCE_TYPE_PATTERNS. ready_state is how far the document must load before
+# the form is looked for. More profiles can be added under load_profiles in
+# config.json and picked per URL or origin with url_load_profiles.
+LOAD_PROFILES = {
+    'full': {'block_types': [], 'block_patterns': [], 'ready_state': "complete"},
+    'lean': {
+        'block_types': ["image", "font", "media"],
+        'block_patterns': ["*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+                           "*facebook.net*", "*hotjar.com*", "*clarity.ms*"],
+        'ready_state': "interactive"
+    },
+}
+RESOURCE_TYPE_PATTERNS = {
+    'image': extension_patterns("png", "jpg", "jpeg", "gif", "webp", "avif", "bmp", "ico", "svg"),
+    'font': extension_patterns("woff", "woff2", "ttf", "otf", "eot"),
+    'media': extension_patterns("mp4", "webm", "ogg", "ogv", "mp3", "wav", "m4a", "mov"),
+}
+
+# Fast mode wait settings (seconds). Every wait is also cut short by the
+# check's deadline (url_timeout and run_budget in config.json)
+PAGE_LOAD_TIMEOUT = 30
+NAVIGATION_WAIT = 2
+VERDICT_TIMEOUT = 10
+NETWORK_IDLE_TIMEOUT = 10
+NETWORK_QUIET_SECONDS = 0.5
+POLL_INTERVAL = 0.1
+
+# Seconds a cancelled check gets to stop on its own (every wait polls for the
+# cancel) before its browser is killed to break off a blocking driver command
+# such as a page load
+CANCEL_INTERRUPT_DELAY = 0.5
+
+# A browser session is recycled (relaunched between two checks) after this many
+# checks, or once its process tree's resident memory passes this many MB.
+# Overridable with recycle_after_checks and recycle_rss_mb; 0 turns either off.
+RECYCLE_AFTER_CHECKS = 200
+RECYCLE_RSS_MB = 1500
+
+# Counts in-flight XHR/fetch requests so network idle can be detected after submit
+NETWORK_TRACKER_SCRIPT = """
+if (!window.__loginCheckerTracking) {
+    window.__loginCheckerTracking = true;
+    window.__loginCheckerPending = 0;
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        window.__loginCheckerPending++;
+        this.addEventListener('loadend', function() { window.__loginCheckerPending--; });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function() {
+            window.__loginCheckerPending++;
+            return fetch.apply(this, arguments).finally(function() { window.__loginCheckerPending--; });
+        };
+    }
+}
+// Where the submit starts, so the page timing taken after it only counts what the submit loaded
+return {origin: performance.timeOrigin, now: performance.now()};
+"""
+
+# Collects the Navigation Timing of the current document and its slowest
+# Resource Timing entries in one call, in seconds. Given the mark returned by
+# NETWORK_TRACKER_SCRIPT it reports only what loaded after the mark: the new
+# document if the submit navigated, otherwise just the requests it made.
+# Events that haven't happened yet (e.g. load) are null.
+PAGE_TIMING_SCRIPT = """
+var mark = arguments[0], slowest = arguments[1];
+var seconds = function(ms) { return ms / 1000; };
+var after = function(ms) { return ms > 0 ? ms / 1000 : null; };
+var sameDocument = mark && mark.origin === performance.timeOrigin;
+var navigation = null;
+var entry = sameDocument ? null : performance.getEntriesByType('navigation')[0];
+if (entry) {
+    navigation = {
+        url: entry.name,
+        redirect: seconds(entry.redirectEnd - entry.redirectStart),
+        dns: seconds(entry.domainLookupEnd - entry.domainLookupStart),
+        connect: seconds(entry.connectEnd - entry.connectStart),
+        tls: entry.secureConnectionStart > 0 ? seconds(entry.connectEnd - entry.secureConnectionStart) : null,
+        ttfb: after(entry.responseStart),
+        server: seconds(entry.responseStart - entry.requestStart),
+        download: seconds(entry.responseEnd - entry.responseStart),
+        dom_content_loaded: after(entry.domContentLoadedEventEnd),
+        load: after(entry.loadEventEnd),
+        transfer_size: entry.transferSize
+    };
+}
+var since = sameDocument ? mark.now : 0;
+var resources = performance.getEntriesByType('resource').filter(function(r) { return r.startTime >= since; });
+var transfer = resources.reduce(function(total, r) { return total + (r.transferSize || 0); }, 0);
+resources.sort(function(a, b) { return b.duration - a.duration; });
+return {
+    navigation: navigation,
+    resources: resources.length,
+    transfer_size: transfer,
+    slowest: resources.slice(0, slowest).map(function(r) {
+        return {url: r.name, type: r.initiatorType, start: seconds(r.startTime - since),
+                duration: seconds(r.duration), size: r.transferSize};
+    })
+};
+"""
+# Slowest resources kept per page timing capture (slowest_resources in config.json)
+SLOWEST_RESOURCES = 5
+
+# Candidate locators for the login form, tried in order until one matches a
+# visible, enabled element. The locator that worked for a URL is remembered in
+# its selector profile and tried first next time.
+USERNAME_LOCATORS = [
+    (By.NAME, "username"),
+    (By.ID, "username"),
+    (By.CSS_SELECTOR, "input[autocomplete='username']"),
+    (By.NAME, "email"),
+    (By.CSS_SELECTOR, "input[type='email']"),
+    (By.NAME, "login"),
+    (By.NAME, "user"),
+    (By.NAME, "loginfmt"),
+]
+PASSWORD_LOCATORS = [
+    (By.NAME, "password"),
+    (By.ID, "password"),
+    (By.CSS_SELECTOR, "input[autocomplete='current-password']"),
+    (By.CSS_SELECTOR, "input[type='password']"),
+]
+SUBMIT_LOCATORS = [
+    (By.CSS_SELECTOR, "button[type='submit']"),
+    (By.CSS_SELECTOR, "input[type='submit']"),
+    (By.XPATH, "//button[contains(text(), 'Sign in')]"),
+    (By.XPATH, "//button[contains(text(), 'Log in')]"),
+    (By.XPATH, "//button[contains(text(), 'Login')]"),
+]
+
+# Common error message selectors, checked in order
+ERROR_SELECTORS = [
+    # Modal dialogs
+    (By.CLASS_NAME, "modal-body"),
+    (By.CLASS_NAME, "modal-content"),
+    (By.CLASS_NAME, "modal-header"),
+    (By.CLASS_NAME, "modal-dialog"),
+    # Alert/Error messages
+    (By.CLASS_NAME, "alert"),
+    (By.CLASS_NAME, "error-message"),
+    (By.CLASS_NAME, "alert-danger"),
+    (By.CLASS_NAME, "alert-error"),
+    (By.CLASS_NAME, "error"),
+    (By.CLASS_NAME, "validation-error"),
+    # Common error containers
+    (By.CLASS_NAME, "error-container"),
+    (By.CLASS_NAME, "message-error"),
+    (By.CLASS_NAME, "error-summary"),
+    # Error text elements
+    (By.CLASS_NAME, "error-text"),
+    (By.CLASS_NAME, "help-block"),
+    (By.CLASS_NAME, "invalid-feedback"),
+    # Specific error messages
+    (By.XPATH, "//*[contains(@class, 'error')]"),
+    (By.XPATH, "//*[contains(@class, 'alert')]"),
+    (By.XPATH, "//*[contains(@class, 'modal')]"),
+    # Dialog boxes
+    (By.XPATH, "//div[@role='dialog']"),
+    (By.XPATH, "//div[@role='alert']"),
+    # Common modal title locations
+    (By.XPATH, "//h4[contains(@class, 'modal-title')]"),
+    (By.XPATH, "//h5[contains(@class, 'modal-title')]"),
+    # Generic error messages
+    (By.XPATH, "//*[contains(text(), 'error')]"),
+    (By.XPATH, "//*[contains(text(), 'Error')]"),
+    (By.XPATH, "//*[contains(text(), 'failed')]"),
+    (By.XPATH, "//*[contains(text(), 'Failed')]"),
+    (By.XPATH, "//*[contains(text(), 'invalid')]"),
+    (By.XPATH, "//*[contains(text(), 'Invalid')]")
+]
+
+# Visible text must contain one of these to count as an error message
+ERROR_KEYWORDS = ['error', 'invalid', 'failed', 'incorrect']
+
+# Success indicators, checked in order
+SUCCESS_SELECTORS = [
+    (By.CLASS_NAME, "dashboard"),
+    (By.CLASS_NAME, "welcome-message"),
+    (By.CLASS_NAME, "user-profile"),
+    (By.CLASS_NAME, "logged-in"),
+    (By.CLASS_NAME, "dashboard-container"),
+    (By.CLASS_NAME, "user-dashboard"),
+    (By.XPATH, "//*[contains(@class, 'dashboard')]"),
+    (By.XPATH, "//*[contains(@class, 'welcome')]"),
+    (By.XPATH, "//div[contains(text(), 'Welcome')]"),
+    # Add more success indicators as needed
+]
+
+# Returns the index of the first selector with an element present in the page, or -1.
+# Arguments: list of [kind, value] with kind "css" or "xpath"
+SUCCESS_SCAN_SCRIPT = """
+var selectors = arguments[0];
+for (var i = 0; i < selectors.length; i++) {
+    try {
+        if (selectors[i][0] === 'css') {
+            if (document.querySelector(selectors[i][1])) {
+                return i;
+            }
+        } else if (document.evaluate(selectors[i][1], document, null,
+                                     XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue) {
+            return i;
+        }
+    } catch (e) {
+        continue;
+    }
+}
+return -1;
+"""
+
+# Element lookup and visibility helpers shared by the page scripts below
+PAGE_SCRIPT_HELPERS = """
+function isVisible(el) {
+    if (el.checkVisibility) {
+        return el.checkVisibility({checkOpacity: true, checkVisibilityCSS: true});
+    }
+    var style = window.getComputedStyle(el);
+    if (style.visibility === 'hidden' || style.display === 'none' || style.opacity === '0') {
+        return false;
+    }
+    return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+}
+function find(kind, value) {
+    if (kind === 'css') {
+        return Array.prototype.slice.call(document.querySelectorAll(value));
+    }
+    var snapshot = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var nodes = [];
+    for (var i = 0; i < snapshot.snapshotLength; i++) {
+        nodes.push(snapshot.snapshotItem(i));
+    }
+    return nodes;
+}
+"""
+
+# Evaluates every error selector in the page and returns the visible matching texts.
+# Arguments: list of [kind, value] with kind "css" or "xpath", list of lowercase keywords
+ERROR_SCAN_SCRIPT = PAGE_SCRIPT_HELPERS + """
+var selectors = arguments[0], keywords = arguments[1];
+var seen = new Set(), matches = [];
+for (var i = 0; i < selectors.length; i++) {
+    var elements;
+    try {
+        elements = find(selectors[i][0], selectors[i][1]);
+    } catch (e) {
+        continue;
+    }
+    for (var j = 0; j < elements.length; j++) {
+        var el = elements[j];
+        if (!(el instanceof Element) || seen.has(el) || !isVisible(el)) {
+            continue;
+        }
+        seen.add(el);
+        var text = (el.innerText || '').trim();
+        var lower = text.toLowerCase();
+        if (text && keywords.some(function(keyword) { return lower.indexOf(keyword) !== -1; })) {
+            matches.push({selector: i, text: text});
+        }
+    }
+}
+return matches;
+"""
+
+# Returns [index, element] for the first selector matching a visible, enabled
+# element (what Selenium calls clickable), or null.
+# Arguments: list of [kind, value] with kind "css" or "xpath"
+FIELD_SCAN_SCRIPT = PAGE_SCRIPT_HELPERS + """
+var selectors = arguments[0];
+for (var i = 0; i < selectors.length; i++) {
+    var elements;
+    try {
+        elements = find(selectors[i][0], selectors[i][1]);
+    } catch (e) {
+        continue;
+    }
+    for (var j = 0; j < elements.length; j++) {
+        if (elements[j] instanceof Element && !elements[j].disabled && isVisible(elements[j])) {
+            return [i, elements[j]];
+        }
+    }
+}
+return null;
+"""
+
+NETWORK_STATE_SCRIPT = """
+return [document.readyState,
+        window.__loginCheckerPending || 0,
+        performance.getEntriesByType('resource').length];
+"""
+
+def selectors_for_script(selectors):
+    """Translate (By, value) locators into the [kind, value] pairs used by page scripts"""
+    script_selectors = []
+    for by, value in selectors:
+        if by == By.CLASS_NAME:
+            script_selectors.append(["css", f".{value}"])
+        elif by == By.CSS_SELECTOR:
+            script_selectors.append(["css", value])
+        elif by == By.ID:
+            script_selectors.append(["css", f"#{value}"])
+        elif by == By.NAME:
+            script_selectors.append(["css", f"[name='{value}']"])
+        elif by == By.XPATH:
+            script_selectors.append(["xpath", value])
+        else:
+            raise ValueError(f"Unsupported locator strategy for page scripts: {by}")
+    return script_selectors
+
+def load_config(config_file=CONFIG_FILE):
+    """Load configuration from config.json, creating a default one if missing"""
+    try:
+        with open(config_file, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        config = {
+            'use_gui': True,  # Preserve GUI setting
+            'delay_seconds': 3,
+            'execution_mode': 'fast',
+            'max_workers': 1,
+            'preflight': True,
+            'engine': 'auto',
+            'credentials': {
+                'username': '',
+                'password': ''
+            },
+            'urls': []
+        }
+        # Only create a new config file if one doesn't exist
+        with open(config_file, 'w') as f:
+            json.dump(config, f, indent=4)
+        return config
+
+class FormNotFound(Exception):
+    """A login form field never appeared on the page; the message is the field"""
+
+# What check_login reports for a FormNotFound. The page loaded, so this is
+# neither retried nor counted against the host like a page load timeout
+FORM_NOT_FOUND_STATUS = "Login Failed - login form not found"
+
 class LoginChecker:
     def __init__(self):
         # Set config file path
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        self.config_file = os.path.join(script_dir, "config.json")
+        self.config_file = CONFIG_FILE
         
         # Load configuration
         self.load_config()
+        self.startup_timings = {'imports': IMPORT_SECONDS}
         self.setup_driver()
         
-        # Get credentials from config
+        # Origins the browser has stored state for since the last reset
+        self.visited_origins = set()
+        self.browser_context = None
+        self.dirty = False
+        self.blocked_patterns = None
+        # Unlimited until check_login sets the deadline of the check it runs
+        self.deadline = RunBudget(url_timeout=0).deadline()
+        # Memory watchdog: checks on the current browser, checks overall, recycles,
+        # and the last and peak memory samples of the browser's process tree
+        self.session_checks = 0
+        self.total_checks = 0
+        self.recycles = 0
+        self.memory = None
+        self.peak_rss_mb = 0
+        # Set while a check runs, and once a cancel has killed the browser under it
+        self.busy = False
+        self.interrupted = False
+        
+    def apply_config(self):
+        """Read credentials and execution mode from the loaded config"""
         self.username = self.config.get('credentials', {}).get('username', '')
         self.password = self.config.get('credentials', {}).get('password', '')
         
         if not self.username or not self.password:
             print("Warning: Credentials not set in config. Please set them in config.json.")
         
+        self.execution_mode = self.config.get('execution_mode', 'fast')
+        if self.execution_mode not in EXECUTION_MODES:
+            print(f"Warning: Unknown execution_mode '{self.execution_mode}', using 'fast'")
+            self.execution_mode = 'fast'
+        
+        self.isolation = self.config.get('isolation', 'reset')
+        if self.isolation not in ISOLATION_MODES:
+            print(f"Warning: Unknown isolation '{self.isolation}', using 'reset'")
+            self.isolation = 'reset'
+        
     def setup_driver(self):
         """Setup Edge driver with appropriate options"""
         try:
@@ -41,14 +468,24 @@ class LoginChecker:
             edge_options.add_argument("--no-sandbox")
             edge_options.add_argument("--disable-dev-shm-usage")
             edge_options.add_argument("--disable-gpu")
+            # Return from driver.get at DOMContentLoaded; each load profile then
+            # waits for as much of the page as it needs
+            edge_options.page_load_strategy = self.config.get('page_load_strategy', 'eager')
             
-            # Install Edge WebDriver using webdriver_manager
-            driver_path = EdgeChromiumDriverManager().install()
+            # Use the cached driver for this Edge version; only a cache miss hits the network
+            start = time.perf_counter()
+            with _driver_install_lock:
+                driver_path = DriverCache(self.config.get('driver_cache_dir')).resolve()
+            self.startup_timings['driver_resolution'] = time.perf_counter() - start
             service = Service(driver_path)
             
             # Create the WebDriver instance
+            start = time.perf_counter()
             self.driver = webdriver.Edge(service=service, options=edge_options)
-            self.driver.implicitly_wait(10)
+            self.startup_timings['browser_launch'] = time.perf_counter() - start
+            # No implicit wait: every lookup uses an explicit wait or a page script so
+            # a missing element never blocks longer than the caller's own deadline
+            self.driver.implicitly_wait(0)
             
         except Exception as e:
             print(f"Error setting up Edge driver: {str(e)}")
@@ -56,188 +493,1092 @@ class LoginChecker:
             print("Edge should be installed by default on Windows 10/11.")
             sys.exit(1)
 
+    def relaunch(self):
+        """Quit the browser and start a new one"""
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        self.setup_driver()
+        self.browser_context = None
+        self.blocked_patterns = None
+        self.session_checks = 0
+        self.memory = None
+        self.interrupted = False
+
+    def interrupt(self):
+        """Kill the browser from another thread to stop a check blocked in a driver command
+
+        The driver runs one command at a time, so a page load can't be stopped
+        by sending it another; ending the driver and browser processes makes
+        the blocked call fail at once. The next check relaunches the browser.
+        """
+        if not self.busy:
+            return
+        try:
+            root = self.driver.service.process.pid
+        except AttributeError:
+            return
+        print("Stopping the browser to break off the cancelled check")
+        self.interrupted = True
+        for pid in reversed(browser_memory.tree_pids(root)):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def sample_memory(self):
+        """Measure the browser's process tree (driver, browser, renderers, GPU) and track the peak"""
+        try:
+            pid = self.driver.service.process.pid
+        except AttributeError:
+            return None
+        self.memory = browser_memory.sample_tree(pid)
+        if self.memory:
+            self.peak_rss_mb = max(self.peak_rss_mb, self.memory['rss_mb'])
+        return self.memory
+
+    def recycle_reason(self):
+        """Why the browser should be relaunched before the next check, or None"""
+        if self.interrupted:
+            return "a cancel stopped it"
+        max_checks = self.config.get('recycle_after_checks', RECYCLE_AFTER_CHECKS)
+        max_rss = self.config.get('recycle_rss_mb', RECYCLE_RSS_MB)
+        if max_checks and self.session_checks >= max_checks:
+            return f"{self.session_checks} checks"
+        if max_rss and self.memory and self.memory['rss_mb'] >= max_rss:
+            return f"{self.memory['rss_mb']:.0f} MB RSS across {self.memory['processes']} processes"
+        return None
+
+    def recycle(self, reason):
+        """Replace the browser with a fresh one, releasing whatever memory it had built up"""
+        print(f"Recycling browser session after {reason}")
+        events.emit('recycle', reason=reason, checks=self.session_checks,
+                    rss_mb=self.memory['rss_mb'] if self.memory else None)
+        self.relaunch()
+        self.visited_origins.clear()
+        self.dirty = False
+        self.recycles += 1
+
+    def session_stats(self):
+        """Checks, recycles and memory of this session, for sizing how many workers fit on a box"""
+        return {
+            'checks': self.total_checks,
+            'recycles': self.recycles,
+            'rss_mb': self.memory['rss_mb'] if self.memory else None,
+            'peak_rss_mb': self.peak_rss_mb or None,
+            'processes': self.memory['processes'] if self.memory else None
+        }
+
+    def close_extra_windows(self):
+        """Close every window except the first, e.g. popups opened by a login page"""
+        handles = self.driver.window_handles
+        for handle in handles[1:]:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        self.driver.switch_to.window(handles[0])
+
+    def switch_to_fresh_context(self):
+        """Move to a tab in a new, empty browser context and dispose of the previous one"""
+        old_handle = self.driver.current_window_handle
+        context_id = self.driver.execute_cdp_cmd("Target.createBrowserContext", {})['browserContextId']
+        target_id = self.driver.execute_cdp_cmd(
+            "Target.createTarget", {'url': "about:blank", 'browserContextId': context_id}
+        )['targetId']
+        # The driver's window handles are the browser's target ids
+        self.driver.switch_to.window(old_handle)
+        self.driver.close()
+        self.driver.switch_to.window(target_id)
+        if self.browser_context is not None:
+            self.driver.execute_cdp_cmd("Target.disposeBrowserContext", {'browserContextId': self.browser_context})
+        self.browser_context = context_id
+
+    def reset_state(self):
+        """Give the next check a clean browser without the cost of relaunching it
+
+        Falls back to a relaunch if the browser can't be reset.
+        """
+        if self.isolation == 'none':
+            return
+        if self.isolation == 'relaunch':
+            self.relaunch()
+            self.visited_origins.clear()
+            self.dirty = False
+            return
+        try:
+            # Web storage can only be cleared from a page of its own origin
+            try:
+                self.driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+            except WebDriverException:
+                pass
+            self.close_extra_windows()
+            if self.isolation == 'context':
+                self.switch_to_fresh_context()
+                # Blocking is set per tab, and the new one has none yet
+                self.blocked_patterns = None
+            else:
+                self.driver.get("about:blank")
+                self.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+                self.driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+                for origin in self.visited_origins:
+                    self.driver.execute_cdp_cmd("Storage.clearDataForOrigin",
+                                                {'origin': origin, 'storageTypes': "all"})
+        except WebDriverException as e:
+            print(f"Could not reset browser state ({e.msg}), relaunching")
+            self.relaunch()
+        self.visited_origins.clear()
+        self.dirty = False
+
     def load_config(self):
         """Load configuration from config.json"""
+        self.config = load_config(self.config_file)
+        self.apply_config()
+
+    def pace(self):
+        """Pause between actions in demo mode so the run can be followed on screen"""
+        if self.execution_mode == 'demo':
+            self.deadline.sleep(self.config['delay_seconds'])
+
+    def wait_until(self, condition, timeout):
+        """WebDriverWait.until, capped by the check's deadline and stopped by cancellation"""
+        def check(driver):
+            self.deadline.check()
+            return condition(driver)
+        return WebDriverWait(self.driver, self.deadline.cap(timeout), poll_frequency=POLL_INTERVAL).until(check)
+
+    def wait_for_document_ready(self, timeout=10, ready_state="complete"):
+        """Wait until the current document is interactive or has finished loading"""
+        states = ("interactive", "complete") if ready_state == "interactive" else ("complete",)
+        self.wait_until(lambda driver: driver.execute_script("return document.readyState") in states, timeout)
+
+    def page_loaded(self):
+        """True if the current document has finished loading"""
         try:
-            with open(self.config_file, 'r') as f:
-                self.config = json.load(f)
-        except FileNotFoundError:
-            self.config = {
-                'use_gui': True,  # Preserve GUI setting
-                'delay_seconds': 3,
-                'credentials': {
-                    'username': '',
-                    'password': ''
-                },
-                'urls': []
-            }
-            # Only create a new config file if one doesn't exist
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=4)
+            return self.driver.execute_script("return document.readyState") == "complete"
+        except WebDriverException:
+            return False
+
+    def load_profile_for(self, url):
+        """Return (name, profile) of the load profile configured for a URL"""
+        profiles = {**LOAD_PROFILES, **self.config.get('load_profiles', {})}
+        per_url = self.config.get('url_load_profiles', {})
+        name = per_url.get(url) or per_url.get(origin_of(url)) or self.config.get('load_profile', 'lean')
+        if name not in profiles:
+            print(f"Warning: Unknown load profile '{name}', using 'full'")
+            name = 'full'
+        return name, profiles[name]
+
+    def apply_load_profile(self, profile, url=None):
+        """Block the profile's resources for the following page loads
+
+        Patterns that would block url itself are left out, so a broad custom
+        pattern can't fail the check by blocking the login page.
+        """
+        patterns = [pattern for resource_type in profile.get('block_types', [])
+                    for pattern in RESOURCE_TYPE_PATTERNS.get(resource_type, [])]
+        patterns += profile.get('block_patterns', [])
+        if url:
+            blocking_page = [pattern for pattern in patterns if url_matches(url, pattern)]
+            if blocking_page:
+                print(f"Warning: Not blocking {', '.join(blocking_page)}, which would block {url} itself")
+                patterns = [pattern for pattern in patterns if pattern not in blocking_page]
+        if patterns == self.blocked_patterns:
+            return
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {'urls': patterns})
+            self.blocked_patterns = patterns
+        except WebDriverException as e:
+            # Blocking is an optimization; the check still works without it
+            print(f"Could not apply load profile ({e.msg})")
+
+    def wait_for_navigation(self, old_page, old_url, timeout=NAVIGATION_WAIT):
+        """Wait for the page to navigate or start a request after submit
+
+        Returns False if nothing happened within the timeout, which is normal
+        for pages that validate the form without talking to the server.
+        """
+        def page_changed(driver):
+            if driver.current_url != old_url:
+                return True
+            if EC.staleness_of(old_page)(driver):
+                return True
+            return (driver.execute_script("return window.__loginCheckerPending || 0") or 0) > 0
+
+        try:
+            self.wait_until(page_changed, timeout)
+            return True
+        except TimeoutException:
+            return False
+
+    def wait_for_network_idle(self, timeout=NETWORK_IDLE_TIMEOUT, quiet_seconds=NETWORK_QUIET_SECONDS):
+        """Wait until the document is loaded and no requests have started for quiet_seconds"""
+        deadline = time.monotonic() + self.deadline.cap(timeout)
+        last_count = None
+        quiet_since = None
+        while time.monotonic() < deadline:
+            self.deadline.check()
+            try:
+                ready_state, pending, resource_count = self.driver.execute_script(NETWORK_STATE_SCRIPT)
+            except WebDriverException:
+                # Scripts can fail while a navigation is in progress
+                ready_state, pending, resource_count = None, None, None
+            
+            now = time.monotonic()
+            if ready_state == "complete" and pending == 0 and resource_count == last_count:
+                if quiet_since is None:
+                    quiet_since = now
+                elif now - quiet_since >= quiet_seconds:
+                    return True
+            else:
+                quiet_since = None
+            last_count = resource_count
+            self.deadline.sleep(POLL_INTERVAL)
+        return False
+
+    def scan_errors(self, selectors=ERROR_SELECTORS):
+        """Find visible error messages for all selectors in one round trip
+
+        Returns a list of {'selector': (By, value), 'text': str} in selector order.
+        """
+        matches = self.driver.execute_script(
+            ERROR_SCAN_SCRIPT, selectors_for_script(selectors), ERROR_KEYWORDS
+        ) or []
+        return [{'selector': selectors[match['selector']], 'text': match['text']} for match in matches]
+
+    def find_success_indicator(self, selectors=SUCCESS_SELECTORS):
+        """Return the first success selector present in the page, or None"""
+        index = self.driver.execute_script(SUCCESS_SCAN_SCRIPT, selectors_for_script(selectors))
+        if index is None or index < 0:
+            return None
+        return selectors[index]
+
+    def locate(self, field, candidates, profile, learned, timeout=10):
+        """Wait for the first candidate locator matching a usable element and return the element
+
+        The locator in the URL's selector profile is tried first, so a known
+        site needs a single lookup. The locator that matched is recorded in
+        learned. The field is dropped from the profile only when the page
+        finished loading and still nothing matched, not when a slow page or
+        the check's deadline cut the wait short.
+
+        Raises FormNotFound if nothing matched before the timeout, or
+        TimeoutException if the check's deadline ran out first.
+        """
+        known = profile.get(field)
+        ordered = [known] + [locator for locator in candidates if locator != known] if known else candidates
+        try:
+            index, element = self.wait_until(
+                lambda driver: driver.execute_script(FIELD_SCAN_SCRIPT, selectors_for_script(ordered)), timeout
+            )
+        except TimeoutException:
+            if self.deadline.expired():
+                raise
+            if known and self.page_loaded():
+                learned[field] = None
+            raise FormNotFound(field) from None
+        learned[field] = ordered[index]
+        return element
+
+    def wait_for_verdict(self, timeout=VERDICT_TIMEOUT, profile=None):
+        """Poll error and success indicators together under a single deadline
+
+        Errors always win: every poll scans all error selectors before any
+        success selector is accepted, so a success marker that stays on an
+        error page can't turn it into a pass. Selectors from the URL's selector
+        profile are tried first within each side. Returns ('error', text,
+        selector), ('success', None, selector) or (None, None, None) if neither
+        side matched before the deadline.
+        """
+        profile = profile or {}
+        known_errors = profile.get('errors', [])
+        known_success = [profile['success']] if profile.get('success') else []
+        deadline = time.monotonic() + self.deadline.cap(timeout)
+        while True:
+            self.deadline.check()
+            try:
+                self.timer.start('error_scan')
+                errors = self.scan_errors(known_errors) if known_errors else []
+                if not errors:
+                    errors = self.scan_errors()
+                if errors:
+                    return 'error', errors[0]['text'], errors[0]['selector']
+                self.timer.start('success_wait')
+                success = self.find_success_indicator(known_success) if known_success else None
+                success = success or self.find_success_indicator()
+                if success:
+                    return 'success', None, success
+            except WebDriverException:
+                # The page may still be navigating; try again on the next poll
+                pass
+            if time.monotonic() >= deadline:
+                return None, None, None
+            self.deadline.sleep(POLL_INTERVAL)
+
+    def capture_page_timing(self, name, mark=None):
+        """Record the page's Navigation and Resource Timing under name in self.page_timing
 
-    def check_login(self, url):
-        """Attempt to login to a given URL and return the result"""
+        Skipped if page_timing is false in config.json; a page that can't
+        report its timing just leaves the entry out.
+        """
+        if not self.config.get('page_timing', True):
+            return
+        try:
+            timing = self.driver.execute_script(PAGE_TIMING_SCRIPT, mark,
+                                                self.config.get('slowest_resources', SLOWEST_RESOURCES))
+        except WebDriverException:
+            return
+        if timing:
+            self.page_timing[name] = timing
+
+    def enter_phase(self, url, phase, timing=None):
+        """Report that a check has moved on to its next phase and start timing it
+
+        timing names the phase in the timing breakdown when it differs from the
+        reported phase.
+        """
+        events.emit('phase', url=url, phase=phase, engine='selenium')
+        self.timer.start(timing or phase)
+
+    def check_login(self, url, budget=None):
+        """Attempt to login to a given URL and return the result
+
+        Every wait is bounded by the check's deadline from budget (a RunBudget
+        shared by the run; one from config.json if not given). Connection
+        failures are retried with backoff within that deadline, and a host
+        whose circuit breaker is open fails fast without loading anything.
+        Per-phase timings of the check are left in self.phase_timings.
+        """
+        self.deadline = (budget or budget_from_config(self.config)).deadline()
+        self.last_screenshot = None
+        self.timer = PhaseTimer()
+        self.phase_timings = {}
+        self.page_timing = {}
+        breakers = get_breakers(self.config)
+        if breakers and not breakers.allow(url):
+            print(f"\nSkipping {url}: its host's circuit is open")
+            return breakers.unavailable_status(url)
+        
+        # A cancel stops every wait within a poll; a check still blocked in the
+        # browser (e.g. a page load) after CANCEL_INTERRUPT_DELAY is broken off
+        def on_cancel():
+            timer = threading.Timer(CANCEL_INTERRUPT_DELAY, self.interrupt)
+            timer.daemon = True
+            timer.start()
+        
+        status = None
+        self.busy = True
+        try:
+            with self.deadline.budget.on_cancel(on_cancel):
+                status = self.retry_login(url, self.config.get('retry_attempts', RETRY_ATTEMPTS))
+        finally:
+            self.busy = False
+            self.phase_timings = self.timer.result()
+            if breakers and status is not None:
+                breakers.record(url, status)
+        return status
+
+    def retry_login(self, url, retries):
+        """Try to log in, retrying connection failures up to retries times while the deadline allows"""
+        attempt = 0
+        while True:
+            status = self.attempt_login(url)
+            if self.interrupted and self.deadline.budget.cancelled.is_set():
+                return SKIPPED_CANCELLED
+            if not is_transient(status) or attempt >= retries:
+                return status
+            delay = backoff_delay(attempt, self.config.get('retry_base_delay', RETRY_BASE_DELAY),
+                                  self.config.get('retry_max_delay', RETRY_MAX_DELAY))
+            attempt += 1
+            print(f"Transient failure ({status}), retry {attempt} of {retries} in {delay:.1f}s")
+            events.emit('retry', url=url, attempt=attempt, delay=delay, status=status)
+            self.timer.start('backoff')
+            try:
+                self.deadline.sleep(delay)
+            except DeadlineExceeded:
+                # No time left for another try; report the failure we have
+                return status
+
+    def attempt_login(self, url):
+        """One try at logging in to url, within the deadline and timer check_login set up"""
+        self.last_screenshot = None
+        self.page_timing = {}
+        profiles = get_profiles(self.config)
+        known = profiles.get(url) if profiles else {}
+        learned = {}
         try:
             print(f"\nTesting login for: {url}")
-            print(f"Using delay of {self.config['delay_seconds']} seconds between actions")
+            if self.execution_mode == 'demo':
+                print(f"Using delay of {self.config['delay_seconds']} seconds between actions")
+            else:
+                print("Using fast mode (waiting on page conditions)")
+            
+            # Swap a long-lived or bloated browser for a fresh one between checks;
+            # a new browser needs no reset either
+            reason = self.recycle_reason()
+            if reason:
+                self.enter_phase(url, 'recycle')
+                self.recycle(reason)
+            
+            # Don't let cookies or storage from the previous check leak into this one
+            if self.dirty:
+                self.enter_phase(url, 'reset')
+                self.reset_state()
             
             # Navigate to the URL
+            self.enter_phase(url, 'navigate')
+            profile_name, profile = self.load_profile_for(url)
+            print(f"Using load profile: {profile_name}")
+            self.apply_load_profile(profile, url)
+            self.dirty = True
+            self.visited_origins.add(origin_of(url))
+            start = time.perf_counter()
+            self.driver.set_page_load_timeout(max(1, self.deadline.cap(PAGE_LOAD_TIMEOUT)))
             self.driver.get(url)
-            time.sleep(self.config['delay_seconds'])  # Configurable delay
+            self.startup_timings.setdefault('first_navigation', time.perf_counter() - start)
+            self.wait_for_document_ready(ready_state=profile.get('ready_state', "complete"))
+            self.capture_page_timing('login_page')
+            self.pace()
             
-            # Wait for username field to be present (adjust selector based on actual page)
+            # Wait for the username field to be interactable
+            self.enter_phase(url, 'locate_username')
             print("Looking for username field...")
-            username_field = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.NAME, "username"))
-            )
-            time.sleep(self.config['delay_seconds'])  # Configurable delay
+            username_field = self.locate('username', USERNAME_LOCATORS, known, learned)
+            self.pace()
             
+            self.enter_phase(url, 'locate_password')
             print("Looking for password field...")
-            password_field = self.driver.find_element(By.NAME, "password")
-            time.sleep(self.config['delay_seconds'])  # Configurable delay
+            password_field = self.locate('password', PASSWORD_LOCATORS, known, learned)
+            self.pace()
             
             # Fill in the credentials
+            self.enter_phase(url, 'fill')
             print("Filling in credentials...")
             username_field.send_keys(self.username)
-            time.sleep(self.config['delay_seconds'])  # Configurable delay
+            self.pace()
             password_field.send_keys(self.password)
-            time.sleep(self.config['delay_seconds'])  # Configurable delay
+            self.pace()
             
-            # Find and click login button (adjust selector based on actual page)
+            # Find and click the login button
+            self.enter_phase(url, 'submit')
             print("Attempting to click login button...")
-            login_button = self.driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
+            login_button = self.locate('submit', SUBMIT_LOCATORS, known, learned)
+            submit_mark = self.driver.execute_script(NETWORK_TRACKER_SCRIPT)
+            old_page = self.driver.find_element(By.TAG_NAME, "html")
+            old_url = self.driver.current_url
             login_button.click()
-            time.sleep(self.config['delay_seconds'])  # Configurable delay
-            
-            # Check for error messages first (common error message selectors)
-            error_selectors = [
-                # Modal dialogs
-                (By.CLASS_NAME, "modal-body"),
-                (By.CLASS_NAME, "modal-content"),
-                (By.CLASS_NAME, "modal-header"),
-                (By.CLASS_NAME, "modal-dialog"),
-                # Alert/Error messages
-                (By.CLASS_NAME, "alert"),
-                (By.CLASS_NAME, "error-message"),
-                (By.CLASS_NAME, "alert-danger"),
-                (By.CLASS_NAME, "alert-error"),
-                (By.CLASS_NAME, "error"),
-                (By.CLASS_NAME, "validation-error"),
-                # Common error containers
-                (By.CLASS_NAME, "error-container"),
-                (By.CLASS_NAME, "message-error"),
-                (By.CLASS_NAME, "error-summary"),
-                # Error text elements
-                (By.CLASS_NAME, "error-text"),
-                (By.CLASS_NAME, "help-block"),
-                (By.CLASS_NAME, "invalid-feedback"),
-                # Specific error messages
-                (By.XPATH, "//*[contains(@class, 'error')]"),
-                (By.XPATH, "//*[contains(@class, 'alert')]"),
-                (By.XPATH, "//*[contains(@class, 'modal')]"),
-                # Dialog boxes
-                (By.XPATH, "//div[@role='dialog']"),
-                (By.XPATH, "//div[@role='alert']"),
-                # Common modal title locations
-                (By.XPATH, "//h4[contains(@class, 'modal-title')]"),
-                (By.XPATH, "//h5[contains(@class, 'modal-title')]"),
-                # Generic error messages
-                (By.XPATH, "//*[contains(text(), 'error')]"),
-                (By.XPATH, "//*[contains(text(), 'Error')]"),
-                (By.XPATH, "//*[contains(text(), 'failed')]"),
-                (By.XPATH, "//*[contains(text(), 'Failed')]"),
-                (By.XPATH, "//*[contains(text(), 'invalid')]"),
-                (By.XPATH, "//*[contains(text(), 'Invalid')]")
-            ]
-            
-            # Check each error selector
-            for selector in error_selectors:
-                try:
-                    error_elements = self.driver.find_elements(*selector)
-                    for error_element in error_elements:
-                        try:
-                            if error_element.is_displayed():
-                                error_text = error_element.text.strip()
-                                if error_text and any(keyword in error_text.lower() for keyword in ['error', 'invalid', 'failed', 'incorrect']):
-                                    print(f"Found error message: {error_text}")
-                                    return f"Login Failed - {error_text}"
-                        except:
-                            continue
-                except:
-                    continue
-            
-            # If no error messages found, check for success indicators
-            try:
-                # Wait for successful login indicator (adjust based on your system)
-                print("Checking if login was successful...")
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "dashboard"))
-                )
+            
+            # Let the submit start navigating before judging the result
+            if self.execution_mode == 'demo':
+                self.pace()
+            else:
+                self.wait_for_navigation(old_page, old_url)
+            
+            # Poll error and success indicators together until one side matches
+            self.enter_phase(url, 'verdict', timing='error_scan')
+            print("Checking if login was successful...")
+            verdict, detail, selector = self.wait_for_verdict(self.config.get('verdict_timeout', VERDICT_TIMEOUT),
+                                                              known)
+            self.capture_page_timing('after_submit', submit_mark)
+            if verdict == 'error':
+                learned['errors'] = selector
+                print(f"Found error message: {detail}")
+                return f"Login Failed - {detail}"
+            if verdict == 'success':
+                learned['success'] = selector
                 return "Success"
-            except TimeoutException:
-                # Check for other success indicators if dashboard not found
-                success_selectors = [
-                    (By.CLASS_NAME, "welcome-message"),
-                    (By.CLASS_NAME, "user-profile"),
-                    (By.CLASS_NAME, "logged-in"),
-                    (By.CLASS_NAME, "dashboard-container"),
-                    (By.CLASS_NAME, "user-dashboard"),
-                    (By.XPATH, "//*[contains(@class, 'dashboard')]"),
-                    (By.XPATH, "//*[contains(@class, 'welcome')]"),
-                    (By.XPATH, "//div[contains(text(), 'Welcome')]"),
-                    # Add more success indicators as needed
-                ]
-                
-                for selector in success_selectors:
-                    try:
-                        WebDriverWait(self.driver, 3).until(
-                            EC.presence_of_element_located(selector)
-                        )
-                        return "Success"
-                    except TimeoutException:
-                        continue
-            
-                # Take screenshot if no success indicators found
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                screenshot_path = f"login_error_{timestamp}.png"
-                self.driver.save_screenshot(screenshot_path)
-                print(f"Saved error screenshot to: {screenshot_path}")
-                
-                return "Login Failed - Could not verify successful login"
             
+            # Take screenshot if no success indicators found, once the page has
+            # settled so it shows its final state
+            self.enter_phase(url, 'screenshot')
+            self.wait_for_network_idle(timeout=NETWORK_QUIET_SECONDS * 4)
+            self.last_screenshot = screenshots.capture(self.driver, url, self.config)
+            print(f"Saved error screenshot to: {self.last_screenshot}")
+            
+            return "Login Failed - Could not verify successful login"
+            
+        except DeadlineExceeded as e:
+            if self.deadline.budget.cancelled.is_set():
+                return str(e)
+            return f"Timeout - {e}"
+        except FormNotFound as e:
+            return f"{FORM_NOT_FOUND_STATUS} (no {e} field)"
         except TimeoutException:
-            return "Timeout - Site might be down or too slow"
+            # Left here only by the page load or the document-ready wait
+            if self.deadline.expired():
+                return f"Timeout - {self.deadline.reason}"
+            return PAGE_LOAD_TIMEOUT_STATUS
         except WebDriverException as e:
             return f"Error: {str(e)}"
         except Exception as e:
             return f"Unexpected error: {str(e)}"
+        finally:
+            if profiles and learned and not self.interrupted:
+                profiles.update(url, learned)
+            self.session_checks += 1
+            self.total_checks += 1
+            if not self.interrupted:
+                try:
+                    # Redirects may have left state on other origins too
+                    self.visited_origins.add(origin_of(self.driver.current_url))
+                except WebDriverException:
+                    pass
+                self.sample_memory()
 
-    def check_all_urls(self, urls):
-        """Check login for multiple URLs and generate a report"""
-        results = {}
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+def origin_of(url):
+    """scheme://host[:port] of a URL, as used for per-origin browser storage"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+def classify_status(status):
+    """Map a status string to a short verdict: success, failed, timeout, unreachable, skipped or error"""
+    if status == "Success":
+        return 'success'
+    if status.startswith("Skipped"):
+        return 'skipped'
+    if status.startswith("Login Failed"):
+        return 'failed'
+    if status.startswith("Timeout"):
+        return 'timeout'
+    if status.startswith("Unreachable"):
+        return 'unreachable'
+    return 'error'
+
+def make_result(url, status, engine, duration=None, screenshot=None, fallback_reason=None, phases=None,
+                page_timing=None):
+    """Build the result record reported for one URL"""
+    verdict = classify_status(status)
+    error = None
+    if verdict != 'success':
+        error = status.split(" - ", 1)[1] if " - " in status else status
+    return {
+        'url': url,
+        'verdict': verdict,
+        'status': status,
+        'error': error,
+        'engine': engine,
+        'fallback_reason': fallback_reason,
+        'duration': duration,
+        'phases': phases or {},
+        'page_timing': page_timing or {},
+        'screenshot': screenshot
+    }
+
+def print_report(results, timestamp):
+    """Print the login check report for a dict of url -> result record"""
+    print("\n=== Login Check Report ===")
+    print(f"Timestamp: {timestamp}\n")
+    for url, result in results.items():
+        print(f"URL: {url}")
+        print(f"Engine: {result['engine']}")
+        if result.get('fallback_reason'):
+            print(f"Fallback reason: {result['fallback_reason']}")
+        print(f"Status: {result['status']}\n")
+
+class RunSummary:
+    """Verdict counts and timing totals of a run, added up as results stream in
+
+    Used for the end-of-run report when the per-URL results go to report
+    files, so memory stays flat however many URLs the run has.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        # phase or page metric -> [checks, total seconds, slowest seconds]
+        self.phases = {}
+        self.page = {}
+
+    def add(self, record):
+        self.counts[record['verdict']] = self.counts.get(record['verdict'], 0) + 1
+        for phase, seconds in (record.get('phases') or {}).items():
+            self.observe(self.phases, phase, seconds)
+        navigation = ((record.get('page_timing') or {}).get('login_page') or {}).get('navigation') or {}
+        for metric in PAGE_METRICS:
+            if navigation.get(metric) is not None:
+                self.observe(self.page, metric, navigation[metric])
+
+    @staticmethod
+    def observe(totals, key, seconds):
+        entry = totals.setdefault(key, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+def print_summary(summary, timestamp):
+    """Print the verdict counts of a run whose per-URL results went to report files"""
+    print("\n=== Login Check Report ===")
+    print(f"Timestamp: {timestamp}\n")
+    for verdict, count in sorted(summary.counts.items()):
+        print(f"{verdict.capitalize():<12} {count:>8}")
+    print(f"{'Total':<12} {sum(summary.counts.values()):>8}")
+    print("\nPer-URL results are in the reports")
+
+def print_timing_summary(summary):
+    """Print the mean and slowest time of each phase and login page timing across the run"""
+    for title, totals, order in (("Phase Timing", summary.phases, PHASES), ("Page Timing", summary.page, PAGE_METRICS)):
+        keys = [key for key in order if key in totals] + [key for key in totals if key not in order]
+        if not keys:
+            continue
+        print(f"\n=== {title} (seconds, across the run) ===")
+        print(f"{'':<20} {'Checks':>8} {'Mean':>10} {'Slowest':>10}")
+        for key in keys:
+            checks, total, slowest = totals[key]
+            print(f"{key:<20} {checks:>8} {total / checks:>10.3f} {slowest:>10.3f}")
+
+def print_startup_timings(timings):
+    """Print where a browser session's startup time went"""
+    print("\n=== Startup Timing ===")
+    for phase in ('imports', 'driver_resolution', 'browser_launch', 'first_navigation'):
+        if phase in timings:
+            print(f"{phase.replace('_', ' ').capitalize():<20} {timings[phase]:>8.3f}s")
+    print(f"{'Total':<20} {sum(timings.values()):>8.3f}s")
+
+def print_phase_timings(results):
+    """Print where each URL's check time went, one column per phase"""
+    phases = [phase for phase in PHASES if any(phase in result['phases'] for result in results.values())]
+    if not phases:
+        return
+    print("\n=== Phase Timing (seconds) ===")
+    print(" ".join(f"{phase:>15}" for phase in phases) + "  URL")
+    for url, result in results.items():
+        cells = [result['phases'].get(phase) for phase in phases]
+        print(" ".join(f"{cell:>15.3f}" if cell is not None else f"{'-':>15}" for cell in cells) + f"  {url}")
+
+def print_session_stats(sessions):
+    """Print each browser session's checks, recycles and memory"""
+    print("\n=== Browser Sessions ===")
+    print(f"{'Session':<8} {'Checks':>7} {'Recycles':>9} {'RSS MB':>9} {'Peak MB':>9} {'Processes':>10}")
+    for session in sessions:
+        cells = [f"{session[key]:>9.1f}" if session[key] is not None else f"{'-':>9}"
+                 for key in ('rss_mb', 'peak_rss_mb')]
+        processes = session['processes'] if session['processes'] is not None else '-'
+        print(f"{session['worker']:<8} {session['checks']:>7} {session['recycles']:>9} {cells[0]} {cells[1]} "
+              f"{processes:>10}")
+    peaks = [session['peak_rss_mb'] for session in sessions if session['peak_rss_mb'] is not None]
+    if peaks:
+        print(f"Peak per session: {max(peaks):.1f} MB, all sessions: {sum(peaks):.1f} MB")
+    else:
+        print("Browser memory could not be measured on this platform")
+
+def print_page_timings(results):
+    """Print the login page's Navigation Timing, the submit and the slowest resource of each URL"""
+    timed = {url: result['page_timing'] for url, result in results.items() if result.get('page_timing')}
+    if not timed:
+        return
+    columns = ('dns', 'connect', 'ttfb', 'dom_content_loaded', 'load')
+    print("\n=== Page Timing (seconds) ===")
+    print(" ".join(f"{column:>18}" for column in columns + ('submit',)) + "  URL")
+    for url, timing in timed.items():
+        navigation = (timing.get('login_page') or {}).get('navigation') or {}
+        cells = [navigation.get(column) for column in columns]
+        # After the submit: the new page's load if it navigated, else its slowest request
+        submit = timing.get('after_submit') or {}
+        if submit.get('navigation'):
+            cells.append(submit['navigation'].get('load') or submit['navigation'].get('ttfb'))
+        else:
+            cells.append(max((r['duration'] for r in submit.get('slowest', [])), default=None))
+        print(" ".join(f"{cell:>18.3f}" if cell is not None else f"{'-':>18}" for cell in cells) + f"  {url}")
+        slowest = [r for capture in timing.values() for r in capture.get('slowest', [])]
+        if slowest:
+            resource = max(slowest, key=lambda r: r['duration'])
+            print(f"    slowest resource {resource['duration']:.3f}s ({resource['type']}): {resource['url']}")
+
+def make_http_engine(config):
+    """Build an HTTP engine using the same markers and credentials as the browser check"""
+    credentials = config.get('credentials', {})
+    return HttpLoginEngine(
+        credentials.get('username', ''),
+        credentials.get('password', ''),
+        ERROR_SELECTORS,
+        SUCCESS_SELECTORS,
+        ERROR_KEYWORDS,
+        timeout=config.get('http_timeout', HTTP_TIMEOUT)
+    )
+
+def run_worker_pool(urls, max_workers, startup_timings=None, on_result=None, budget=None, keep_results=True):
+    """Check URLs with a pool of independent browser sessions pulling from a shared queue
+
+    Returns url -> {'status', 'duration', 'phases', 'page_timing', 'screenshot'}.
+    on_result(url, outcome) is called from the worker thread as each URL
+    finishes; with keep_results=False outcomes are only passed to it and
+    the returned dict is empty. If startup_timings is a list, each worker appends its session's
+    startup timing dict. Once budget is exhausted no new URL is started; those
+    left are missing from the results. Each session's checks, recycles and
+    memory are printed and emitted as a 'sessions' event at the end.
+    """
+    url_queue = queue.Queue()
+    for url in urls:
+        url_queue.put(url)
+    
+    results = {}
+    # URLs a worker finished, for finding those no worker could take
+    finished = set()
+    results_lock = threading.Lock()
+    sessions = []
+    
+    def worker(worker_id):
+        with profiling.profile_thread():
+            check_urls(worker_id)
+    
+    def check_urls(worker_id):
+        # Each worker owns its own browser session
+        try:
+            checker = LoginChecker()
+        except SystemExit:
+            print(f"Worker {worker_id}: could not start a browser session")
+            return
         
-        for url in urls:
-            results[url] = self.check_login(url)
-            time.sleep(5)  # Wait 5 seconds between checking different URLs
-            
-        # Generate report
-        print("\n=== Login Check Report ===")
-        print(f"Timestamp: {timestamp}\n")
-        for url, status in results.items():
-            print(f"URL: {url}")
-            print(f"Status: {status}\n")
-            
-        self.driver.quit()
+        try:
+            while budget is None or not budget.exhausted():
+                try:
+                    url = url_queue.get_nowait()
+                except queue.Empty:
+                    break
+                start = time.perf_counter()
+                status = checker.check_login(url, budget)
+                outcome = {'status': status, 'duration': time.perf_counter() - start,
+                           'phases': checker.phase_timings, 'page_timing': checker.page_timing,
+                           'screenshot': checker.last_screenshot}
+                with results_lock:
+                    finished.add(url)
+                    if keep_results:
+                        results[url] = outcome
+                if on_result:
+                    on_result(url, outcome)
+        finally:
+            checker.driver.quit()
+            if startup_timings is not None:
+                startup_timings.append(checker.startup_timings)
+            with results_lock:
+                sessions.append(dict(checker.session_stats(), worker=worker_id))
+    
+    worker_count = max(1, min(max_workers, len(urls)))
+    print(f"Starting {worker_count} browser worker(s) for {len(urls)} URL(s)")
+    threads = [threading.Thread(target=worker, args=(i + 1,), name=f"checker-{i + 1}")
+               for i in range(worker_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    if sessions:
+        sessions.sort(key=lambda session: session['worker'])
+        print_session_stats(sessions)
+        events.emit('sessions', sessions=sessions)
+    
+    if budget is not None and budget.exhausted():
+        return {url: results[url] for url in urls if url in results}
+    
+    # Merge in config order; URLs no worker could take are reported as errors
+    unavailable = {'status': "Error: No browser session available", 'duration': None, 'phases': {},
+                   'screenshot': None}
+    for url in urls:
+        if url not in finished and on_result:
+            on_result(url, unavailable)
+    if not keep_results:
+        return {}
+    return {url: results.get(url, unavailable) for url in urls}
 
 def main():
-    checker = LoginChecker()
+    parser = argparse.ArgumentParser(description="Check login functionality across configured URLs")
+    parser.add_argument("--refresh-driver", action="store_true",
+                        help="Resolve the Edge driver again and update the local cache, then exit")
+    parser.add_argument("--timing", action="store_true",
+                        help="Print per-URL phase and page timings and a startup breakdown for the first "
+                             "browser session")
+    parser.add_argument("--daemon", action="store_true",
+                        help="Submit the run to a running checker daemon if one is available")
+    parser.add_argument("--schedule", action="store_true",
+                        help="Keep running and check each URL on its own interval (see schedule in config.json)")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="Write one JSON event per line to stdout; human readable output goes to stderr. "
+                             "A 'cancel' line on stdin stops the run and reports what finished")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="Write per-URL duration and phase metrics for a Prometheus textfile collector "
+                             "(default: metrics_file from config.json)")
+    parser.add_argument("--metrics-format", choices=METRICS_FORMATS, default=None,
+                        help="Metrics file format (default: metrics_format from config.json or prometheus)")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="Profile the run with cProfile, save the stats to FILE and print the top functions")
+    parser.add_argument("--report", action="append", metavar="FORMAT=PATH",
+                        help="Write each result to a report as soon as it finishes: jsonl, csv, junit or html "
+                             "(a directory). Repeatable; adds to reports in config.json")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run: skip URLs that already have a result in the jsonl "
+                             "report and append to the reports instead of starting them over")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true", default=None,
+                      help="Only verify unchanged login pages that passed recently instead of logging in "
+                           "(default: incremental from config.json)")
+    mode.add_argument("--full", action="store_false", dest="incremental",
+                      help="Log in to every URL this run, even with incremental on in config.json")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="Split the run across this many worker processes (default: shards from config.json; "
+                             "see coordinator.py)")
+    args = parser.parse_args()
+    
+    if args.jsonl:
+        events.enable(sys.stdout)
+        sys.stdout = sys.stderr
+    
+    config = load_config()
+    if args.incremental is not None:
+        config['incremental'] = args.incremental
+    if args.refresh_driver:
+        print(f"Cached driver: {DriverCache(config.get('driver_cache_dir')).resolve(refresh=True)}")
+        return
+    
+    if args.schedule:
+        # Imported here because the scheduler module imports this one
+        from scheduler import run_scheduler
+        run_scheduler()
+        return
+    
+    try:
+        reports, finished = open_reports(config, parse_report_args(args.report), args.resume)
+    except ValueError as e:
+        parser.error(str(e))
+    urls = [url for url in dedupe_urls(config.get('urls', [])) if url not in finished]
+    if args.resume and not urls:
+        print("Every URL already has a result; nothing to resume")
+        if reports:
+            reports.close()
+        return
+    # With report files the per-URL detail lives in them, and the end-of-run
+    # report is printed from totals so memory doesn't grow with the URL count
+    summary = RunSummary() if reports and reports.sinks else None
+    metrics_file = args.metrics or config.get('metrics_file')
+    if metrics_file:
+        metrics_format = args.metrics_format or config.get('metrics_format', 'prometheus')
+        try:
+            reports = reports or ReportWriter({})
+            reports.add('metrics', MetricsSink(metrics_file, metrics_format))
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not write metrics to {metrics_file}: {e}")
+    
+    def on_result(record):
+        if reports:
+            reports.write(record)
+        if summary:
+            summary.add(record)
+    
+    try:
+        run_main(args, config, urls, on_result, summary)
+    finally:
+        if reports:
+            reports.close()
+            if 'metrics' in reports.sinks:
+                print(f"Wrote metrics to: {metrics_file}")
+
+def run_main(args, config, urls, on_result, summary=None):
+    """Run the configured URLs the way the command line asked, passing each result record to on_result
+
+    With summary (a RunSummary that on_result adds each record to), the
+    per-URL records aren't kept and the report is printed from the summary.
+    """
+    keep_results = summary is None
+    profiler = profiling.enable() if args.profile else None
+    try:
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        budget = budget_from_config(config)
+        if args.daemon:
+            # Imported here because the daemon module imports this one
+            from checker_daemon import DAEMON_PORT, cancel_jobs, daemon_available, submit_job
+            port = config.get('daemon_port', DAEMON_PORT)
+            if daemon_available(port):
+                if args.jsonl:
+                    watch_for_cancel(lambda: cancel_jobs(port))
+            
+                def relay(event):
+                    # Relay the daemon's events so --jsonl consumers see the same stream
+                    events.emit(**event)
+                    if on_result and event['event'] == 'result':
+                        on_result({key: value for key, value in event.items() if key not in ('event', 'time')})
+
+                with profiling.profile_thread():
+                    results = submit_job(urls, port=port, on_event=relay, keep_results=keep_results)
+                report_results(results, timestamp, args, summary)
+                return
+            print("No checker daemon running, checking locally")
     
-    # Use URLs from config
-    for url in checker.config['urls']:
-        checker.check_login(url)
+        if args.jsonl:
+            watch_for_cancel(budget.cancel)
+        shards = config.get('shards', 0) if args.shards is None else args.shards
+        if shards > 1:
+            # Imported here because the coordinator module imports this one
+            from coordinator import run_sharded
+            with profiling.profile_thread():
+                results = run_sharded(config, urls, shards, on_result, budget, keep_results)
+            report_results(results, timestamp, args, summary)
+            return
+
+        startup_timings = []
+        with profiling.profile_thread():
+            results = run_checks(config, urls, startup_timings=startup_timings, on_result=on_result, budget=budget,
+                                 keep_results=keep_results)
+        report_results(results, timestamp, args, summary)
+        if args.timing and startup_timings:
+            print_startup_timings(startup_timings[0])
+    finally:
+        # Saved however the run ended; daemon and sharded runs profile this process's side
+        if profiler is not None:
+            profiler.stop()
+            if profiler.stats() is not None:
+                profiler.save(args.profile)
+                profiler.print_top()
+                print(f"Saved profile to: {args.profile}")
+
+def watch_for_cancel(on_cancel, stream=None):
+    """Call on_cancel when a 'cancel' line arrives on stdin (sent by the GUI)"""
+    stream = stream or sys.stdin
+
+    def watch():
+        for line in stream:
+            if line.strip() == "cancel":
+                print("Cancel requested, stopping outstanding checks")
+                on_cancel()
+                return
+
+    threading.Thread(target=watch, name="cancel-watch", daemon=True).start()
+
+def report_results(results, timestamp, args, summary=None):
+    """Print the report and the optional timing tables, from summary if the records weren't kept"""
+    if summary is not None:
+        print_summary(summary, timestamp)
+        if args.timing:
+            print_timing_summary(summary)
+        return
+    print_report(results, timestamp)
+    if args.timing:
+        print_phase_timings(results)
+        print_page_timings(results)
+
+def close_store(store, config):
+    """Commit a run's results, roll up old history and close the store"""
+    # Rolling up at most every compact_interval keeps closing cheap for frequent runs
+    store.commit()
+    store.compact(config.get('history_raw_days', RAW_DAYS), config.get('history_hourly_days', HOURLY_DAYS),
+                  config.get('history_daily_days', DAILY_DAYS),
+                  min_interval=config.get('history_compact_interval', COMPACT_INTERVAL))
+    store.close()
+
+def belongs_in_history(record):
+    """True if a result record should be added to the result history
+
+    A skipped URL wasn't checked. An incremental verification's duration is
+    one HTTP fetch, not a login, and would skew uptime, latency percentiles
+    and baselines.
+    """
+    return record['verdict'] != 'skipped' and record['engine'] != 'incremental'
+
+def run_checks(config, urls=None, run_browser=None, startup_timings=None, on_result=None, budget=None,
+               keep_results=True):
+    """Run the full check pipeline and return url -> result record in URL order
+
+    Stages: HTTP pre-flight, incremental triage (if incremental is on), the
+    browserless HTTP engine, then the browser for whatever is left.
+    run_browser(urls, on_result, budget) replaces the default browser worker
+    pool, e.g. with sessions that are already warm. Each record is emitted as a
+    result event and passed to on_result(record) as soon as it is known, and
+    stored in the result history unless history_db is empty (incremental
+    verifications aren't: they weren't logins).
+
+    budget (a RunBudget, from config.json if not given) bounds each check and
+    the whole run and can cancel it; URLs the run never got to are reported as
+    skipped.
+
+    With keep_results=False only each URL's verdict is held and the verdict
+    counts are returned instead, so a run whose records go to on_result (e.g.
+    report files) doesn't grow in memory with its full records.
+    """
+    urls = dedupe_urls(config.get('urls', []) if urls is None else urls)
+    budget = budget or budget_from_config(config)
+    run_start = time.perf_counter()
+    events.emit('run_start', urls=urls)
+    
+    # url -> result record, or just its verdict without keep_results
+    results = {}
+    store = open_store(config)
+    incremental = open_incremental(config, store)
+    
+    def finish(url, status, engine, **extra):
+        record = make_result(url, status, engine, **extra)
+        results[url] = record if keep_results else record['verdict']
+        if store and belongs_in_history(record):
+            store.add(record)
+        if incremental:
+            incremental.record(record)
+        events.emit('result', **record)
+        if on_result:
+            on_result(record)
+    
+    # Probe all hosts over plain HTTP first so dead ones never reach a browser
+    browser_urls = urls
+    if config.get('preflight', True):
+        browser_urls, probes = run_preflight(
+            urls,
+            timeout=config.get('preflight_timeout', PREFLIGHT_TIMEOUT),
+            concurrency=config.get('preflight_concurrency', PREFLIGHT_CONCURRENCY)
+        )
+        for probe in probes:
+            events.emit('preflight', **probe)
+            if not probe['reachable']:
+                finish(probe['url'], f"Unreachable - {probe['error']}", 'preflight', duration=probe['latency'])
+    
+    # Pages that passed recently and haven't changed are only verified, not logged in to
+    if incremental and browser_urls and not budget.exhausted():
+        browser_urls = incremental.triage(
+            browser_urls,
+            lambda url, outcome: finish(url, outcome['status'], 'incremental', duration=outcome['duration']),
+            budget
+        )
     
-    checker.driver.quit()
+    # Plain HTML form logins are checked without a browser; the rest fall back to Selenium
+    fallback_reasons = {}
+    engine = config.get('engine', 'auto')
+    if engine not in ENGINES:
+        print(f"Warning: Unknown engine '{engine}', using 'auto'")
+        engine = 'auto'
+    if engine == 'auto' and browser_urls and not budget.exhausted():
+        _, fallback_reasons = run_http_checks(
+            browser_urls,
+            lambda: make_http_engine(config),
+            workers=config.get('http_workers', HTTP_WORKERS),
+            on_result=lambda url, outcome: finish(url, outcome['status'], 'http',
+                                                  duration=outcome['duration'], phases=outcome['phases']),
+            budget=budget,
+            keep_results=keep_results
+        )
+        browser_urls = [url for url in browser_urls if url in fallback_reasons]
+    
+    def finish_browser(url, outcome):
+        finish(url, outcome['status'], 'selenium', duration=outcome['duration'], phases=outcome.get('phases'),
+               page_timing=outcome.get('page_timing'), screenshot=outcome['screenshot'],
+               fallback_reason=fallback_reasons.get(url))
+    
+    if browser_urls and not budget.exhausted():
+        if run_browser is None:
+            run_worker_pool(browser_urls, config.get('max_workers', 1), startup_timings, finish_browser, budget,
+                            keep_results)
+        else:
+            run_browser(browser_urls, finish_browser, budget)
+    
+    # Whatever is left was cut off by the run budget or a cancel
+    for url in urls:
+        if url not in results:
+            finish(url, budget.skip_status(), 'none')
+    
+    if store:
+        close_store(store, config)
+
+    counts = {}
+    for record in results.values():
+        verdict = record['verdict'] if keep_results else record
+        counts[verdict] = counts.get(verdict, 0) + 1
+    events.emit('run_end', counts=counts, duration=time.perf_counter() - run_start)
+    if not keep_results:
+        return counts
+    return {url: results[url] for url in urls}
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+import time
+
+# Phases of one check, in the order they run. recycle only runs when the browser
+# session is due to be replaced, reset only when it was used for a previous
+# check. The verdict poll alternates between scanning for error messages and
+# waiting for a success marker, so its time is split across error_scan and
+# success_wait. backoff is the wait before retrying a connection failure.
+PHASES = ("recycle", "reset", "navigate", "locate_username", "locate_password", "fill", "submit",
+          "error_scan", "success_wait", "screenshot", "backoff")
+
+# Navigation Timing metrics of the login page exported per URL
+PAGE_METRICS = ("dns", "connect", "tls", "ttfb", "server", "download", "dom_content_loaded", "load")
+
+# Histogram bucket upper bounds in seconds
+PHASE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+METRICS_FORMATS = ("prometheus", "openmetrics")
+
+class PhaseTimer:
+    """Times the consecutive phases of one check
+
+    Starting a phase ends the previous one. Time for a phase entered more than
+    once is added up.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.current = None
+        self.started = None
+
+    def start(self, phase):
+        self.stop()
+        self.current = phase
+        self.started = time.perf_counter()
+
+    def stop(self):
+        if self.current is not None:
+            elapsed = time.perf_counter() - self.started
+            self.timings[self.current] = self.timings.get(self.current, 0) + elapsed
+            self.current = None
+
+    def result(self):
+        """Stop the running phase and return phase -> seconds in PHASES order"""
+        self.stop()
+        ordered = {phase: self.timings[phase] for phase in PHASES if phase in self.timings}
+        ordered.update((phase, seconds) for phase, seconds in self.timings.items() if phase not in ordered)
+        return ordered
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def format_labels(**labels):
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in labels.items()) + "}"
+
+# Metric families in the order they are written: name, type, help and unit
+METRIC_FAMILIES = (
+    ("login_check_duration_seconds", "gauge", "Wall-clock time of the last check of the URL", "seconds"),
+    ("login_check_success", "gauge", "1 if the last check of the URL logged in, else 0", None),
+    ("login_check_phase_seconds", "histogram", "Time spent in each phase of the last check of the URL", "seconds"),
+    ("login_check_page_seconds", "gauge",
+     "Navigation Timing of the login page in the browser during the last check of the URL", "seconds"),
+)
+
+def family_header(name, kind, help_text, unit=None, openmetrics=False):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    if openmetrics and unit:
+        lines.append(f"# UNIT {name} {unit}")
+    return lines
+
+def record_samples(record):
+    """Sample lines of one result record, as metric family name -> lines
+
+    Per URL: the check duration and success as gauges, the phase timings as a
+    histogram with one observation per phase, and the login page's Navigation
+    Timing as gauges.
+    """
+    url = record['url']
+    samples = {name: [] for name, _, _, _ in METRIC_FAMILIES}
+    if record.get('duration') is not None:
+        labels = format_labels(url=url, engine=record['engine'], verdict=record['verdict'])
+        samples["login_check_duration_seconds"].append(
+            f"login_check_duration_seconds{labels} {record['duration']:.6f}")
+
+    labels = format_labels(url=url, engine=record['engine'])
+    success = 1 if record['verdict'] == 'success' else 0
+    samples["login_check_success"].append(f"login_check_success{labels} {success}")
+
+    phase_lines = samples["login_check_phase_seconds"]
+    for phase, seconds in (record.get('phases') or {}).items():
+        for bound in PHASE_BUCKETS:
+            labels = format_labels(url=url, phase=phase, le=float(bound))
+            phase_lines.append(f"login_check_phase_seconds_bucket{labels} {1 if seconds <= bound else 0}")
+        labels = format_labels(url=url, phase=phase, le="+Inf")
+        phase_lines.append(f"login_check_phase_seconds_bucket{labels} 1")
+        labels = format_labels(url=url, phase=phase)
+        phase_lines.append(f"login_check_phase_seconds_sum{labels} {seconds:.6f}")
+        phase_lines.append(f"login_check_phase_seconds_count{labels} 1")
+
+    navigation = ((record.get('page_timing') or {}).get('login_page') or {}).get('navigation') or {}
+    for metric in PAGE_METRICS:
+        if navigation.get(metric) is not None:
+            labels = format_labels(url=url, metric=metric)
+            samples["login_check_page_seconds"].append(
+                f"login_check_page_seconds{labels} {navigation[metric]:.6f}")
+    return samples
+
+def write_metrics(results, path, metrics_format="prometheus"):
+    """Write metrics for a dict of url -> result record to a file for a Prometheus textfile collector
+
+    The file is replaced atomically so a scrape never sees a partial write.
+    """
+    sink = MetricsSink(path, metrics_format)
+    for record in results.values():
+        sink.write(record)
+    sink.close()
+
+class MetricsSink:
+    """Writes the metrics file from results as they stream in, like a report sink
+
+    Each metric family's samples are spooled to a temporary file of their own
+    as results arrive; close() joins them under their headers into path,
+    replaced atomically. Memory use doesn't grow with the number of URLs.
+    """
+
+    def __init__(self, path, metrics_format="prometheus"):
+        if metrics_format not in METRICS_FORMATS:
+            raise ValueError(f"Unknown metrics format: {metrics_format}")
+        self.path = path
+        self.openmetrics = metrics_format == "openmetrics"
+        self.spools = {name: tempfile.TemporaryFile('w+', encoding="utf-8") for name, _, _, _ in METRIC_FAMILIES}
+
+    def write(self, record):
+        for name, lines in record_samples(record).items():
+            if lines:
+                self.spools[name].write("\n".join(lines) + "\n")
+
+    def close(self):
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding="utf-8") as f:
+                for name, kind, help_text, unit in METRIC_FAMILIES:
+                    f.write("\n".join(family_header(name, kind, help_text, unit, self.openmetrics)) + "\n")
+                    spool = self.spools[name]
+                    spool.seek(0)
+                    shutil.copyfileobj(spool, f)
+                if self.openmetrics:
+                    f.write("# EOF\n")
+            os.replace(temp_path, self.path)
+        finally:
+            for spool in self.spools.values():
+                spool.close()
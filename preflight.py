@@ -0,0 +1,111 @@
+import asyncio
+import ssl
+import time
+
+import httpx
+
+# Pre-flight defaults (seconds / concurrent requests)
+PREFLIGHT_TIMEOUT = 10
+PREFLIGHT_CONCURRENCY = 50
+
+def tls_verify():
+    """What httpx clients check certificates against
+
+    The operating system's trust store when truststore is installed, as Edge
+    does, so login pages signed by a company CA pass; otherwise certifi's
+    bundle, which doesn't know such CAs.
+    """
+    try:
+        import truststore
+    except ImportError:
+        return True
+    return truststore.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+
+def is_certificate_error(error):
+    """True if an httpx error is a failed certificate verification"""
+    cause = error.__cause__ or error.__context__
+    return isinstance(cause, ssl.SSLCertVerificationError) or "CERTIFICATE_VERIFY_FAILED" in str(error)
+
+def dedupe_urls(urls):
+    """Collapse duplicate URLs, keeping the order they were first listed in"""
+    return list(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
+
+def describe_error(error, timeout):
+    """Turn an httpx exception into a short, human readable reason"""
+    if isinstance(error, httpx.ConnectTimeout):
+        return f"Connection timed out after {timeout}s"
+    if isinstance(error, httpx.TimeoutException):
+        return f"No response within {timeout}s"
+    if isinstance(error, httpx.ConnectError):
+        # TLS failures surface as connect errors wrapping the ssl exception
+        cause = error.__cause__ or error.__context__
+        if isinstance(cause, ssl.SSLError) or "SSL" in str(error) or "CERTIFICATE" in str(error):
+            return f"TLS error: {error}"
+        return f"Connection failed: {str(error) or 'connection refused'}"
+    if isinstance(error, httpx.TooManyRedirects):
+        return "Too many redirects"
+    if isinstance(error, httpx.UnsupportedProtocol):
+        return f"Unsupported URL: {error}"
+    return f"{type(error).__name__}: {error}"
+
+async def probe_url(client, url, semaphore, timeout):
+    """Request a URL once and record status, latency and any connection error"""
+    result = {'url': url, 'reachable': False, 'status': None, 'latency': None, 'error': None}
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            # Only the status line and headers are needed, so don't download the body
+            async with client.stream("GET", url) as response:
+                result['latency'] = time.perf_counter() - start
+                result['status'] = response.status_code
+        except httpx.HTTPError as e:
+            result['latency'] = time.perf_counter() - start
+            result['error'] = describe_error(e, timeout)
+            # The host answered; the browser may well trust a certificate we don't
+            result['reachable'] = is_certificate_error(e)
+            return result
+
+    if result['status'] >= 500:
+        result['error'] = f"HTTP {result['status']}"
+    else:
+        result['reachable'] = True
+    return result
+
+async def probe_all(urls, timeout=PREFLIGHT_TIMEOUT, concurrency=PREFLIGHT_CONCURRENCY):
+    """Probe all URLs concurrently and return one result per URL in the same order"""
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=timeout, limits=limits, follow_redirects=True, verify=tls_verify()) as client:
+        return await asyncio.gather(*(probe_url(client, url, semaphore, timeout) for url in urls))
+
+def run_preflight(urls, timeout=PREFLIGHT_TIMEOUT, concurrency=PREFLIGHT_CONCURRENCY):
+    """Probe URLs over plain HTTP before any browser is started
+
+    Returns (reachable_urls, results) where results holds a probe record per URL.
+    Hosts that refuse connections, time out, fail TLS or answer with a 5xx are
+    reported straight away and left out of reachable_urls. A certificate that
+    fails verification counts as reachable and is left to the browser.
+    """
+    urls = dedupe_urls(urls)
+    if not urls:
+        return [], []
+
+    print(f"\n=== Pre-flight: probing {len(urls)} URL(s) ===")
+    results = asyncio.run(probe_all(urls, timeout, concurrency))
+
+    reachable = []
+    for result in results:
+        if result['reachable']:
+            reachable.append(result['url'])
+            if result['error']:
+                print(f"OK          {result['url']} (left to the browser: {result['error']})")
+            else:
+                print(f"OK          {result['url']} (HTTP {result['status']}, {result['latency'] * 1000:.0f} ms)")
+        else:
+            print(f"Unreachable {result['url']} - {result['error']}")
+    print(f"{len(reachable)} of {len(urls)} URL(s) reachable\n")
+    return reachable, results
+
+if __name__ == "__main__":
+    from login_checker import load_config
+    run_preflight(load_config().get('urls', []))
@@ -0,0 +1,86 @@
+import cProfile
+import pstats
+import sys
+import threading
+from contextlib import contextmanager, nullcontext
+
+# From Python 3.12 cProfile is built on sys.monitoring: one profiler sees every
+# thread, and only one can be enabled at a time
+SHARED_PROFILER = sys.version_info >= (3, 12)
+
+class RunProfiler:
+    """Collects cProfile data from every thread that takes part in a run
+
+    Before Python 3.12 cProfile only sees the thread it is enabled on, so
+    worker threads wrap their work in thread() and the profiles are merged at
+    the end. From 3.12 a single profiler started here covers the whole run and
+    thread() does nothing.
+    """
+
+    def __init__(self):
+        self.profiles = []
+        self.lock = threading.Lock()
+        self.shared = None
+        if SHARED_PROFILER:
+            self.shared = cProfile.Profile()
+            self.shared.enable()
+            self.profiles.append(self.shared)
+
+    @contextmanager
+    def thread(self):
+        if self.shared is not None:
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler is already running; the run goes on unprofiled here
+            print(f"Not profiling thread {threading.current_thread().name}: {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self.lock:
+                self.profiles.append(profile)
+
+    def stop(self):
+        """Stop the run-wide profiler, if there is one"""
+        if self.shared is not None:
+            self.shared.disable()
+
+    def stats(self):
+        with self.lock:
+            profiles = list(self.profiles)
+        if not profiles:
+            return None
+        return pstats.Stats(*profiles)
+
+    def save(self, path):
+        """Dump the merged profile for snakeviz, pstats or gprof2dot"""
+        self.stop()
+        stats = self.stats()
+        if stats is not None:
+            stats.dump_stats(path)
+
+    def print_top(self, limit=25):
+        stats = self.stats()
+        if stats is not None:
+            print("\n=== Profile (top functions by cumulative time) ===")
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+
+_profiler = None
+
+def enable():
+    """Start collecting profiles from threads that call profile_thread()"""
+    global _profiler
+    _profiler = RunProfiler()
+    return _profiler
+
+def profile_thread():
+    """Profile the calling thread for the duration of the block; a no-op unless enabled"""
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.thread()
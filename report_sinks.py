@@ -0,0 +1,336 @@
+import csv
+import json
+import os
+import threading
+from datetime import datetime
+from html import escape
+
+# Report formats; configure them under reports in config.json as format -> path
+# (a directory for html), or with --report FORMAT=PATH
+REPORT_FORMATS = ("jsonl", "csv", "junit", "html")
+
+# Results per HTML page (html_page_size in config.json)
+HTML_PAGE_SIZE = 500
+
+CSV_FIELDS = ("finished", "url", "verdict", "status", "error", "engine", "fallback_reason", "duration",
+              "screenshot")
+
+JUNIT_FOOTER = "</testsuite>\n</testsuites>\n"
+
+HTML_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ border-bottom: 1px solid #ddd; padding: 4px 8px; text-align: left; vertical-align: top; }}
+.success {{ color: #1a7f37; }} .failed, .error {{ color: #cf222e; }} .timeout, .unreachable {{ color: #bc4c00; }}
+.skipped {{ color: #6e7781; }}
+</style></head><body>
+"""
+HTML_PAGE_FOOTER = "</table>\n</body></html>\n"
+
+def ensure_parent(path):
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+
+def finished_at():
+    return datetime.now().isoformat(timespec="seconds")
+
+class JsonlSink:
+    """One JSON object per result; the report --resume reads back"""
+
+    def __init__(self, path, resume=False):
+        ensure_parent(path)
+        partial_line = False
+        if resume and os.path.exists(path) and os.path.getsize(path):
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                partial_line = f.read(1) != b"\n"
+        self.file = open(path, 'a' if resume else 'w', encoding="utf-8")
+        if partial_line:
+            # The interrupted run died mid-line; don't glue the next record onto it
+            self.file.write("\n")
+
+    def write(self, record):
+        self.file.write(json.dumps(dict(record, finished=finished_at()), default=str) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class CsvSink:
+    """One row per result, in CSV_FIELDS columns"""
+
+    def __init__(self, path, resume=False):
+        ensure_parent(path)
+        append = resume and os.path.exists(path) and os.path.getsize(path) > 0
+        self.file = open(path, 'a' if append else 'w', newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.file, CSV_FIELDS, extrasaction='ignore')
+        if not append:
+            self.writer.writeheader()
+
+    def write(self, record):
+        self.writer.writerow(dict(record, finished=finished_at()))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class JUnitSink:
+    """JUnit XML with one testcase per URL, for CI dashboards
+
+    Testcases are appended as they finish and the closing tags are written on
+    close, so an interrupted run leaves every finished testcase on disk; a
+    resumed run cuts the file back to its last complete testcase, dropping the
+    closing tags and any line torn by the interruption, and carries on
+    appending.
+    """
+
+    def __init__(self, path, resume=False):
+        ensure_parent(path)
+        end = self.complete_length(path) if resume and os.path.exists(path) else 0
+        if end:
+            os.truncate(path, end)
+            self.file = open(path, 'a', encoding="utf-8")
+        else:
+            self.file = open(path, 'w', encoding="utf-8")
+            self.file.write('<?xml version="1.0" encoding="UTF-8"?>\n<testsuites>\n'
+                            f'<testsuite name="login_checks" timestamp="{finished_at()}">\n')
+        self.file.flush()
+
+    @staticmethod
+    def complete_length(path):
+        """Bytes up to the end of the last complete testcase line (or the testsuite tag), 0 if none"""
+        end = offset = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                offset += len(line)
+                if not line.endswith(b"\n"):
+                    break
+                if line.startswith(b"<testsuite ") or (line.startswith(b"<testcase ") and
+                                                         line.rstrip().endswith((b"/>", b"</testcase>"))):
+                    end = offset
+        return end
+
+    def write(self, record):
+        name = escape(record['url'])
+        duration = record.get('duration') or 0
+        case = f'<testcase classname="login_check.{escape(record["engine"])}" name="{name}" time="{duration:.3f}"'
+        verdict = record['verdict']
+        if verdict == 'success':
+            line = case + "/>"
+        else:
+            detail = record['status']
+            if record.get('screenshot'):
+                detail += f"\nScreenshot: {record['screenshot']}"
+            # One testcase per line, so newlines inside the text are written as character references
+            detail = escape(detail).replace("\n", "&#10;")
+            if verdict == 'skipped':
+                tag = f'<skipped message="{escape(record["status"])}"/>'
+            else:
+                kind = "failure" if verdict == 'failed' else "error"
+                message = escape(record.get("error") or verdict)
+                tag = f'<{kind} type="{verdict}" message="{message}">{detail}</{kind}>'
+            line = f"{case}>{tag}</testcase>"
+        self.file.write(line + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.write(JUNIT_FOOTER)
+        self.file.close()
+
+class HtmlSink:
+    """A paginated HTML summary: page-NNNN.html files of page_size results and an index
+
+    Each page is written row by row and closed when full. The index holds only
+    the verdict counts and page links, and is replaced atomically as pages are
+    added and when the run ends.
+    """
+
+    def __init__(self, directory, page_size=HTML_PAGE_SIZE, resume=False, counts=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.page_size = page_size
+        self.pages = 0
+        if resume:
+            while os.path.exists(self.page_path(self.pages + 1)):
+                self.pages += 1
+            if self.pages:
+                self.end_unfinished_page(self.page_path(self.pages))
+        else:
+            for name in os.listdir(directory):
+                if name.startswith("page-") and name.endswith(".html"):
+                    os.remove(os.path.join(directory, name))
+        self.file = None
+        self.rows = 0
+        # Verdict counts for the index, carried over from the interrupted run on resume
+        self.counts = dict(counts or {})
+
+    def page_path(self, number):
+        return os.path.join(self.directory, f"page-{number:04d}.html")
+
+    def end_unfinished_page(self, path):
+        """Close off the last page of an interrupted run"""
+        with open(path, 'rb') as f:
+            f.seek(max(0, os.path.getsize(path) - len(HTML_PAGE_FOOTER)))
+            finished = f.read().decode("utf-8", "replace") == HTML_PAGE_FOOTER
+        if not finished:
+            with open(path, 'a', encoding="utf-8") as f:
+                f.write(HTML_PAGE_FOOTER)
+
+    def start_page(self):
+        self.pages += 1
+        self.rows = 0
+        self.file = open(self.page_path(self.pages), 'w', encoding="utf-8")
+        self.file.write(HTML_HEAD.format(title=f"Login checks, page {self.pages}"))
+        self.file.write(f'<p><a href="index.html">Summary</a> &middot; page {self.pages}</p>\n<table>\n'
+                        "<tr><th>URL</th><th>Result</th><th>Engine</th><th>Time</th><th>Details</th></tr>\n")
+        self.write_index()
+
+    def end_page(self):
+        self.file.write(HTML_PAGE_FOOTER)
+        self.file.close()
+        self.file = None
+
+    def write(self, record):
+        if self.file is None:
+            self.start_page()
+        verdict = record['verdict']
+        self.counts[verdict] = self.counts.get(verdict, 0) + 1
+        duration = f"{record['duration']:.1f}s" if record.get('duration') is not None else ""
+        details = escape(record.get('error') or "")
+        if record.get('screenshot'):
+            details += f' <a href="{escape(record["screenshot"])}">screenshot</a>'
+        self.file.write(f'<tr><td>{escape(record["url"])}</td><td class="{escape(verdict)}">{escape(verdict)}</td>'
+                        f'<td>{escape(record["engine"])}</td><td>{duration}</td><td>{details}</td></tr>\n')
+        self.file.flush()
+        self.rows += 1
+        if self.rows >= self.page_size:
+            self.end_page()
+
+    def write_index(self, finished=False):
+        rows = "".join(f'<tr><td class="{escape(verdict)}">{escape(verdict)}</td><td>{count}</td></tr>\n'
+                       for verdict, count in sorted(self.counts.items()))
+        links = "".join(f'<li><a href="page-{number:04d}.html">Page {number}</a></li>\n'
+                        for number in range(1, self.pages + 1))
+        state = "Finished" if finished else "In progress"
+        temp_path = os.path.join(self.directory, "index.html.tmp")
+        with open(temp_path, 'w', encoding="utf-8") as f:
+            f.write(HTML_HEAD.format(title="Login check report"))
+            f.write(f"<h1>Login check report</h1>\n<p>{state}, updated {finished_at()}</p>\n"
+                    f"<table>\n<tr><th>Result</th><th>URLs</th></tr>\n{rows}</table>\n<ul>\n{links}</ul>\n"
+                    "</body></html>\n")
+        os.replace(temp_path, os.path.join(self.directory, "index.html"))
+
+    def close(self):
+        if self.file is not None:
+            self.end_page()
+        self.write_index(finished=True)
+
+def make_sink(report_format, path, config, resume=False, counts=None):
+    if report_format == "jsonl":
+        return JsonlSink(path, resume)
+    if report_format == "csv":
+        return CsvSink(path, resume)
+    if report_format == "junit":
+        return JUnitSink(path, resume)
+    if report_format == "html":
+        return HtmlSink(path, config.get('html_page_size', HTML_PAGE_SIZE), resume, counts)
+    raise ValueError(f"Unknown report format: {report_format}")
+
+class ReportWriter:
+    """Writes each result record to every report sink as soon as it finishes
+
+    Safe to call from worker threads. Nothing is kept per URL, so memory use
+    doesn't grow with the number of URLs. A sink that fails to write (e.g.
+    disk full) is dropped with a warning; the run carries on.
+    """
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+        self.lock = threading.Lock()
+
+    def add(self, name, sink):
+        """Feed another sink (e.g. the metrics file) from the same results"""
+        with self.lock:
+            self.sinks[name] = sink
+
+    def write(self, record):
+        with self.lock:
+            for report_format, sink in list(self.sinks.items()):
+                try:
+                    sink.write(record)
+                except OSError as e:
+                    print(f"Warning: Could not write the {report_format} report ({e}); no longer writing it")
+                    del self.sinks[report_format]
+
+    def close(self):
+        with self.lock:
+            for report_format, sink in self.sinks.items():
+                try:
+                    sink.close()
+                except OSError as e:
+                    print(f"Warning: Could not finish the {report_format} report: {e}")
+
+def read_finished(path):
+    """url -> verdict of the latest result of each URL in a JSON lines report
+
+    Streams the file, so only the URLs are held in memory. Skipped URLs (cut
+    off by a budget or cancel) count as unfinished, and a line torn by the
+    interrupted run is ignored.
+    """
+    finished = {}
+    if not os.path.exists(path):
+        return finished
+    with open(path, 'r', encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                url, verdict = record['url'], record['verdict']
+            except (ValueError, KeyError, TypeError):
+                continue
+            if verdict == 'skipped':
+                finished.pop(url, None)
+            else:
+                finished[url] = verdict
+    return finished
+
+def parse_report_args(reports):
+    """Turn --report FORMAT=PATH arguments into a format -> path dict"""
+    parsed = {}
+    for report in reports or []:
+        report_format, _, path = report.partition("=")
+        if report_format not in REPORT_FORMATS or not path:
+            raise ValueError(f"Expected FORMAT=PATH with FORMAT one of {', '.join(REPORT_FORMATS)}: {report}")
+        parsed[report_format] = path
+    return parsed
+
+def open_reports(config, extra=None, resume=False):
+    """Open the configured report sinks; returns (ReportWriter or None, url -> verdict already finished)
+
+    extra (format -> path) adds to or overrides reports from config.json. With
+    resume the sinks carry on from an interrupted run instead of starting over,
+    and the URLs finished in its JSON lines report are returned so the caller
+    can skip them.
+    """
+    reports = dict(config.get('reports') or {}, **(extra or {}))
+    finished = {}
+    if resume:
+        if 'jsonl' not in reports:
+            print("Warning: --resume needs a jsonl report to resume from; checking every URL")
+            resume = False
+        else:
+            finished = read_finished(reports['jsonl'])
+            print(f"Resuming: {len(finished)} URL(s) already have a result in {reports['jsonl']}")
+    if not reports:
+        return None, finished
+    counts = {}
+    for verdict in finished.values():
+        counts[verdict] = counts.get(verdict, 0) + 1
+    sinks = {}
+    for report_format, path in reports.items():
+        try:
+            sinks[report_format] = make_sink(report_format, path, config, resume, counts)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not open the {report_format} report {path}: {e}")
+    return ReportWriter(sinks), finished
@@ -0,0 +1,420 @@
+import argparse
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from metrics import PAGE_METRICS
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.db")
+
+# Retention: raw checks are kept for RAW_DAYS, then rolled up into hourly
+# buckets kept for HOURLY_DAYS, then into daily buckets kept for DAILY_DAYS
+RAW_DAYS = 30
+HOURLY_DAYS = 180
+DAILY_DAYS = 730
+HOUR = 3600
+DAY = 86400
+
+# Seconds between the compactions close_store runs after check runs; a
+# scheduler batch every few minutes doesn't need one each time
+COMPACT_INTERVAL = HOUR
+
+# A URL's page timing has regressed when its recent median is this much above its baseline median
+REGRESSION_THRESHOLD = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS checks (
+    id INTEGER PRIMARY KEY,
+    url_id INTEGER NOT NULL REFERENCES urls(id),
+    ts REAL NOT NULL,
+    verdict TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    engine TEXT,
+    duration REAL,
+    phases TEXT,
+    screenshot TEXT,
+    page_timing TEXT
+);
+-- Covers time-range scans and latency percentiles without touching the table
+CREATE INDEX IF NOT EXISTS checks_url_ts ON checks (url_id, ts, duration);
+-- Finds the latest success (or failure) of a URL without scanning its history
+CREATE INDEX IF NOT EXISTS checks_url_verdict_ts ON checks (url_id, verdict, ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    url_id INTEGER NOT NULL REFERENCES urls(id),
+    span INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    checks INTEGER NOT NULL,
+    successes INTEGER NOT NULL,
+    duration_sum REAL NOT NULL,
+    duration_count INTEGER NOT NULL,
+    duration_min REAL,
+    duration_max REAL,
+    PRIMARY KEY (url_id, span, bucket)
+) WITHOUT ROWID;
+-- Incremental mode: the login page fingerprint and verdict of each URL's last
+-- full check, and how many runs since then only verified the fingerprint
+CREATE TABLE IF NOT EXISTS fingerprints (
+    url_id INTEGER PRIMARY KEY REFERENCES urls(id),
+    fingerprint TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    verdict TEXT NOT NULL,
+    full_ts REAL NOT NULL,
+    runs_since_full INTEGER NOT NULL DEFAULT 0
+);
+-- Store housekeeping, e.g. when it was last compacted
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL
+);
+"""
+
+# Adding into an existing bucket keeps compaction safe to repeat and lets a
+# bucket straddle a retention cutoff
+ROLLUP_UPSERT = """
+ON CONFLICT (url_id, span, bucket) DO UPDATE SET
+    checks = checks + excluded.checks,
+    successes = successes + excluded.successes,
+    duration_sum = duration_sum + excluded.duration_sum,
+    duration_count = duration_count + excluded.duration_count,
+    duration_min = MIN(COALESCE(duration_min, excluded.duration_min), COALESCE(excluded.duration_min, duration_min)),
+    duration_max = MAX(COALESCE(duration_max, excluded.duration_max), COALESCE(excluded.duration_max, duration_max))
+"""
+
+class ResultStore:
+    """SQLite history of check results, indexed by URL and time
+
+    Safe to share between threads; writes are serialized with a lock.
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(checks)")}
+        if 'page_timing' not in columns:
+            # History written before page timing was captured
+            self.conn.execute("ALTER TABLE checks ADD COLUMN page_timing TEXT")
+        self.url_ids = {}
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def url_id(self, url, create=False):
+        """Return the id of a URL, or None if it has never been stored"""
+        if url in self.url_ids:
+            return self.url_ids[url]
+        row = self.conn.execute("SELECT id FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            if not create:
+                return None
+            row_id = self.conn.execute("INSERT INTO urls (url) VALUES (?)", (url,)).lastrowid
+        else:
+            row_id = row['id']
+        self.url_ids[url] = row_id
+        return row_id
+
+    def add(self, record, ts=None):
+        """Store one result record (as built by make_result); call commit() to persist"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO checks (url_id, ts, verdict, status, error, engine, duration, phases, screenshot, "
+                "page_timing) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.url_id(record['url'], create=True), time.time() if ts is None else ts,
+                 record['verdict'], record['status'], record.get('error'), record.get('engine'),
+                 record.get('duration'), json.dumps(record.get('phases') or {}), record.get('screenshot'),
+                 json.dumps(record['page_timing']) if record.get('page_timing') else None)
+            )
+
+    def commit(self):
+        with self.lock:
+            self.conn.commit()
+
+    def urls(self):
+        return [row['url'] for row in self.conn.execute("SELECT url FROM urls ORDER BY url")]
+
+    def history(self, url, since=None, limit=100):
+        """Most recent raw checks of a URL, newest first"""
+        url_id = self.url_id(url)
+        if url_id is None:
+            return []
+        rows = self.conn.execute(
+            "SELECT * FROM checks WHERE url_id = ? AND ts >= ? ORDER BY ts DESC LIMIT ?",
+            (url_id, since or 0, limit)
+        )
+        return [dict(row, url=url, phases=json.loads(row['phases'] or "{}"),
+                     page_timing=json.loads(row['page_timing'] or "{}")) for row in rows]
+
+    def latency_percentile(self, url, pct, days=7, now=None):
+        """Nearest-rank percentile of check duration over the last days, or None
+
+        Computed from raw checks, so it covers at most RAW_DAYS.
+        """
+        url_id = self.url_id(url)
+        if url_id is None:
+            return None
+        since = (now or time.time()) - days * DAY
+        count = self.conn.execute(
+            "SELECT COUNT(duration) FROM checks WHERE url_id = ? AND ts >= ?", (url_id, since)
+        ).fetchone()[0]
+        if not count:
+            return None
+        rank = max(1, math.ceil(pct / 100 * count))
+        row = self.conn.execute(
+            "SELECT duration FROM checks WHERE url_id = ? AND ts >= ? AND duration IS NOT NULL "
+            "ORDER BY duration LIMIT 1 OFFSET ?", (url_id, since, rank - 1)
+        ).fetchone()
+        return row['duration']
+
+    def page_timing_percentile(self, url, metric, pct, days=7, now=None):
+        """Nearest-rank percentile of a login page Navigation Timing metric (see PAGE_METRICS)
+        over the days before now, or None if no check in that window recorded it"""
+        url_id = self.url_id(url)
+        if url_id is None:
+            return None
+        if metric not in PAGE_METRICS:
+            raise ValueError(f"Unknown page timing metric: {metric}")
+        now = now or time.time()
+        path = f"$.login_page.navigation.{metric}"
+        values = [row[0] for row in self.conn.execute(
+            "SELECT json_extract(page_timing, ?) AS value FROM checks "
+            "WHERE url_id = ? AND ts >= ? AND ts < ? AND value IS NOT NULL ORDER BY value",
+            (path, url_id, now - days * DAY, now)
+        )]
+        if not values:
+            return None
+        return values[max(1, math.ceil(pct / 100 * len(values))) - 1]
+
+    def mean_durations(self, days=7, now=None):
+        """url -> mean check duration over the last days, for every URL with timed checks"""
+        since = (now or time.time()) - days * DAY
+        rows = self.conn.execute(
+            "SELECT urls.url, AVG(checks.duration) FROM checks JOIN urls ON urls.id = checks.url_id "
+            "WHERE checks.ts >= ? AND checks.duration IS NOT NULL GROUP BY checks.url_id", (since,)
+        )
+        return {row[0]: row[1] for row in rows}
+
+    def first_failure(self, url, since):
+        """The first non-success check of a URL at or after a timestamp, or None"""
+        url_id = self.url_id(url)
+        if url_id is None:
+            return None
+        row = self.conn.execute(
+            "SELECT ts, verdict, error FROM checks WHERE url_id = ? AND ts >= ? AND verdict != 'success' "
+            "ORDER BY ts LIMIT 1", (url_id, since)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def failing_since(self, url):
+        """The first failure of the URL's current failure streak, or None if its last check succeeded"""
+        url_id = self.url_id(url)
+        if url_id is None:
+            return None
+        row = self.conn.execute(
+            "SELECT ts FROM checks WHERE url_id = ? AND verdict = 'success' ORDER BY ts DESC LIMIT 1", (url_id,)
+        ).fetchone()
+        return self.first_failure(url, row['ts'] if row else 0)
+
+    def success_rate(self, url, days=7, now=None):
+        """Fraction of successful checks over the last days, using rollups for older periods"""
+        url_id = self.url_id(url)
+        if url_id is None:
+            return None
+        since = (now or time.time()) - days * DAY
+        raw = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(verdict = 'success'), 0) FROM checks WHERE url_id = ? AND ts >= ?",
+            (url_id, since)
+        ).fetchone()
+        rolled = self.conn.execute(
+            "SELECT COALESCE(SUM(checks), 0), COALESCE(SUM(successes), 0) FROM rollups "
+            "WHERE url_id = ? AND bucket >= ?", (url_id, since)
+        ).fetchone()
+        checks = raw[0] + rolled[0]
+        return (raw[1] + rolled[1]) / checks if checks else None
+
+    def fingerprint(self, url):
+        """The stored fingerprint state of a URL, or None"""
+        url_id = self.url_id(url)
+        if url_id is None:
+            return None
+        row = self.conn.execute("SELECT * FROM fingerprints WHERE url_id = ?", (url_id,)).fetchone()
+        return dict(row) if row else None
+
+    def save_fingerprint(self, url, fingerprint, etag, last_modified, verdict, ts=None):
+        """Record the fingerprint and verdict of a full check; call commit() to persist"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO fingerprints (url_id, fingerprint, etag, last_modified, verdict, full_ts, "
+                "runs_since_full) VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (self.url_id(url, create=True), fingerprint, etag, last_modified, verdict,
+                 time.time() if ts is None else ts)
+            )
+
+    def count_verified_run(self, url):
+        """Note a run that only verified the URL's fingerprint"""
+        with self.lock:
+            self.conn.execute("UPDATE fingerprints SET runs_since_full = runs_since_full + 1 WHERE url_id = ?",
+                              (self.url_id(url),))
+
+    def forget_fingerprint(self, url):
+        with self.lock:
+            self.conn.execute("DELETE FROM fingerprints WHERE url_id = ?", (self.url_id(url),))
+
+    def compact(self, raw_days=RAW_DAYS, hourly_days=HOURLY_DAYS, daily_days=DAILY_DAYS, now=None, min_interval=0):
+        """Roll old raw checks into hourly buckets, old hourly buckets into daily ones, and drop
+        daily buckets past retention. Returns the number of raw rows rolled up.
+
+        Each step is one statement over every URL. With min_interval, nothing is
+        done if the store was compacted less than that many seconds ago.
+        """
+        now = now or time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'compacted'").fetchone()
+            if row is not None and now - row['value'] < min_interval:
+                return 0
+            cutoff = now - raw_days * DAY
+            self.conn.execute(
+                "INSERT INTO rollups SELECT url_id, ?, CAST(ts / ? AS INTEGER) * ?, COUNT(*), "
+                "SUM(verdict = 'success'), COALESCE(SUM(duration), 0), COUNT(duration), "
+                "MIN(duration), MAX(duration) FROM checks WHERE ts < ? "
+                "GROUP BY url_id, 3" + ROLLUP_UPSERT, (HOUR, HOUR, HOUR, cutoff)
+            )
+            rolled = self.conn.execute("DELETE FROM checks WHERE ts < ?", (cutoff,)).rowcount
+
+            cutoff = now - hourly_days * DAY
+            self.conn.execute(
+                "INSERT INTO rollups SELECT url_id, ?, bucket / ? * ?, SUM(checks), SUM(successes), "
+                "SUM(duration_sum), SUM(duration_count), MIN(duration_min), MAX(duration_max) "
+                "FROM rollups WHERE span = ? AND bucket < ? "
+                "GROUP BY url_id, 3" + ROLLUP_UPSERT, (DAY, DAY, DAY, HOUR, cutoff)
+            )
+            self.conn.execute("DELETE FROM rollups WHERE span = ? AND bucket < ?", (HOUR, cutoff))
+            self.conn.execute("DELETE FROM rollups WHERE span = ? AND bucket < ?", (DAY, now - daily_days * DAY))
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('compacted', ?) "
+                              "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (now,))
+            self.conn.commit()
+        return rolled
+
+def open_store(config):
+    """Open the result store named by config.json, or None if history is disabled"""
+    path = config.get('history_db', DEFAULT_DB)
+    if not path:
+        return None
+    try:
+        return ResultStore(path)
+    except sqlite3.Error as e:
+        print(f"Warning: Could not open result history {path}: {e}")
+        return None
+
+def format_ts(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+def print_summary(store, days):
+    print(f"\n=== Login History (last {days} days) ===")
+    print(f"{'Success':>8} {'p50':>8} {'p95':>8}  {'Failing since':<20} URL")
+    for url in store.urls():
+        rate = store.success_rate(url, days)
+        p50 = store.latency_percentile(url, 50, days)
+        p95 = store.latency_percentile(url, 95, days)
+        failing = store.failing_since(url)
+        print(f"{'-' if rate is None else f'{rate:.1%}':>8} "
+              f"{'-' if p50 is None else f'{p50:.2f}s':>8} "
+              f"{'-' if p95 is None else f'{p95:.2f}s':>8}  "
+              f"{format_ts(failing['ts']) if failing else '-':<20} {url}")
+
+def print_page_timing(store, days, baseline_days, threshold=REGRESSION_THRESHOLD):
+    """Per URL: login page latency over the last days, flagged where its median regressed
+    against the baseline_days before that"""
+    print(f"\n=== Page Timing (last {days:g} days vs the {baseline_days:g} days before) ===")
+    print(f"{'TTFB p50':>9} {'p95':>7} {'DCL p50':>8} {'Load p50':>9} {'p95':>7}  {'Regression':<24} URL")
+    now = time.time()
+    baseline_end = now - days * DAY
+
+    def cell(value, width):
+        return f"{'-' if value is None else f'{value:.2f}s':>{width}}"
+
+    for url in store.urls():
+        ttfb = [store.page_timing_percentile(url, 'ttfb', pct, days, now) for pct in (50, 95)]
+        if ttfb[0] is None:
+            continue
+        load = [store.page_timing_percentile(url, 'load', pct, days, now) for pct in (50, 95)]
+        dcl = store.page_timing_percentile(url, 'dom_content_loaded', 50, days, now)
+        regressions = []
+        for metric, recent in (('ttfb', ttfb[0]), ('load', load[0])):
+            baseline = store.page_timing_percentile(url, metric, 50, baseline_days, baseline_end)
+            if recent is not None and baseline and recent > baseline * (1 + threshold):
+                regressions.append(f"{metric} +{recent / baseline - 1:.0%}")
+        print(f"{cell(ttfb[0], 9)} {cell(ttfb[1], 7)} {cell(dcl, 8)} {cell(load[0], 9)} {cell(load[1], 7)}  "
+              f"{', '.join(regressions) or '-':<24} {url}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and maintain the login check history")
+    parser.add_argument("--db", default=None, help="History database (default: history_db from config.json)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    summary_parser = subparsers.add_parser("summary", help="Success rate, latency and failure streak per URL")
+    summary_parser.add_argument("--days", type=float, default=7, help="Window in days (default: 7)")
+
+    history_parser = subparsers.add_parser("history", help="Recent checks of one URL")
+    history_parser.add_argument("url")
+    history_parser.add_argument("--limit", type=int, default=20, help="Number of checks (default: 20)")
+
+    timing_parser = subparsers.add_parser("timing", help="Login page latency per URL and regressions against a "
+                                                         "baseline")
+    timing_parser.add_argument("--days", type=float, default=1, help="Recent window in days (default: 1)")
+    timing_parser.add_argument("--baseline-days", type=float, default=7,
+                               help="Baseline window before the recent one, in days (default: 7)")
+    timing_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                               help="Flag a median more than this fraction above its baseline "
+                                    f"(default: {REGRESSION_THRESHOLD})")
+
+    compact_parser = subparsers.add_parser("compact", help="Roll up and drop old rows")
+    compact_parser.add_argument("--raw-days", type=float, default=RAW_DAYS,
+                                help=f"Days of raw checks to keep (default: {RAW_DAYS})")
+    compact_parser.add_argument("--hourly-days", type=float, default=HOURLY_DAYS,
+                                help=f"Days of hourly rollups to keep (default: {HOURLY_DAYS})")
+    compact_parser.add_argument("--daily-days", type=float, default=DAILY_DAYS,
+                                help=f"Days of daily rollups to keep (default: {DAILY_DAYS})")
+    args = parser.parse_args()
+
+    if args.db:
+        store = ResultStore(args.db)
+    else:
+        from login_checker import load_config
+        store = open_store(load_config())
+        if store is None:
+            print("Result history is disabled (history_db is empty in config.json)")
+            return
+
+    try:
+        if args.command == "history":
+            for check in store.history(args.url, limit=args.limit):
+                duration = f"{check['duration']:.2f}s" if check['duration'] is not None else "-"
+                print(f"{format_ts(check['ts'])}  {check['verdict']:<12} {duration:>8}  {check['status']}")
+        elif args.command == "timing":
+            print_page_timing(store, args.days, args.baseline_days, args.threshold)
+        elif args.command == "compact":
+            rolled = store.compact(args.raw_days, args.hourly_days, args.daily_days)
+            print(f"Rolled up {rolled} raw check(s)")
+        else:
+            print_summary(store, getattr(args, "days", 7))
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import events
+
+# Defaults, overridable in config.json: retry_attempts retries a transient
+# failure that many times (0 to turn retrying off), waiting retry_base_delay
+# seconds doubled per attempt up to retry_max_delay, with jitter.
+# breaker_threshold consecutive host failures open that host's circuit (0 to
+# turn the breaker off); after breaker_cooldown seconds one probe is let through.
+RETRY_ATTEMPTS = 2
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 10.0
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 60
+
+# Connection-level browser errors that may well pass on a second try. Anything
+# else (a login error, a missing form, an exhausted deadline) would fail the
+# same way again.
+TRANSIENT_ERRORS = (
+    "ERR_CONNECTION_RESET", "ERR_CONNECTION_CLOSED", "ERR_CONNECTION_REFUSED", "ERR_CONNECTION_TIMED_OUT",
+    "ERR_CONNECTION_ABORTED", "ERR_TIMED_OUT", "ERR_EMPTY_RESPONSE", "ERR_NETWORK_CHANGED",
+    "ERR_NAME_RESOLUTION_FAILED", "ERR_ADDRESS_UNREACHABLE", "ERR_INTERNET_DISCONNECTED"
+)
+# What check_login reports when the page load itself (driver.get or the wait
+# for the document to be ready) times out. A form field that never appears on a
+# loaded page is reported as a login failure instead
+PAGE_LOAD_TIMEOUT_STATUS = "Timeout - Site might be down or too slow"
+
+def is_transient(status):
+    """True if a check's status is a connection failure worth retrying"""
+    if status == PAGE_LOAD_TIMEOUT_STATUS:
+        return True
+    return status.startswith("Error:") and any(error in status for error in TRANSIENT_ERRORS)
+
+def host_answered(status):
+    """True if the host served its login page, False if it couldn't be reached, None if unknown"""
+    if is_transient(status):
+        return False
+    if status == "Success" or status.startswith("Login Failed"):
+        return True
+    return None
+
+def backoff_delay(attempt, base=RETRY_BASE_DELAY, maximum=RETRY_MAX_DELAY):
+    """Seconds to wait before retry number attempt + 1: exponential, capped, with jitter
+
+    Half of the delay is fixed and half random, so workers that failed
+    together don't all retry at the same moment.
+    """
+    delay = min(maximum, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def host_of(url):
+    return urlsplit(url).hostname or url
+
+class HostBreakers:
+    """A circuit breaker per host, shared by all checks in the process
+
+    A host's circuit opens after threshold consecutive failures; while it is
+    open, checks of that host fail fast without touching a browser. Once
+    cooldown seconds have passed, one check is let through as a probe: if the
+    host answers the circuit closes, otherwise it stays open for another
+    cooldown.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        # host -> {'failures', 'opened_at', 'probing'}
+        self.hosts = {}
+
+    def allow(self, url):
+        """True if url may be checked now; False means its host's circuit is open"""
+        host = host_of(url)
+        with self.lock:
+            state = self.hosts.get(host)
+            if state is None or state['failures'] < self.threshold:
+                return True
+            if state['probing'] or time.monotonic() - state['opened_at'] < self.cooldown:
+                return False
+            state['probing'] = True
+        print(f"Circuit for {host} half-open, probing with {url}")
+        events.emit('circuit', host=host, state='half_open', url=url)
+        return True
+
+    def record(self, url, status):
+        """Update the host's circuit with the outcome of a check that allow() let through"""
+        host = host_of(url)
+        answered = host_answered(status)
+        with self.lock:
+            state = self.hosts.get(host)
+            if answered is None:
+                # Says nothing about the host; just free the probe slot
+                if state is not None:
+                    state['probing'] = False
+                return
+            if answered:
+                self.hosts.pop(host, None)
+                was_open = state is not None and state['failures'] >= self.threshold
+            else:
+                state = self.hosts.setdefault(host, {'failures': 0, 'opened_at': None, 'probing': False})
+                state['failures'] += 1
+                # A failed probe opens the circuit again; checks already under way
+                # when it opened don't restart the cooldown
+                opened = state['failures'] == self.threshold or state['probing']
+                state['probing'] = False
+                if opened:
+                    state['opened_at'] = time.monotonic()
+                failures = state['failures']
+        if answered and was_open:
+            print(f"Circuit for {host} closed")
+            events.emit('circuit', host=host, state='closed')
+        elif not answered and opened:
+            print(f"Circuit for {host} open after {failures} consecutive failures")
+            events.emit('circuit', host=host, state='open', failures=failures)
+
+    def unavailable_status(self, url):
+        host = host_of(url)
+        with self.lock:
+            failures = self.hosts.get(host, {}).get('failures', 0)
+        return f"Unreachable - Host unavailable ({host} failed {failures} checks in a row, circuit open)"
+
+_breakers = None
+_breakers_lock = threading.Lock()
+
+def get_breakers(config):
+    """The process-wide host breakers, or None if breaker_threshold is 0 in config.json"""
+    global _breakers
+    threshold = config.get('breaker_threshold', BREAKER_THRESHOLD)
+    cooldown = config.get('breaker_cooldown', BREAKER_COOLDOWN)
+    if not threshold:
+        return None
+    with _breakers_lock:
+        if _breakers is None or (_breakers.threshold, _breakers.cooldown) != (threshold, cooldown):
+            _breakers = HostBreakers(threshold, cooldown)
+        return _breakers
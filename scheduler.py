@@ -0,0 +1,220 @@
+import argparse
+import heapq
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+import events
+from login_checker import load_config, run_checks
+from preflight import dedupe_urls
+
+# Schedule defaults, overridable under "schedule" in config.json
+DEFAULT_INTERVAL = 300
+MIN_INTERVAL = 30
+BATCH_WINDOW = 5
+JITTER = 0.1
+MAX_BACKOFF = 8
+RECOVERY_FACTOR = 0.5
+RECOVERY_CHECKS = 3
+
+class UrlSchedule:
+    """Check interval state for one URL
+
+    Repeated failures back the interval off exponentially (up to max_backoff
+    times the base interval) so a site that is down isn't hammered. After a
+    failure streak ends, the next few checks run at a tightened interval to
+    confirm the recovery.
+    """
+
+    def __init__(self, url, interval):
+        self.url = url
+        self.interval = interval
+        self.failures = 0
+        self.recovery_left = 0
+        self.last_verdict = None
+
+    def record(self, verdict, recovery_checks=RECOVERY_CHECKS):
+        if verdict == 'success':
+            if self.failures:
+                self.recovery_left = recovery_checks
+            elif self.recovery_left:
+                self.recovery_left -= 1
+            self.failures = 0
+        else:
+            self.failures += 1
+            self.recovery_left = 0
+        self.last_verdict = verdict
+
+    def next_interval(self, settings):
+        """Seconds until the next check, with backoff, recovery and jitter applied"""
+        interval = self.interval
+        if self.failures > 1:
+            interval *= min(2 ** (self.failures - 1), settings['max_backoff'])
+        elif self.recovery_left:
+            interval *= settings['recovery_factor']
+        interval *= 1 + random.uniform(-settings['jitter'], settings['jitter'])
+        return max(settings['min_interval'], interval)
+
+def schedule_settings(config):
+    """Scheduler settings from config.json with defaults filled in"""
+    schedule = config.get('schedule', {})
+    return {
+        'interval': schedule.get('interval', DEFAULT_INTERVAL),
+        'intervals': schedule.get('intervals', {}),
+        'min_interval': schedule.get('min_interval', MIN_INTERVAL),
+        'batch_window': schedule.get('batch_window', BATCH_WINDOW),
+        'jitter': schedule.get('jitter', JITTER),
+        'max_backoff': schedule.get('max_backoff', MAX_BACKOFF),
+        'recovery_factor': schedule.get('recovery_factor', RECOVERY_FACTOR),
+        'recovery_checks': schedule.get('recovery_checks', RECOVERY_CHECKS),
+    }
+
+class Scheduler:
+    """Runs checks continuously, each URL on its own interval
+
+    A heap holds exactly one next-due entry per URL, so a URL that falls behind
+    (e.g. while a long batch runs) is checked once when it comes up rather than
+    once per missed interval. Every URL due at the same time is checked in one
+    batch, along with any due within the next few seconds, and browser
+    sessions stay warm between batches.
+    """
+
+    def __init__(self, session_count=None):
+        self.heap = []
+        self.schedules = {}
+        self.session_count = session_count
+        self.browser_pool = None
+        self.stopping = threading.Event()
+        self.batches = 0
+
+    def sync_urls(self, config, settings, now):
+        """Add newly configured URLs, spread over their first interval, and drop removed ones"""
+        urls = dedupe_urls(config.get('urls', []))
+        for url in list(self.schedules):
+            if url not in urls:
+                del self.schedules[url]
+        for url in urls:
+            interval = settings['intervals'].get(url, settings['interval'])
+            if url in self.schedules:
+                self.schedules[url].interval = interval
+                continue
+            self.schedules[url] = UrlSchedule(url, interval)
+            # Staggered first checks keep the load even from the start
+            heapq.heappush(self.heap, (now + random.uniform(0, interval), url))
+        self.heap = [(due, url) for due, url in self.heap if url in self.schedules]
+        heapq.heapify(self.heap)
+
+    def pop_due(self, now, window=0):
+        """Pop every URL due within window seconds from now, once each"""
+        due_urls = []
+        while self.heap and self.heap[0][0] <= now + window:
+            _, url = heapq.heappop(self.heap)
+            if url not in due_urls:
+                due_urls.append(url)
+        return due_urls
+
+    def run_browser(self, urls, on_result, budget=None):
+        """Check URLs on warm browser sessions, launched the first time a batch needs one"""
+        if self.browser_pool is None:
+            # Imported here so a schedule the HTTP engine handles never launches a browser
+            from checker_daemon import CheckerDaemon
+            self.browser_pool = CheckerDaemon(self.session_count)
+        return self.browser_pool.run_browser(urls, on_result, budget)
+
+    def run_batch(self, config, settings, urls):
+        self.batches += 1
+        if self.browser_pool is not None:
+            self.browser_pool.reload_config()
+        print(f"\n[{datetime.now():%Y-%m-%d %H:%M:%S}] Checking {len(urls)} due URL(s)")
+        results = run_checks(config, urls=urls, run_browser=self.run_browser)
+
+        now = time.time()
+        for url in urls:
+            schedule = self.schedules.get(url)
+            if schedule is None:
+                continue
+            verdict = results[url]['verdict'] if url in results else 'error'
+            # A URL skipped for the run budget wasn't checked; keep its backoff as it was
+            if verdict != 'skipped':
+                schedule.record(verdict, settings['recovery_checks'])
+            delay = schedule.next_interval(settings)
+            heapq.heappush(self.heap, (now + delay, url))
+            events.emit('schedule', url=url, verdict=verdict, failures=schedule.failures,
+                        next_check=datetime.fromtimestamp(now + delay).isoformat(timespec="seconds"))
+            print(f"{verdict:<12} next check in {delay:>6.0f}s  {url}")
+
+    def requeue(self, urls, settings):
+        """Put popped URLs that aren't back on the heap yet due again after their current interval"""
+        queued = {url for _, url in self.heap}
+        now = time.time()
+        for url in urls:
+            schedule = self.schedules.get(url)
+            if schedule is not None and url not in queued:
+                heapq.heappush(self.heap, (now + schedule.next_interval(settings), url))
+
+    def run(self, max_batches=None):
+        """Check due URLs until stop() is called (or max_batches batches have run)"""
+        while not self.stopping.is_set():
+            config = load_config()
+            settings = schedule_settings(config)
+            if self.session_count is None:
+                self.session_count = max(1, config.get('max_workers', 1))
+            now = time.time()
+            self.sync_urls(config, settings, now)
+
+            if self.heap and self.heap[0][0] <= now:
+                # Checks due within the batch window join this batch instead of starting their own
+                urls = self.pop_due(now, settings['batch_window'])
+            else:
+                urls = []
+            if urls:
+                try:
+                    self.run_batch(config, settings, urls)
+                except Exception as e:
+                    # One failed batch must not stop the schedule or lose its URLs
+                    print(f"Batch of {len(urls)} URL(s) failed: {str(e)}")
+                    self.requeue(urls, settings)
+                if max_batches is not None and self.batches >= max_batches:
+                    break
+                continue
+
+            # Sleep until the next check is due, waking up now and then for config changes
+            wait = min(self.heap[0][0] - now, settings['min_interval']) if self.heap else settings['min_interval']
+            self.stopping.wait(max(0, wait))
+
+    def stop(self):
+        self.stopping.set()
+
+    def shutdown(self):
+        self.stop()
+        if self.browser_pool is not None:
+            self.browser_pool.shutdown()
+
+def run_scheduler(max_batches=None):
+    """Run the scheduler in the foreground until Ctrl+C"""
+    scheduler = Scheduler()
+    print("Scheduler started, press Ctrl+C to stop")
+    try:
+        scheduler.run(max_batches)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.shutdown()
+    print("Scheduler stopped")
+
+def main():
+    parser = argparse.ArgumentParser(description="Check configured URLs continuously, each on its own interval")
+    parser.add_argument("--batches", type=int, default=None, help="Stop after this many batches (default: run forever)")
+    parser.add_argument("--jsonl", action="store_true",
+                        help="Write one JSON event per line to stdout; human readable output goes to stderr")
+    args = parser.parse_args()
+
+    if args.jsonl:
+        events.enable(sys.stdout)
+        sys.stdout = sys.stderr
+    run_scheduler(args.batches)
+
+if __name__ == "__main__":
+    main()
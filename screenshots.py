@@ -0,0 +1,171 @@
+import atexit
+import base64
+import hashlib
+import os
+import queue
+import re
+import threading
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import WebDriverException
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "screenshots")
+
+# Retention defaults, overridable in config.json
+MAX_TOTAL_MB = 200
+MAX_PER_URL = 20
+
+# Going over the total budget prunes the oldest images down to this share of
+# it, so the next few writes don't each rescan the whole tree
+PRUNE_TO = 0.9
+
+# Writes between full rescans of the directory, which pick up images written
+# or removed by other processes (shard workers, the daemon)
+RESCAN_EVERY = 200
+
+# JPEG keeps failure pages readable at a fraction of the PNG size
+SCREENSHOT_FORMAT = "jpeg"
+SCREENSHOT_QUALITY = 70
+
+def url_directory(url):
+    """A readable, collision-free directory name for a URL"""
+    parts = urlsplit(url)
+    readable = re.sub(r"[^A-Za-z0-9.-]+", "_", f"{parts.netloc}{parts.path}").strip("_")[:80]
+    return f"{readable}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}"
+
+class ScreenshotWriter:
+    """Writes screenshots from a background thread and keeps the directory within budget
+
+    Images are named by a hash of their content, so the same failure page seen
+    again is stored once (its file is just marked as recent). The directory's
+    total size is kept as a running count, so a write only scans the URL's own
+    directory; the whole tree is scanned when the budget is exceeded and every
+    RESCAN_EVERY writes.
+    """
+
+    def __init__(self, root=DEFAULT_DIR, max_total_mb=MAX_TOTAL_MB, max_per_url=MAX_PER_URL):
+        self.root = root
+        self.max_total_bytes = max_total_mb * 1024 * 1024
+        self.max_per_url = max_per_url
+        # Bytes of images under root, or None until the first scan
+        self.total = None
+        self.writes = 0
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="screenshot-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, url, data, extension):
+        """Queue an image for writing and return the path it will have"""
+        digest = hashlib.sha256(data).hexdigest()[:20]
+        path = os.path.join(self.root, url_directory(url), f"{digest}.{extension}")
+        self.queue.put((path, data))
+        return path
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                path, data = item
+                self.write(path, data)
+            except OSError as e:
+                print(f"Could not save screenshot: {e}")
+            finally:
+                self.queue.task_done()
+
+    def write(self, path, data):
+        if os.path.exists(path):
+            # Same image as before: keep one copy, but count it as the newest
+            os.utime(path)
+            added = 0
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = path + ".tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            added = len(data)
+        self.writes += 1
+        if self.total is not None and self.writes % RESCAN_EVERY:
+            self.total += added
+        else:
+            self.total = None
+        self.enforce_retention(os.path.dirname(path))
+
+    def enforce_retention(self, url_dir):
+        """Keep the newest max_per_url images of the URL and max_total_mb overall"""
+        files = sorted(scan_images(url_dir), key=lambda entry: entry[1], reverse=True)
+        for path, _, size in files[self.max_per_url:]:
+            remove(path)
+            if self.total is not None:
+                self.total -= size
+
+        if self.total is not None and self.total <= self.max_total_bytes:
+            return
+        files = sorted((entry for directory in scan_dirs(self.root) for entry in scan_images(directory)),
+                       key=lambda entry: entry[1])
+        self.total = sum(size for _, _, size in files)
+        if self.total <= self.max_total_bytes:
+            return
+        for path, _, size in files:
+            if self.total <= self.max_total_bytes * PRUNE_TO:
+                break
+            remove(path)
+            self.total -= size
+
+    def flush(self):
+        """Block until every queued screenshot is on disk"""
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+def scan_dirs(root):
+    try:
+        return [entry.path for entry in os.scandir(root) if entry.is_dir()]
+    except FileNotFoundError:
+        return []
+
+def scan_images(directory):
+    """(path, mtime, size) of the finished images in a directory"""
+    try:
+        return [(entry.path, entry.stat().st_mtime, entry.stat().st_size)
+                for entry in os.scandir(directory) if entry.is_file() and not entry.name.endswith(".tmp")]
+    except FileNotFoundError:
+        return []
+
+def remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer(config):
+    """The process-wide writer, started on first use and flushed at exit"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ScreenshotWriter(config.get('screenshot_dir', DEFAULT_DIR),
+                                       config.get('screenshot_max_mb', MAX_TOTAL_MB),
+                                       config.get('screenshot_max_per_url', MAX_PER_URL))
+            atexit.register(_writer.close)
+        return _writer
+
+def capture(driver, url, config):
+    """Take a screenshot of the current page and hand it to the background writer
+
+    Returns the path the image is written to.
+    """
+    quality = config.get('screenshot_quality', SCREENSHOT_QUALITY)
+    try:
+        # The browser does the compression; only the encoded image crosses the wire
+        result = driver.execute_cdp_cmd("Page.captureScreenshot", {'format': SCREENSHOT_FORMAT, 'quality': quality})
+        data, extension = base64.b64decode(result['data']), "jpg"
+    except WebDriverException:
+        data, extension = driver.get_screenshot_as_png(), "png"
+    return get_writer(config).submit(url, data, extension)
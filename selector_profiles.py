@@ -0,0 +1,174 @@
+import argparse
+import atexit
+import json
+import os
+import threading
+from datetime import datetime
+
+DEFAULT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selector_profiles.json")
+
+# Learned error selectors kept per URL, most recently seen first
+MAX_LEARNED_ERRORS = 3
+
+# Seconds after a learned change before the file is written, so a run that
+# learns many sites writes it once per interval instead of once per site
+SAVE_DELAY = 5
+
+# Profile keys holding a single (By, value) locator; 'errors' holds a list
+LOCATOR_KEYS = ("username", "password", "submit", "success")
+
+class SelectorProfiles:
+    """Per-URL record of the locators that worked, so later checks try them first
+
+    Profiles only change the order selectors are tried in, so a stale profile
+    costs extra lookups but never a wrong verdict. A profile entry is replaced
+    as soon as a different locator matches, and dropped when nothing matches
+    on a fully loaded page.
+
+    Changes are written SAVE_DELAY seconds after the first unsaved one (and
+    at exit), merged into the file as it is on disk then, so processes sharing
+    it (shard workers, the daemon, the command line) keep each other's
+    profiles.
+    """
+
+    def __init__(self, path=DEFAULT_FILE, save_delay=SAVE_DELAY):
+        self.path = path
+        self.save_delay = save_delay
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.profiles = self.read()
+        # url -> profile changed since the last save, or None if it was dropped
+        self.unsaved = {}
+        self.cleared = False
+        self.timer = None
+
+    def read(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def get(self, url):
+        """Return {key: (By, value)} plus 'errors': [(By, value), ...] for a URL"""
+        with self.lock:
+            stored = self.profiles.get(url, {})
+            profile = {key: tuple(stored[key]) for key in LOCATOR_KEYS if key in stored}
+            profile['errors'] = [tuple(locator) for locator in stored.get('errors', [])]
+            return profile
+
+    def update(self, url, changes):
+        """Apply learned locators for a URL; a value of None forgets that key"""
+        with self.lock:
+            stored = self.profiles.get(url, {})
+            changed = False
+            for key, locator in changes.items():
+                if key == 'errors':
+                    errors = [list(locator)] + [error for error in stored.get('errors', []) if error != list(locator)]
+                    errors = errors[:MAX_LEARNED_ERRORS]
+                    changed = changed or errors != stored.get('errors')
+                    stored['errors'] = errors
+                elif locator is None:
+                    changed = changed or key in stored
+                    stored.pop(key, None)
+                else:
+                    changed = changed or stored.get(key) != list(locator)
+                    stored[key] = list(locator)
+            if not changed:
+                return
+            stored['updated'] = datetime.now().isoformat(timespec="seconds")
+            self.profiles[url] = stored
+            self.unsaved[url] = stored
+            if self.timer is None:
+                self.timer = threading.Timer(self.save_delay, self.save)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def forget(self, url=None):
+        """Drop the profile of one URL, or of every URL, and save straight away"""
+        with self.lock:
+            if url is None:
+                self.profiles = {}
+                self.unsaved = {}
+                self.cleared = True
+            else:
+                self.profiles.pop(url, None)
+                self.unsaved[url] = None
+        self.save()
+
+    def save(self):
+        """Merge the unsaved changes into the file on disk and replace it atomically"""
+        with self.save_lock:
+            with self.lock:
+                changes, cleared = self.unsaved, self.cleared
+                self.unsaved, self.cleared, self.timer = {}, False, None
+            if not changes and not cleared:
+                return
+            merged = {} if cleared else self.read()
+            for url, stored in changes.items():
+                if stored is None:
+                    merged.pop(url, None)
+                else:
+                    merged[url] = stored
+            # A temp file of its own, as other processes may be saving at the same time
+            temp_path = f"{self.path}.{os.getpid()}-{threading.get_ident()}.tmp"
+            try:
+                with open(temp_path, 'w') as f:
+                    json.dump(merged, f, indent=4)
+                os.replace(temp_path, self.path)
+            except OSError as e:
+                print(f"Could not save selector profiles: {e}")
+                with self.lock:
+                    self.unsaved = {**changes, **self.unsaved}
+                    self.cleared = self.cleared or cleared
+                return
+            with self.lock:
+                # Pick up what other processes learned, keeping changes made during the write
+                self.profiles = {**merged, **{url: stored for url, stored in self.unsaved.items()
+                                              if stored is not None}}
+                for url, stored in self.unsaved.items():
+                    if stored is None:
+                        self.profiles.pop(url, None)
+
+_profiles = None
+_profiles_lock = threading.Lock()
+
+def get_profiles(config):
+    """The process-wide profile store, or None if selector_profiles is empty in config.json"""
+    global _profiles
+    path = config.get('selector_profiles', DEFAULT_FILE)
+    if not path:
+        return None
+    with _profiles_lock:
+        if _profiles is None or _profiles.path != path:
+            if _profiles is not None:
+                _profiles.save()
+            _profiles = SelectorProfiles(path)
+            atexit.register(_profiles.save)
+        return _profiles
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or reset learned per-site selector profiles")
+    parser.add_argument("--forget", metavar="URL", help="Drop the profile of one URL so it is learned again")
+    parser.add_argument("--clear", action="store_true", help="Drop every profile")
+    parser.add_argument("--file", default=DEFAULT_FILE, help=f"Profile file (default: {DEFAULT_FILE})")
+    args = parser.parse_args()
+
+    profiles = SelectorProfiles(args.file)
+    if args.clear:
+        profiles.forget()
+        print("Cleared all selector profiles")
+    elif args.forget:
+        profiles.forget(args.forget)
+        print(f"Forgot selector profile for {args.forget}")
+    else:
+        for url, stored in sorted(profiles.profiles.items()):
+            print(f"{url} (updated {stored.get('updated', '?')})")
+            for key in LOCATOR_KEYS:
+                if key in stored:
+                    print(f"  {key:<9} {stored[key][0]}: {stored[key][1]}")
+            for locator in stored.get('errors', []):
+                print(f"  {'error':<9} {locator[0]}: {locator[1]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_PORT = 5000
+SLOW_DELAY = 1.0
+
+# Scenarios served under /<scenario>/<n>; "/" is the valid login scenario
+SCENARIOS = ("valid", "bad", "modal", "slow", "hang", "error", "js", "heavy")
+
+# The heavy scenario's page pulls in images, a web font, a video and a tracker
+# script, each served from /static/ after ASSET_DELAY
+ASSET_DELAY = 0.1
+ASSET_SIZE = 200 * 1024
+HEAVY_ASSETS = """<link rel="preload" href="/static/brand.woff2" as="font" crossorigin>
+<style>@font-face {{ font-family: Brand; src: url("/static/brand.woff2"); }} body {{ font-family: Brand; }}</style>
+{images}
+<video src="/static/intro.mp4" autoplay muted></video>
+<script src="/static/tracker.js?google-analytics.com"></script>"""
+HEAVY_IMAGE_COUNT = 12
+ASSET_TYPES = {".png": "image/png", ".woff2": "font/woff2", ".mp4": "video/mp4", ".js": "text/javascript"}
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>{title}</title></head>
+<body>
+{body}
+</body></html>"""
+
+LOGIN_FORM = """<form method="post" action="{action}">
+  <input type="hidden" name="csrf_token" value="{token}">
+  {message}
+  <label>Username <input name="username" autocomplete="username"></label>
+  <label>Password <input name="password" type="password" autocomplete="current-password"></label>
+  <button type="submit">Sign in</button>
+</form>"""
+
+ALERT = '<div class="alert alert-danger" role="alert">Invalid username or password.</div>'
+
+MODAL = """<div class="modal show" role="dialog" style="display: block">
+  <div class="modal-dialog"><div class="modal-content">
+    <div class="modal-header"><h5 class="modal-title">Sign in failed</h5></div>
+    <div class="modal-body">Invalid credentials. Please try again.</div>
+  </div></div>
+</div>"""
+
+DASHBOARD = """<div class="dashboard">
+  <h1>Welcome back</h1>
+  <p>You are signed in.</p>
+</div>"""
+
+# Form rendered and submitted by JavaScript, so only a browser can check it
+JS_APP = """<div id="app">Loading...</div>
+<script>
+document.addEventListener('DOMContentLoaded', function() {
+  setTimeout(function() {
+    var app = document.getElementById('app');
+    app.innerHTML = '<form id="login"><input name="username"><input name="password" type="password">' +
+                    '<button type="submit">Sign in</button></form><div id="message"></div>';
+    document.getElementById('login').addEventListener('submit', function(event) {
+      event.preventDefault();
+      fetch(location.pathname.replace(/\\/$/, '') + '/api', {
+        method: 'POST',
+        body: new URLSearchParams(new FormData(event.target))
+      }).then(function(response) { return response.json(); }).then(function(result) {
+        if (result.ok) {
+          app.innerHTML = '<div class="dashboard"><h1>Welcome back</h1></div>';
+        } else {
+          document.getElementById('message').innerHTML =
+            '<div class="alert alert-danger">Invalid username or password.</div>';
+        }
+      });
+    });
+  }, 200);
+});
+</script>"""
+
+PATH_PATTERN = re.compile(r"^/(?:(?P<scenario>[a-z]+)(?:/(?P<n>\d+))?)?/?(?P<rest>dashboard|api)?$")
+
+class LoginRequestHandler(BaseHTTPRequestHandler):
+    """Serves one login page per scenario and judges the posted credentials"""
+
+    def parse_path(self):
+        path = urlsplit(self.path).path
+        match = PATH_PATTERN.match(path.rstrip("/") or "/")
+        if not match:
+            return None, None, None
+        scenario = match.group("scenario") or "valid"
+        rest = match.group("rest")
+        if scenario in ("dashboard", "api") and not match.group("n") and not rest:
+            # Pages under the bare "/" login, e.g. /dashboard
+            return "valid", "", scenario
+        if scenario not in SCENARIOS:
+            return None, None, None
+        base = path.rsplit("/" + rest, 1)[0] if rest else path
+        return scenario, base.rstrip("/"), rest
+
+    def send_page(self, status, title, body, headers=None):
+        data = PAGE.format(title=title, body=body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def login_form(self, base, message=""):
+        return LOGIN_FORM.format(action=base or "/", token=f"token-{threading.get_ident()}", message=message)
+
+    def delay(self, scenario):
+        server = self.server
+        if scenario == "slow":
+            time.sleep(server.slow_delay)
+        elif scenario == "hang":
+            # Hold the connection until the server stops
+            server.stopping.wait()
+            return True
+        return False
+
+    def send_asset(self):
+        path = urlsplit(self.path).path
+        extension = path[path.rfind("."):]
+        time.sleep(ASSET_DELAY)
+        # Padding that is still valid for the type where it matters
+        data = b"/*" + b" " * ASSET_SIZE + b"*/" if extension == ".js" else b"\0" * ASSET_SIZE
+        self.send_response(200)
+        self.send_header("Content-Type", ASSET_TYPES.get(extension, "application/octet-stream"))
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "max-age=3600")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith("/static/"):
+            self.send_asset()
+            return
+        scenario, base, rest = self.parse_path()
+        if scenario is None:
+            self.send_error(404)
+            return
+        if self.delay(scenario):
+            return
+        if scenario == "error":
+            self.send_page(500, "Server Error", "<h1>Internal Server Error</h1>")
+        elif rest == "dashboard":
+            if f"session={self.server.session_token}" in self.headers.get("Cookie", ""):
+                self.send_page(200, "Dashboard", DASHBOARD)
+            else:
+                self.send_page(303, "Redirect", "", {"Location": base or "/"})
+        elif scenario == "js":
+            self.send_page(200, "Sign in", JS_APP)
+        elif scenario == "heavy":
+            images = "\n".join(f'<img src="/static/banner-{i}.png" alt="">' for i in range(HEAVY_IMAGE_COUNT))
+            self.send_page(200, "Sign in", self.login_form(base) + HEAVY_ASSETS.format(images=images))
+        else:
+            self.send_page(200, "Sign in", self.login_form(base))
+
+    def do_POST(self):
+        scenario, base, rest = self.parse_path()
+        if scenario is None:
+            self.send_error(404)
+            return
+        if self.delay(scenario):
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        fields = parse_qs(self.rfile.read(length).decode("utf-8"))
+        valid = (fields.get("username", [""])[0] == self.server.username and
+                 fields.get("password", [""])[0] == self.server.password)
+
+        if scenario == "error":
+            self.send_page(500, "Server Error", "<h1>Internal Server Error</h1>")
+        elif scenario == "js" and rest == "api":
+            data = json.dumps({'ok': valid}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        elif scenario == "bad" or not valid:
+            self.send_page(200, "Sign in", self.login_form(base, ALERT))
+        elif scenario == "modal":
+            self.send_page(200, "Sign in", self.login_form(base) + MODAL)
+        else:
+            self.send_page(303, "Redirect", "", {
+                "Location": f"{base}/dashboard",
+                "Set-Cookie": f"session={self.server.session_token}; Path=/"
+            })
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+class LoginServer(ThreadingHTTPServer):
+    """Local stand-in login server with configurable scenarios"""
+    daemon_threads = True
+
+    def __init__(self, port=DEFAULT_PORT, username="username", password="password",
+                 slow_delay=SLOW_DELAY, verbose=False):
+        super().__init__(("127.0.0.1", port), LoginRequestHandler)
+        self.username = username
+        self.password = password
+        self.slow_delay = slow_delay
+        self.verbose = verbose
+        self.session_token = "stand-in-session"
+        self.stopping = threading.Event()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def url(self, scenario, n=0):
+        return f"{self.base_url}/{scenario}/{n}"
+
+    def start(self):
+        """Serve from a background thread and return self"""
+        threading.Thread(target=self.serve_forever, name="login-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        self.shutdown()
+        self.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in login server for testing the checker")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port (default: {DEFAULT_PORT})")
+    parser.add_argument("--username", default=None, help="Accepted username (default: from config.json)")
+    parser.add_argument("--password", default=None, help="Accepted password (default: from config.json)")
+    parser.add_argument("--slow-delay", type=float, default=SLOW_DELAY,
+                        help=f"Seconds the slow scenario waits per request (default: {SLOW_DELAY})")
+    args = parser.parse_args()
+
+    from login_checker import load_config
+    credentials = load_config().get('credentials', {})
+    server = LoginServer(args.port,
+                         args.username or credentials.get('username', 'username'),
+                         args.password or credentials.get('password', 'password'),
+                         args.slow_delay, verbose=True)
+    print(f"Login server on {server.base_url}")
+    for scenario in SCENARIOS:
+        print(f"  {scenario:<6} {server.url(scenario)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stopping.set()
+        server.server_close()
+
+if __name__ == "__main__":
+    main()